@@ -0,0 +1,81 @@
+"""
+Recall-vs-latency benchmark of the approximate nearest-neighbour backends against exact search.
+
+Usage:
+    PYTHONPATH=. python benchmarks/ann_benchmark.py --n 100000 --dim 1024 --output ann.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.ann import ExactIndex, IVFFlatIndex, create_ann_index
+
+
+# Синтетические эмбеддинги: кластеры вокруг случайных центров, как у похожих команд и кейсов
+def make_vectors(n: int, dim: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    return centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def run_backend(name, index, vectors, queries, exact_results, k):
+    start = time.perf_counter()
+    index.build(vectors)
+    build_seconds = time.perf_counter() - start
+
+    latencies, recalls = [], []
+    for query, expected in zip(queries, exact_results):
+        start = time.perf_counter()
+        found, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found.tolist()) & expected) / len(expected))
+
+    return {
+        "backend": name,
+        "build_seconds": round(build_seconds, 4),
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(1000 * float(np.percentile(latencies, 50)), 3),
+        "latency_ms_p99": round(1000 * float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000, help="Number of indexed vectors")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector dimension (1024 for multilingual-e5-large)")
+    parser.add_argument("--clusters", type=int, default=500, help="Number of synthetic clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=100, help="Neighbours retrieved per query")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32], help="IVF n_probe values")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.n, args.dim, args.clusters)
+    queries = make_vectors(args.queries, args.dim, args.clusters, seed=1)
+
+    exact = ExactIndex().build(vectors)
+    exact_results = [set(exact.search(query, args.k)[0].tolist()) for query in queries]
+
+    results = [run_backend("exact", ExactIndex(), vectors, queries, exact_results, args.k)]
+    for n_probe in args.n_probe:
+        results.append(run_backend(f"ivf(n_probe={n_probe})", IVFFlatIndex(n_probe=n_probe),
+                                   vectors, queries, exact_results, args.k))
+    try:
+        for ef_search in (64, 128, 256):
+            results.append(run_backend(f"hnsw(ef_search={ef_search})", create_ann_index("hnsw", ef_search=ef_search),
+                                       vectors, queries, exact_results, args.k))
+    except ImportError:
+        print("hnswlib is not installed, skipping the HNSW backend")
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-batching under concurrent load: how many requests merge into one model pass.
+
+The model is replaced by `HashingEncoder` plus a sleep of `--fixed-ms` per forward pass and
+`--per-text-ms` per text, and only one forward pass runs at a time, as on a CPU the model
+saturates. `--requests` requests of `--texts` texts each are run by a pool of `--workers`
+threads, the way the inference pool (DPP_INFERENCE_WORKERS) runs them, through a
+`MicroBatcher` with `--max-wait-ms` (DPP_EMBEDDING_BATCH_MAX_WAIT_MS; 0 calls the model
+directly).
+
+Reported per number of workers and wait: throughput, median and p95 latency, number of model
+passes and mean texts per pass. Requests can only merge while several of them are inside the
+model at once, so with 1 worker every pass holds one request whatever the wait.
+
+Usage:
+    PYTHONPATH=. python benchmarks/batching_benchmark.py --workers 1 2 4 8 --max-wait-ms 0 5 --output batching.json
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import HashingEncoder, make_cases
+from src.batching import MicroBatcher
+from src.utils import build_case_text
+
+
+# Заглушка модели: один прогон за раз, стоимость — постоянная часть и доля на каждый текст
+class SlowEncoder:
+    def __init__(self, fixed_ms: float, per_text_ms: float):
+        self.fixed_ms = fixed_ms
+        self.per_text_ms = per_text_ms
+        self.encoder = HashingEncoder()
+        self.passes = 0
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        with self._lock:
+            self.passes += 1
+            time.sleep((self.fixed_ms + self.per_text_ms * len(texts)) / 1000)
+            return self.encoder.encode(texts)
+
+
+def run(workers: int, max_wait_ms: float, requests: list, args) -> dict:
+    model = SlowEncoder(args.fixed_ms, args.per_text_ms)
+    encoder = MicroBatcher(model.encode, args.max_batch_size, max_wait_ms) if max_wait_ms > 0 else model
+
+    def request(texts):
+        start = time.perf_counter()
+        encoder.encode(texts)
+        return 1000 * (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(request, requests))
+    seconds = time.perf_counter() - start
+    texts = sum(len(texts) for texts in requests)
+    return {
+        "workers": workers,
+        "max_wait_ms": max_wait_ms,
+        "requests_per_s": round(len(requests) / seconds, 1),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 1),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 1),
+        "model_passes": model.passes,
+        "texts_per_pass": round(texts / model.passes, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Inference threads")
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0, 5], help="Micro-batch waits; 0 disables batching")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Texts after which a batch runs at once")
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests")
+    parser.add_argument("--texts", type=int, default=1, help="Texts per request")
+    parser.add_argument("--fixed-ms", type=float, default=10, help="Cost of a forward pass regardless of its size")
+    parser.add_argument("--per-text-ms", type=float, default=1, help="Additional cost per text in a forward pass")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    cases = make_cases(args.requests * args.texts)
+    texts = [build_case_text(case) for case in cases]
+    requests = [texts[i:i + args.texts] for i in range(0, len(texts), args.texts)]
+    results = [run(workers, max_wait_ms, requests, args) for max_wait_ms in args.max_wait_ms for workers in args.workers]
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
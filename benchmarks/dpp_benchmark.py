@@ -0,0 +1,95 @@
+"""
+Latency and diversity benchmark of the DPP re-ranking stage against plain top-k.
+
+Candidates are clustered synthetic embeddings and skill vectors, so top-k by score picks many
+near-duplicates. As in the API, the DPP chooses among the `--pool` best-scored candidates
+(DPP_DIVERSITY_POOL_SIZE; 0 for all of them). For every setting the time to build the similarity
+features of the pool and the time of the greedy MAP selection are reported, together with the
+mean score and the mean pairwise similarity of the selected candidates.
+
+Usage:
+    PYTHONPATH=. python benchmarks/dpp_benchmark.py --n 1000 10000 --k 10 50 --pool 500 0 --output dpp.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.ann_benchmark import make_vectors
+from src.config import settings
+from src.ranking import select_diverse, select_top_k, similarity_features
+
+
+# Синтетические векторы навыков: у кандидатов одного кластера почти одинаковые навыки
+def make_skills(n: int, n_skills: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.random((n_clusters, n_skills)) < 0.05
+    labels = rng.integers(0, n_clusters, size=n)
+    noise = rng.random((n, n_skills)) < 0.01
+    return (centers[labels] ^ noise).astype(np.float32)
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, round(1000 * float(np.median(timings)), 3)
+
+
+def summarize(selected, scores, features):
+    similarity = features[selected] @ features[selected].T
+    off_diagonal = similarity[~np.eye(len(selected), dtype=bool)]
+    return {
+        "mean_score": round(float(scores[selected].mean()), 4),
+        "mean_pairwise_similarity": round(float(off_diagonal.mean()), 4) if len(off_diagonal) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, nargs="+", default=[1000, 10000], help="Numbers of candidates")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 50], help="Numbers of selected candidates")
+    parser.add_argument("--diversity", type=float, nargs="+", default=[0.3, 0.7], help="Trade-off values")
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimension (1024 for multilingual-e5-large)")
+    parser.add_argument("--skills", type=int, default=300, help="Size of the skill vocabulary")
+    parser.add_argument("--clusters", type=int, default=50, help="Number of synthetic clusters")
+    parser.add_argument("--pool", type=int, nargs="+", default=[settings.diversity_pool_size],
+                        help="Numbers of best-scored candidates the DPP chooses from; 0 for all")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats per measurement; the median is reported")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.n:
+        embeddings = make_vectors(n, args.dim, args.clusters)
+        skills = make_skills(n, args.skills, args.clusters)
+        features = similarity_features((embeddings, 0.5), (skills, 0.5))
+        # Оценки выше у кандидатов, похожих на первого: без разнообразия top-k состоит из его почти дубликатов
+        scores = 0.2 * np.random.default_rng(2).random(n) + 0.5 * np.clip(features @ features[0], 0, None)
+        for k in args.k:
+            selected, top_k_ms = timed(lambda: select_top_k(scores, k), args.repeat)
+            results.append({"n": n, "k": k, "method": "top_k", "select_ms_p50": top_k_ms,
+                            **summarize(selected, scores, features)})
+            for pool_size in args.pool:
+                pool = select_top_k(scores, pool_size) if 0 < pool_size < n else np.arange(n)
+                pool_features, features_ms = timed(
+                    lambda: similarity_features((embeddings[pool], 0.5), (skills[pool], 0.5)), args.repeat)
+                for diversity in args.diversity:
+                    selected, select_ms = timed(lambda: select_diverse(scores[pool], pool_features, k, diversity),
+                                                args.repeat)
+                    results.append({"n": n, "k": k, "pool": len(pool), "method": f"dpp(diversity={diversity})",
+                                    "features_ms_p50": features_ms, "select_ms_p50": select_ms,
+                                    **summarize(pool[selected], scores, features)})
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Request/response overhead of /recommend_team_to_person with large inline team lists.
+
+The endpoint needs no embedding model, so nearly all of its time is JSON parsing, Pydantic
+validation, the response cache key, skill encoding and response encoding. Requests go through
+the whole FastAPI app in-process. Every measured request differs in `confidence_percentile`, so
+it is a cache miss that computes the key and the scores; a repeated request measures a hit.
+
+Reported per number of teams (median over repeats):
+- body size and client-side latency of a miss and of a hit;
+- server-side stages from the Server-Timing header; "parse_validate" is the part of "total"
+  spent outside the named stages, mostly body parsing and validation;
+- the same body parsed and validated outside the app: "parse" is the codec alone, "validate"
+  is the Pydantic request model including its skill validators, and "skill_validators" is the
+  part of "validate" spent in `Team.canonical_skills` and `canonical_skills` of the person.
+  The codec only changes "parse"; validation is the same with either JSON library.
+
+With `--stdlib-json` the codec falls back to the standard json module, as without orjson; with
+`--gc-gen0-threshold N` the server's optional GC tuning (DPP_GC_GEN0_THRESHOLD) is applied.
+
+Usage:
+    PYTHONPATH=. python benchmarks/serialization_benchmark.py --teams 1000 5000 20000 --output serialization.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import make_persons, make_teams
+
+
+def server_timings(header: str) -> dict:
+    timings = {}
+    for entry in header.split(", "):
+        name, _, duration = entry.partition(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+
+def median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(1000 * (time.perf_counter() - start))
+    return round(float(np.median(timings)), 1)
+
+
+# Разбор и проверка тела вне приложения: вклад кодека отдельно от Pydantic и валидаторов навыков
+def parse_validate_ms(body: bytes, repeat: int) -> dict:
+    from main import RecommendTeamToPersonRequest, Team
+    from src.codec import loads
+
+    data = loads(body)
+    return {
+        "parse_ms": median_ms(lambda: loads(body), repeat),
+        "validate_ms": median_ms(lambda: RecommendTeamToPersonRequest.model_validate(data), repeat),
+        "skill_validators_ms": median_ms(lambda: (
+            RecommendTeamToPersonRequest.canonical_skills(data["person_skills"]),
+            [Team.canonical_skills(team["skills"]) for team in data["teams"]]), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, nargs="+", default=[1000, 5000, 20000], help="Numbers of teams per request")
+    parser.add_argument("--repeat", type=int, default=7, help="Requests per measurement; the median is reported")
+    parser.add_argument("--stdlib-json", action="store_true", help="Use the standard json module instead of orjson")
+    parser.add_argument("--gc-gen0-threshold", type=int, default=0,
+                        help="Youngest-generation GC threshold as DPP_GC_GEN0_THRESHOLD; 0 keeps Python's defaults")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.stdlib_json:
+        import src.codec
+
+        src.codec.orjson = None
+    from main import app, configure_gc
+
+    configure_gc(args.gc_gen0_threshold)
+    client = TestClient(app)
+    person_skills = make_persons(1)[0]
+    results = []
+    for n in args.teams:
+        teams = make_teams(n)
+        bodies = [json.dumps({"person_skills": person_skills, "teams": teams, "confidence_percentile": 0.9 - i / 1000},
+                             ensure_ascii=False).encode("utf-8") for i in range(args.repeat + 1)]
+        headers = {"Content-Type": "application/json", "X-Server-Timing": "1"}
+        client.post("/recommend_team_to_person", content=bodies[-1], headers=headers)
+
+        miss_ms, stages = [], []
+        for body in bodies[:-1]:
+            start = time.perf_counter()
+            response = client.post("/recommend_team_to_person", content=body, headers=headers)
+            miss_ms.append(1000 * (time.perf_counter() - start))
+            assert response.status_code == 200 and response.headers["X-Cache"] == "MISS"
+            stages.append(server_timings(response.headers["Server-Timing"]))
+        hit_ms = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.post("/recommend_team_to_person", content=bodies[-1], headers=headers)
+            hit_ms.append(1000 * (time.perf_counter() - start))
+            assert response.headers["X-Cache"] == "HIT"
+
+        stage_ms = {name: round(float(np.median([timing.get(name, 0.0) for timing in stages])), 2)
+                    for name in ("cache_lookup", "queue_wait", "compute", "ranking", "serialize", "total")}
+        named = stage_ms["cache_lookup"] + stage_ms["queue_wait"] + stage_ms["compute"] + stage_ms["serialize"]
+        results.append({
+            "teams": n,
+            "json": "stdlib" if args.stdlib_json else "orjson",
+            "gc_gen0_threshold": args.gc_gen0_threshold or None,
+            "body_mb": round(len(bodies[0]) / 1e6, 2),
+            "miss_ms_p50": round(float(np.median(miss_ms)), 1),
+            "hit_ms_p50": round(float(np.median(hit_ms)), 1),
+            **{f"{name}_ms": value for name, value in stage_ms.items()},
+            "parse_validate_ms": round(stage_ms["total"] - named, 1),
+            **parse_validate_ms(bodies[0], args.repeat),
+        })
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
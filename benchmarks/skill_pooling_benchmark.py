@@ -0,0 +1,100 @@
+"""
+Accuracy and cost of team embeddings pooled from per-skill embeddings against the full-text path.
+
+For synthetic teams and cases, teams are embedded both ways: with the model on the team text
+(DPP_TEAM_EMBEDDING=text) and as a weighted mean of skill embeddings (DPP_TEAM_EMBEDDING=skills,
+with "count" and "idf" weights). Reported per weighting:
+- cosine between the pooled and the text embedding of the same team;
+- Spearman correlation of the case -> team ranking by embedding similarity, averaged over cases;
+- overlap of the top-k teams per case by embedding similarity and by hybrid similarity;
+- seconds per team for both paths. The embedding cache is bypassed, so the text path runs the model.
+
+Usage:
+    PYTHONPATH=. python benchmarks/skill_pooling_benchmark.py --teams 2000 --cases 100 --output pooling.json
+    PYTHONPATH=. python benchmarks/skill_pooling_benchmark.py --encoder hashing
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import HashingEncoder, make_cases, make_teams
+from src.catalogue import normalize_rows
+from src.embeddings import TextEncoder, model_registry
+from src.skill_embeddings import SkillEmbeddingTable
+from src.utils import build_case_text, build_team_text, skill_similarities_to_teams
+
+
+def ranks(matrix: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(matrix, axis=1), axis=1).astype(np.float64)
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra, rb = ranks(a), ranks(b)
+    ra -= ra.mean(axis=1, keepdims=True)
+    rb -= rb.mean(axis=1, keepdims=True)
+    return float(np.mean((ra * rb).sum(axis=1) / np.sqrt((ra ** 2).sum(axis=1) * (rb ** 2).sum(axis=1))))
+
+
+def top_k_overlap(a: np.ndarray, b: np.ndarray, k: int) -> float:
+    top_a = np.argpartition(-a, k - 1, axis=1)[:, :k]
+    top_b = np.argpartition(-b, k - 1, axis=1)[:, :k]
+    return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(top_a, top_b)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=2000, help="Number of teams")
+    parser.add_argument("--cases", type=int, default=100, help="Number of cases")
+    parser.add_argument("--k", type=int, default=10, help="Top-k used for the overlap")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight for embedding similarity")
+    parser.add_argument("--beta", type=float, default=0.5, help="Weight for skill similarity")
+    parser.add_argument("--encoder", choices=["model", "hashing"], default="model",
+                        help="Configured embedding model or the offline hashing stub")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    teams, cases = make_teams(args.teams), make_cases(args.cases)
+    encoder = TextEncoder(*model_registry.get()) if args.encoder == "model" else HashingEncoder()
+
+    case_embeddings = normalize_rows(encoder.encode([build_case_text(case) for case in cases]))
+    start = time.perf_counter()
+    text_embeddings = normalize_rows(encoder.encode([build_team_text(team['skills']) for team in teams]))
+    text_seconds = (time.perf_counter() - start) / len(teams)
+    text_similarity = case_embeddings @ text_embeddings.T
+    skill_similarity = np.vstack([skill_similarities_to_teams(case, teams) for case in cases])
+    text_hybrid = args.alpha * text_similarity + args.beta * skill_similarity
+
+    results = []
+    for weighting in ("count", "idf"):
+        table = SkillEmbeddingTable(weighting=weighting)
+        start = time.perf_counter()
+        table.ensure([], encoder)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        pooled = normalize_rows(table.encode_teams([team['skills'] for team in teams], encoder))
+        pooled_seconds = (time.perf_counter() - start) / len(teams)
+        pooled_similarity = case_embeddings @ pooled.T
+        pooled_hybrid = args.alpha * pooled_similarity + args.beta * skill_similarity
+        results.append({
+            "weighting": weighting,
+            "table_skills": len(table),
+            "table_build_seconds": round(build_seconds, 3),
+            "team_cosine_mean": round(float(np.mean(np.sum(pooled * text_embeddings, axis=1))), 4),
+            "embedding_spearman": round(spearman(pooled_similarity, text_similarity), 4),
+            f"embedding_top{args.k}_overlap": round(top_k_overlap(pooled_similarity, text_similarity, args.k), 4),
+            f"hybrid_top{args.k}_overlap": round(top_k_overlap(pooled_hybrid, text_hybrid, args.k), 4),
+            "text_ms_per_team": round(1000 * text_seconds, 4),
+            "pooled_ms_per_team": round(1000 * pooled_seconds, 4),
+        })
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
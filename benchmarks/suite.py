@@ -0,0 +1,281 @@
+"""
+Benchmark suite for every recommendation path: the functions of src/utils.py, end-to-end endpoint
+latency and throughput under concurrent load, on synthetic teams, persons and cases.
+
+By default the embedding model is replaced with a hashing stub (benchmarks/synthetic.py), so the
+suite runs offline and measures everything except the transformer; --encoder model uses the
+configured model (DPP_EMBEDDING_MODEL_PATH) through the embedding cache. The response cache and
+the catalogue journal are disabled.
+
+Usage:
+    PYTHONPATH=. python benchmarks/suite.py --scales 10 1000 100000 --output bench.json
+    PYTHONPATH=. python benchmarks/suite.py --output new.json --compare bench.json --tolerance 0.2
+    PYTHONPATH=. python benchmarks/suite.py --current new.json --compare bench.json
+
+With --compare the exit code is 1 if any benchmark is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+os.environ.setdefault("DPP_RESPONSE_CACHE_BACKEND", "none")
+os.environ.setdefault("DPP_CATALOGUE_DIR", "")
+os.environ.setdefault("DPP_WARMUP_ON_STARTUP", "0")
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import HashingEncoder, make_cases, make_persons, make_teams
+from main import app
+from src import all_skills, role_to_skills_mapping
+from src import utils
+from src.catalogue import catalogue
+from src.embeddings import model_registry
+from src.roles import score_teams_for_person
+
+
+# Замер времени: повторы до заданного числа или бюджета времени, но не меньше одного
+def measure(fn: Callable, repeat: int, max_seconds: float, per: int = 1) -> Dict[str, float]:
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat and (not timings or time.perf_counter() - started < max_seconds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) / per)
+    return {"seconds_p50": float(np.median(timings)), "seconds_min": float(np.min(timings)),
+            "seconds_mean": float(np.mean(timings)), "repeats": len(timings)}
+
+
+# Функции src/utils.py, которые вызываются для одной сущности: время одного вызова
+def per_call_benchmarks(teams: List[Dict], cases: List[Dict], persons: List[List[str]], encoder) -> Dict[str, Callable]:
+    team_skills = [team['skills'] for team in teams]
+    case_roles = [case['required_roles'].split(", ") for case in cases]
+    embeddings = encoder.encode([utils.build_case_text(case) for case in cases])
+    benchmarks = {
+        "utils.get_required_skills": lambda i: utils.get_required_skills(teams[i]['required_roles']),
+        "utils.get_team_skills": lambda i: utils.get_team_skills(team_skills[i]),
+        "utils.get_filled_roles": lambda i: utils.get_filled_roles(team_skills[i], teams[i]['required_roles']),
+        "utils.calculate_weighted_similarity": lambda i: utils.calculate_weighted_similarity(
+            persons[i], utils.get_required_skills(teams[i]['required_roles']), all_skills),
+        "utils.build_case_text": lambda i: utils.build_case_text(cases[i]),
+        "utils.build_team_text": lambda i: utils.build_team_text(team_skills[i]),
+        "utils.compute_similarity": lambda i: utils.compute_similarity(embeddings, embeddings[i]),
+        "utils.skills_to_vector": lambda i: utils.skills_to_vector(persons[i], all_skills),
+        "utils.roles_to_skills": lambda i: utils.roles_to_skills(case_roles[i], role_to_skills_mapping),
+        "utils.roles_to_skills_vector": lambda i: utils.roles_to_skills_vector(case_roles[i], role_to_skills_mapping,
+                                                                               all_skills),
+        "utils.team_to_skills_vector": lambda i: utils.team_to_skills_vector(team_skills[i], all_skills),
+        "utils.calculate_hybrid_similarity": lambda i: utils.calculate_hybrid_similarity(embeddings[i], embeddings[i]),
+    }
+    if not isinstance(encoder, HashingEncoder):
+        model, tokenizer, device = model_registry.get()
+        benchmarks["utils.get_text_embedding"] = lambda i: utils.get_text_embedding(
+            utils.build_case_text(cases[i]), model, tokenizer, device)
+    return benchmarks
+
+
+# Функции src/utils.py, которые сравнивают одну сущность со всеми: время одного вызова на n сущностях
+def bulk_benchmarks(teams: List[Dict], cases: List[Dict], persons: List[List[str]], encoder) -> Dict[str, Callable]:
+    team, case, person = teams[0], cases[0], persons[0]
+    teams_by_id = {team['team_id']: team for team in teams}
+    df_cases = pd.DataFrame(cases)
+    return {
+        "utils.embedding_similarities_to_cases": lambda: utils.embedding_similarities_to_cases(team['skills'], cases,
+                                                                                              encoder),
+        "utils.skill_similarities_to_cases": lambda: utils.skill_similarities_to_cases(team['skills'], cases),
+        "utils.embedding_similarities_to_teams": lambda: utils.embedding_similarities_to_teams(case, teams, encoder),
+        "utils.skill_similarities_to_teams": lambda: utils.skill_similarities_to_teams(case, teams),
+        "utils.score_cases_for_team": lambda: utils.score_cases_for_team(team['skills'], cases),
+        "utils.score_teams_for_case": lambda: utils.score_teams_for_case(case, teams),
+        "utils.get_case_to_team_recs_by_embedding": lambda: utils.get_case_to_team_recs_by_embedding(
+            team['skills'], df_cases.copy()),
+        "utils.get_case_to_team_recs_by_mapping": lambda: utils.get_case_to_team_recs_by_mapping(
+            team['skills'], df_cases.copy(), role_to_skills_mapping, all_skills),
+        "utils.get_team_to_case_recs_by_embedding": lambda: utils.get_team_to_case_recs_by_embedding(
+            case, teams_by_id, encoder),
+        "utils.get_team_to_case_recs_by_mapping": lambda: utils.get_team_to_case_recs_by_mapping(
+            case, teams_by_id, role_to_skills_mapping, all_skills),
+        "utils.get_team_to_case_recs": lambda: utils.get_team_to_case_recs(
+            case, teams_by_id, role_to_skills_mapping, all_skills),
+        "roles.score_teams_for_person": lambda: score_teams_for_person(person, teams),
+    }
+
+
+# Тела запросов к эндпоинтам рекомендаций
+def endpoint_payloads(teams: List[Dict], cases: List[Dict], persons: List[List[str]]) -> Dict[str, Callable]:
+    return {
+        "/recommend_team_to_person": lambda i: {"person_skills": persons[i % len(persons)], "teams": teams},
+        "/recommend_case_to_team": lambda i: {"team": teams[i % len(teams)], "cases": cases, "top_k": 10},
+        "/recommend_team_to_case": lambda i: {"case": cases[i % len(cases)], "teams": teams, "top_k": 10},
+        "/match_matrix": lambda i: {"cases": cases, "teams": teams, "top_k": 10},
+    }
+
+
+def post(client: TestClient, path: str, body: Dict) -> None:
+    response = client.post(path, json=body)
+    # 404 — допустимый ответ «нет подходящих», остальное означает ошибку бенчмарка
+    if response.status_code not in (200, 404):
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+    response.read()
+
+
+# Пропускная способность: total запросов из concurrency потоков
+def throughput(client: TestClient, path: str, payload: Callable, concurrency: int, total: int) -> Dict[str, float]:
+    bodies = [payload(i) for i in range(total)]
+    latencies = []
+
+    def send(body):
+        start = time.perf_counter()
+        post(client, path, body)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, bodies))
+    elapsed = time.perf_counter() - start
+    return {"rps": total / elapsed, "seconds_p50": float(np.median(latencies)),
+            "seconds_p99": float(np.percentile(latencies, 99)), "requests": total}
+
+
+# Подмена модели эмбеддингов на заглушку для всех путей: utils, каталог и эндпоинты
+def use_encoder(kind: str):
+    if kind == "model":
+        return model_registry.get_encoder()
+    encoder = HashingEncoder()
+    model_registry.get_encoder = lambda model_path=None: encoder
+    catalogue._encoder_factory = lambda: encoder
+    return encoder
+
+
+def run_suite(args) -> List[Dict]:
+    encoder = use_encoder(args.encoder)
+    results = []
+
+    def record(name: str, scale: int, kind: str, measurement: Dict):
+        results.append({"name": name, "scale": scale, "kind": kind, **measurement})
+        print(f"{name:45s} {kind:10s} n={scale:<7d} " + " ".join(
+            f"{key}={value:.6g}" for key, value in measurement.items() if key != "repeats"), file=sys.stderr)
+
+    for scale in args.scales:
+        teams, cases, persons = make_teams(scale), make_cases(scale), make_persons(scale)
+        calls = min(scale, args.per_call_samples)
+        for name, fn in per_call_benchmarks(teams, cases, persons, encoder).items():
+            record(name, scale, "per_call", measure(lambda: [fn(i) for i in range(calls)], args.repeat,
+                                                    args.max_seconds, per=calls))
+        for name, fn in bulk_benchmarks(teams, cases, persons, encoder).items():
+            record(name, scale, "bulk", measure(fn, args.repeat, args.max_seconds))
+
+    with TestClient(app) as client:
+        for scale in [scale for scale in args.scales if scale <= args.endpoint_max_scale]:
+            teams, cases, persons = make_teams(scale), make_cases(scale), make_persons(scale)
+            for path, payload in endpoint_payloads(teams, cases, persons).items():
+                body = payload(0)
+                record(path, scale, "latency", measure(lambda: post(client, path, body), args.repeat, args.max_seconds))
+
+        scale = args.throughput_scale
+        teams, cases, persons = make_teams(scale), make_cases(scale), make_persons(args.requests)
+        for path, payload in endpoint_payloads(teams, cases, persons).items():
+            if path == "/match_matrix":
+                continue
+            for concurrency in args.concurrency:
+                record(f"{path}@c{concurrency}", scale, "throughput",
+                       throughput(client, path, payload, concurrency, args.requests))
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+# Сравнение с базовым прогоном: регрессия — замедление больше чем на tolerance
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[Dict]:
+    """
+    Compare two result files benchmark by benchmark.
+
+    Latency is compared by the median time and throughput by requests per second; the ratio is
+    always "how many times slower", so values above 1 + tolerance are regressions.
+
+    Args:
+    baseline (Dict): Results of the reference run.
+    current (Dict): Results of the new run.
+    tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+    List[Dict]: One entry per benchmark present in both runs, with 'ratio' and 'regression'.
+    """
+    reference = {(result['name'], result['scale']): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = reference.get((result['name'], result['scale']))
+        if before is None:
+            continue
+        if result['kind'] == "throughput":
+            ratio = before['rps'] / result['rps']
+        else:
+            ratio = result['seconds_p50'] / before['seconds_p50'] if before['seconds_p50'] > 0 else 1.0
+        rows.append({"name": result['name'], "scale": result['scale'], "kind": result['kind'],
+                     "ratio": ratio, "regression": ratio > 1 + tolerance})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000, 100000],
+                        help="Numbers of teams, cases and persons")
+    parser.add_argument("--encoder", choices=["stub", "model"], default="stub",
+                        help="Hashing stub (offline) or the configured embedding model")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per benchmark")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop repeating a benchmark after this time (at least one repetition)")
+    parser.add_argument("--per-call-samples", type=int, default=1000,
+                        help="Distinct inputs per repetition of single-entity functions")
+    parser.add_argument("--endpoint-max-scale", type=int, default=10000,
+                        help="Largest scale sent inline to the endpoints")
+    parser.add_argument("--throughput-scale", type=int, default=100, help="Teams and cases per throughput request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per throughput measurement")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--current", help="Compare this result file instead of running the suite")
+    parser.add_argument("--compare", help="Baseline result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        params = {key: value for key, value in vars(args).items() if key not in ("output", "current", "compare")}
+        meta = {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                "commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        current = {"meta": meta, "params": params, "results": run_suite(args)}
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, current, args.tolerance)
+        for row in rows:
+            flag = "REGRESSION" if row['regression'] else "ok"
+            print(f"{row['name']:45s} {row['kind']:10s} n={row['scale']:<7d} x{row['ratio']:.3f} {flag}")
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{len(rows)} benchmarks compared, {regressions} regressions (tolerance {args.tolerance:.0%})")
+        sys.exit(1 if regressions else 0)
+    elif not args.output:
+        json.dump(current, sys.stdout, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Synthetic teams, persons and cases for benchmarks, plus a hashing stub encoder.
+
+Entities are drawn from `role_to_skills_mapping` and `all_skills`: every team member plays one
+role and has most of that role's skills plus a few random ones, cases require one to three roles,
+and teams need a couple of roles of which some are already covered. The data is deterministic for a seed.
+"""
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from src import all_skills, role_to_skills_mapping
+
+ROLES = list(role_to_skills_mapping)
+
+_TITLE_WORDS = ["Платформа", "Сервис", "Система", "Аналитика", "Мониторинг", "Прогноз", "Карта", "Бот",
+                "Dashboard", "API", "Распознавание", "Рекомендации", "Учет", "Поиск", "Маркетплейс"]
+_DESCRIPTION_WORDS = ["данных", "пользователей", "заявок", "изображений", "документов", "модели",
+                      "интеграция", "обработка", "визуализация", "хранение", "обучение", "прогнозирование",
+                      "в реальном времени", "для региона", "с помощью машинного обучения", "на основе API"]
+
+
+# Навыки участника с заданной ролью: большая часть навыков роли и несколько случайных
+def _member_skills(rng: np.random.Generator, role: str) -> List[str]:
+    role_skills = role_to_skills_mapping[role]
+    n_role = max(1, int(len(role_skills) * rng.uniform(0.4, 0.9)))
+    skills = list(rng.choice(role_skills, size=n_role, replace=False))
+    skills += list(rng.choice(all_skills, size=int(rng.integers(0, 4)), replace=False))
+    return list(dict.fromkeys(skills))
+
+
+def make_teams(n: int, seed: int = 0) -> List[Dict]:
+    """
+    Generate teams in the format of the `Team` request model.
+
+    Args:
+    n (int): Number of teams.
+    seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+    List[Dict]: Teams with 'team_id', 'name', 'skills' and 'required_roles'.
+    """
+    rng = np.random.default_rng(seed)
+    teams = []
+    for team_id in range(n):
+        member_roles = rng.choice(ROLES, size=int(rng.integers(1, 6)))
+        skills = {f"Участник {team_id}-{k}": _member_skills(rng, role) for k, role in enumerate(member_roles)}
+        required_roles = list(rng.choice(ROLES, size=int(rng.integers(1, 4)), replace=False))
+        teams.append({"team_id": team_id, "name": f"Команда {team_id}", "skills": skills,
+                      "required_roles": required_roles})
+    return teams
+
+
+def make_persons(n: int, seed: int = 1) -> List[List[str]]:
+    """
+    Generate skill lists of persons.
+
+    Args:
+    n (int): Number of persons.
+    seed (int, optional): Random seed. Defaults to 1.
+
+    Returns:
+    List[List[str]]: One list of skills per person.
+    """
+    rng = np.random.default_rng(seed)
+    return [_member_skills(rng, rng.choice(ROLES)) for _ in range(n)]
+
+
+def make_cases(n: int, seed: int = 2) -> List[Dict]:
+    """
+    Generate cases in the format of the `Case` request model.
+
+    Args:
+    n (int): Number of cases.
+    seed (int, optional): Random seed. Defaults to 2.
+
+    Returns:
+    List[Dict]: Cases with 'id', 'title', 'description' and 'required_roles'.
+    """
+    rng = np.random.default_rng(seed)
+    cases = []
+    for case_id in range(n):
+        title = " ".join(rng.choice(_TITLE_WORDS, size=int(rng.integers(1, 4)), replace=False))
+        description = " ".join(rng.choice(_DESCRIPTION_WORDS, size=int(rng.integers(4, 12))))
+        roles = rng.choice(ROLES, size=int(rng.integers(1, 4)), replace=False)
+        cases.append({"id": case_id, "title": title, "description": description,
+                      "required_roles": ", ".join(roles)})
+    return cases
+
+
+# Заглушка модели эмбеддингов: хэширование слов, без загрузки модели
+class HashingEncoder:
+    """
+    Offline stand-in for the embedding model: every word adds ±1 to a hashed dimension.
+
+    Texts sharing words get similar vectors, so rankings are meaningful while encoding costs
+    microseconds per text. Implements the same `encode(texts)` interface as the real encoders.
+
+    Attributes:
+    dim (int): Embedding dimension.
+    """
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = zlib.crc32(word.encode("utf-8"))
+                embeddings[row, digest % self.dim] += 1.0 if digest & 1 << 31 else -1.0
+        return embeddings
@@ -1,10 +1,175 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
-import pandas as pd
+import asyncio
+import gc
+import os
+import queue
+import secrets
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Dict, Optional
+import numpy as np
+from src.config import settings
+from src.embeddings import model_registry, embedding_cache
+from src.catalogue import catalogue
+from src.codec import FastJSONRoute, dumps
+from src.ingest import ingest_queue
+from src.matching import MatchMatrix
+from src.memory import process_memory
+from src.metrics import metrics, server_timing_header
+from src.persistence import CatalogueJournal
+from src.profiling import request_profiler
+from src.response_cache import response_cache
+from src.roles import score_teams_for_person
+from src.skills import skill_dictionary
+from src.ranking import select_recommendations, select_diverse, select_top_k, similarity_features
+from src.workers import inference_pool, WorkerPoolSaturated, WorkerTimeout
 from src.utils import *
 
-app = FastAPI()
+
+# Сборщик мусора (по умолчанию не настраивается): разбор большого тела запроса создает сотни
+# тысяч объектов, и при порогах по умолчанию полные сборки обходят их по многу раз за запрос
+def configure_gc(gen0_threshold: int = settings.gc_gen0_threshold) -> None:
+    """
+    Raise the threshold of the youngest GC generation and freeze the objects created at startup.
+
+    Frozen objects (modules, the restored catalogue) are not scanned by later collections.
+    Does nothing with a threshold of 0, the default.
+
+    Args:
+    gen0_threshold (int, optional): Allocations between collections of the youngest generation.
+    Defaults to DPP_GC_GEN0_THRESHOLD.
+    """
+    if gen0_threshold <= 0:
+        return
+    gc.set_threshold(gen0_threshold, *gc.get_threshold()[1:])
+    gc.freeze()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Restore the catalogue from its journal and warm up the embedding model in the background.
+
+    The server accepts connections right away; `/ready` reports 503 until the model is loaded.
+    """
+    inference_pool.configure_torch()
+    if settings.catalogue_dir:
+        journal = CatalogueJournal(settings.catalogue_dir, settings.catalogue_snapshot_every)
+        await asyncio.to_thread(catalogue.open_journal, journal)
+    configure_gc()
+    warmup_task = None
+    if settings.warmup_on_startup:
+        warmup_task = asyncio.create_task(asyncio.to_thread(model_registry.warm_up))
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await asyncio.to_thread(ingest_queue.flush)
+    if catalogue.journal is not None:
+        catalogue.journal.close()
+    inference_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+# Тела запросов разбираются orjson (если установлен); проверка и ошибки 422 — как у FastAPI
+app.router.route_class = FastJSONRoute
+
+# Ответы, зависящие от каталога, становятся недействительными при любом его изменении
+catalogue.add_listener(response_cache.invalidate)
+
+# Длительность запросов; по заголовку X-Server-Timing: 1 — длительности этапов в ответе
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record the latency of every request and, on request, report stage timings in `Server-Timing`.
+
+    Stages timed anywhere while serving the request, including in the inference pool, are
+    collected for the request. Streaming responses are timed until their headers are sent.
+    """
+    start = time.perf_counter()
+    with metrics.collect_request_timings() as timings:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe(metrics.request_seconds, elapsed, request.method, route, str(response.status_code))
+    if request.headers.get("X-Server-Timing") == "1":
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+# Без метрик промежуточный слой не подключается и не добавляет задержки
+if metrics.enabled:
+    app.middleware("http")(record_request_metrics)
+
+# Профилирование запроса: следующие N запросов или запрос с заголовком X-Profile: <токен администратора>
+async def profile_requests(request: Request, call_next):
+    """
+    Let the profiler select the request and report the stored profiles in `X-Profile-Id`.
+    """
+    with request_profiler.request(f"{request.method} {request.url.path}", request.headers.get("X-Profile")) as profile_ids:
+        response = await call_next(request)
+    if profile_ids:
+        response.headers["X-Profile-Id"] = ",".join(profile_ids)
+    return response
+
+# Без токена администратора профилирование выключено и промежуточный слой не подключается
+if request_profiler.enabled:
+    app.middleware("http")(profile_requests)
+
+# Счетчики компонентов для /metrics: читаются в момент запроса, а не дублируются
+def component_metrics():
+    cache, pool = embedding_cache.stats(), inference_pool.stats()
+    responses, ingest = response_cache.stats(), ingest_queue.stats()
+    batching = model_registry.batching_stats()
+    return [
+        ("dpp_embedding_cache_hits_total", "counter", "Embedding cache hits by tier.",
+         [({"tier": "memory"}, cache["memory_hits"]), ({"tier": "disk"}, cache["disk_hits"])]),
+        ("dpp_embedding_cache_misses_total", "counter", "Texts embedded by the model.", [({}, cache["misses"])]),
+        ("dpp_response_cache_hits_total", "counter", "Responses served from the response cache.", [({}, responses["hits"])]),
+        ("dpp_response_cache_misses_total", "counter", "Responses computed.", [({}, responses["misses"])]),
+        ("dpp_inference_running", "gauge", "Tasks running in the inference pool.", [({}, pool["running"])]),
+        ("dpp_inference_queue_depth", "gauge", "Tasks waiting for an inference worker.", [({}, pool["queued"])]),
+        ("dpp_inference_rejected_total", "counter", "Requests rejected with 429 by the inference pool.",
+         [({}, pool["rejected"])]),
+        ("dpp_inference_timed_out_total", "counter", "Requests failed with 503 by the inference pool.",
+         [({}, pool["timed_out"])]),
+        ("dpp_micro_batches_total", "counter", "Model batches run by the micro-batcher.",
+         [({"model": model}, stats["batches"]) for model, stats in batching.items()]),
+        ("dpp_micro_batch_texts_total", "counter", "Texts embedded by the micro-batcher.",
+         [({"model": model}, stats["texts"]) for model, stats in batching.items()]),
+        ("dpp_ingest_queue_depth", "gauge", "/new_data events waiting to be applied.", [({}, ingest["queued"])]),
+        ("dpp_ingest_events_total", "counter", "/new_data events applied.", [({}, ingest["events"])]),
+        ("dpp_ingest_errors_total", "counter", "/new_data batch attempts that failed.", [({}, ingest["errors"])]),
+        ("dpp_ingest_retries_total", "counter", "/new_data batches retried.", [({}, ingest["retried"])]),
+        ("dpp_ingest_dead_letters_total", "counter", "/new_data events that could not be applied.",
+         [({}, ingest["dead_lettered"])]),
+    ]
+
+metrics.add_collector(component_metrics)
+
+# Память процесса: у каждого воркера uvicorn своя серия с меткой pid
+def memory_metrics():
+    memory, labels = process_memory(), {"pid": str(os.getpid())}
+    return [
+        (f"dpp_process_{field}_bytes", "gauge", help, [(labels, memory[field])])
+        for field, help in (("rss", "Resident memory of the worker process."),
+                            ("pss", "Proportional memory: shared pages divided among the processes mapping them."),
+                            ("shared", "Resident memory shared with other processes, e.g. memory-mapped model weights."),
+                            ("private", "Resident memory private to the worker process."),
+                            ("max_rss", "Peak resident memory of the worker process."))
+        if field in memory
+    ]
+
+metrics.add_collector(memory_metrics)
+
+# Пул инференса переполнен: просим клиента повторить запрос позже
+@app.exception_handler(WorkerPoolSaturated)
+async def worker_pool_saturated_handler(request: Request, exc: WorkerPoolSaturated):
+    return JSONResponse(status_code=429, content={"detail": "Сервис перегружен, повторите запрос позже"},
+                        headers={"Retry-After": "1"})
+
+# Запрос не уложился в отведенное время
+@app.exception_handler(WorkerTimeout)
+async def worker_timeout_handler(request: Request, exc: WorkerTimeout):
+    return JSONResponse(status_code=503, content={"detail": "Превышено время ожидания ответа"},
+                        headers={"Retry-After": "1"})
 
 # Request Models
 class Team(BaseModel):
@@ -14,12 +179,19 @@ class Team(BaseModel):
         team_id (int): Unique identifier of the team.
         name (str): Name of the team.
         skills (Dict[str, List[str]]): Dictionary where keys are team members and values are lists of their skills.
+            Skills are replaced by their canonical names, so case and aliases do not matter.
         required_roles (List[str], optional): List of roles required by the team.
     """
     team_id: int
     name: str
     skills: Dict[str, List[str]]
-    required_roles: List[str] = None  # Currently only used for person-team recommendations, not for case-team matching
+    required_roles: Optional[List[str]] = None  # Currently only used for person-team recommendations, not for case-team matching
+
+    @field_validator("skills")
+    @classmethod
+    def canonical_skills(cls, skills: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        canonical = skill_dictionary.canonical
+        return {member: list(map(canonical, member_skills)) for member, member_skills in skills.items()}
 
 class Case(BaseModel):
     """
@@ -39,49 +211,108 @@ class RecommendTeamToPersonRequest(BaseModel):
     """
     Request model for recommending teams to a person based on their skills.
     Attributes:
-        person_skills (List[str]): List of skills of the person.
-        teams (List[Team]): List of teams available for recommendation.
+        person_skills (List[str]): List of skills of the person, replaced by their canonical names.
+        teams (List[Team], optional): List of teams available for recommendation. Defaults to the stored catalogue.
         role_filled_threshold (float): Threshold for determining filled roles.
         unfilled_role_weight (float): Weight applied to unfilled roles in similarity calculation.
         confidence_percentile (float): Percentile threshold for filtering recommended teams by similarity.
+        top_k (int, optional): Return the k most similar teams instead of all teams above the threshold.
+        diversity (float, optional): Re-rank with a DPP that trades relevance for teams with unlike skills; 0 to 1.
     """
     person_skills: List[str]
-    teams: List[Team]
+    teams: Optional[List[Team]] = None
     role_filled_threshold: float = 0.5  # Renamed threshold for clarity
     unfilled_role_weight: float = 1.5
-    confidence_percentile: float = 0.9
+    confidence_percentile: float = Field(default=0.9, ge=0, le=1)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    diversity: Optional[float] = Field(default=None, ge=0, le=1)
+
+    @field_validator("person_skills")
+    @classmethod
+    def canonical_skills(cls, skills: List[str]) -> List[str]:
+        return list(map(skill_dictionary.canonical, skills))
 
 class RecommendCaseToTeamRequest(BaseModel):
     """
     Request model for recommending cases to a team based on the team's skills.
     Attributes:
-        team (Team): Team for which a case recommendation is being made.
-        cases (List[Case]): List of cases available for recommendation.
+        team (Team, optional): Team for which a case recommendation is being made.
+        team_id (int, optional): ID of a stored team, used when `team` is not given.
+        cases (List[Case], optional): List of cases available for recommendation. Defaults to the stored catalogue.
         alpha (float): Weight applied to embedding similarity.
         beta (float): Weight applied to skill-based similarity.
         confidence_percentile (float): Percentile threshold for filtering recommended cases.
+        top_k (int, optional): Return the k best cases instead of all cases above the threshold.
+        retrieve_k (int, optional): With the stored catalogue, rerank only the k cases nearest in the embedding index.
+        cascade_k (int, optional): With cases given in the request, embed only the k cases with the best skill similarity.
+        cascade_skill_floor (float, optional): With cases given in the request, do not embed cases below this skill similarity.
+        diversity (float, optional): Re-rank with a DPP that trades relevance for cases unlike each other; 0 to 1.
     """
-    team: Team
-    cases: List[Case]
+    team: Optional[Team] = None
+    team_id: Optional[int] = None
+    cases: Optional[List[Case]] = None
     alpha: float = 0.5
     beta: float = 0.5
-    confidence_percentile: float = 0.9
+    confidence_percentile: float = Field(default=0.9, ge=0, le=1)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    retrieve_k: Optional[int] = Field(default=None, ge=1)
+    cascade_k: Optional[int] = Field(default=None, ge=1)
+    cascade_skill_floor: Optional[float] = None
+    diversity: Optional[float] = Field(default=None, ge=0, le=1)
 
 class RecommendTeamToCaseRequest(BaseModel):
     """
     Request model for recommending teams to a case based on case requirements.
     Attributes:
-        case (Case): Case for which a team recommendation is being made.
-        teams (List[Team]): List of teams available for recommendation.
+        case (Case, optional): Case for which a team recommendation is being made.
+        case_id (int, optional): ID of a stored case, used when `case` is not given.
+        teams (List[Team], optional): List of teams available for recommendation. Defaults to the stored catalogue.
         alpha (float): Weight applied to embedding similarity.
         beta (float): Weight applied to skill-based similarity.
         confidence_percentile (float): Percentile threshold for filtering recommended teams.
+        top_k (int, optional): Return the k best teams instead of all teams above the threshold.
+        retrieve_k (int, optional): With the stored catalogue, rerank only the k teams nearest in the embedding index.
+        cascade_k (int, optional): With teams given in the request, embed only the k teams with the best skill similarity.
+        cascade_skill_floor (float, optional): With teams given in the request, do not embed teams below this skill similarity.
+        diversity (float, optional): Re-rank with a DPP that trades relevance for teams unlike each other; 0 to 1.
+    """
+    case: Optional[Case] = None
+    case_id: Optional[int] = None
+    teams: Optional[List[Team]] = None
+    alpha: float = 0.5
+    beta: float = 0.5
+    confidence_percentile: float = Field(default=0.9, ge=0, le=1)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    retrieve_k: Optional[int] = Field(default=None, ge=1)
+    cascade_k: Optional[int] = Field(default=None, ge=1)
+    cascade_skill_floor: Optional[float] = None
+    diversity: Optional[float] = Field(default=None, ge=0, le=1)
+
+class MatchMatrixRequest(BaseModel):
+    """
+    Request model for scoring many cases against many teams at once.
+    Attributes:
+        cases (List[Case], optional): Cases to score. Defaults to the stored catalogue.
+        teams (List[Team], optional): Teams to score. Defaults to the stored catalogue.
+        alpha (float): Weight applied to embedding similarity.
+        beta (float): Weight applied to skill-based similarity.
+        top_k (int): Number of best teams per case and best cases per team.
+        block_size (int): Number of cases scored per block; bounds memory to block_size × teams.
     """
-    case: Case
-    teams: List[Team]
+    cases: Optional[List[Case]] = None
+    teams: Optional[List[Team]] = None
     alpha: float = 0.5
     beta: float = 0.5
-    confidence_percentile: float = 0.9
+    top_k: int = Field(default=10, ge=1)
+    block_size: int = Field(default=256, ge=1)
+
+class ProfileNextRequest(BaseModel):
+    """
+    Request model for profiling the next requests.
+    Attributes:
+        count (int): Number of next requests to profile; 0 cancels.
+    """
+    count: int = Field(default=1, ge=0, le=1000)
 
 # Модель для новых данных
 class NewDataRequest(BaseModel):
@@ -93,6 +324,128 @@ class NewDataRequest(BaseModel):
     person_skills: List[str]
     case_required_roles: List[str]
 
+    @field_validator("person_skills")
+    @classmethod
+    def canonical_skills(cls, skills: List[str]) -> List[str]:
+        return list(map(skill_dictionary.canonical, skills))
+
+# Получение команды из запроса или из каталога по ID
+def resolve_team(team: Optional[Team], team_id: Optional[int]) -> Team:
+    """
+    Return the team given inline in a request or the stored team with the given ID.
+
+    Raises:
+        HTTPException: 422 if neither is given, 404 if the stored team does not exist.
+    """
+    if team is not None:
+        return team
+    if team_id is None:
+        raise HTTPException(status_code=422, detail="Нужно указать team или team_id")
+    stored = catalogue.teams.get(team_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Команда не найдена")
+    return Team(**stored)
+
+# Получение кейса из запроса или из каталога по ID
+def resolve_case(case: Optional[Case], case_id: Optional[int]) -> Case:
+    """
+    Return the case given inline in a request or the stored case with the given ID.
+
+    Raises:
+        HTTPException: 422 if neither is given, 404 if the stored case does not exist.
+    """
+    if case is not None:
+        return case
+    if case_id is None:
+        raise HTTPException(status_code=422, detail="Нужно указать case или case_id")
+    stored = catalogue.cases.get(case_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Кейс не найден")
+    return Case(**stored)
+
+# Ответ из кэша или расчет в пуле инференса с сохранением в кэш
+async def cached_recommendation(endpoint: str, request: BaseModel, uses_catalogue: bool, compute) -> Response:
+    """
+    Serve a recommendation from the response cache or compute it in the inference pool.
+
+    Sets the `X-Cache` header to HIT or MISS. Only successful responses are cached. The response
+    is rendered here rather than by FastAPI, so that serialization is timed as its own stage. It
+    is encoded once with `src.codec.dumps`: the same bytes are cached and sent, and a cache hit
+    is sent as stored, without decoding and encoding it again.
+
+    Args:
+        endpoint (str): Name of the endpoint, part of the cache key.
+        request (BaseModel): Request body.
+        uses_catalogue (bool): Whether the result depends on the stored catalogue.
+        compute (Callable): Synchronous function computing the result from the request.
+
+    Returns:
+        Response: The recommendation response as JSON.
+    """
+    with metrics.span("cache_lookup"):
+        # Без кэша ключ не нужен: канонизация большого тела запроса не бесплатна
+        key = None
+        if response_cache.enabled:
+            key = response_cache.key(endpoint, request.model_dump(), uses_catalogue, model_registry.model_id())
+        content = response_cache.get_bytes(key)
+    if content is not None:
+        return Response(content, media_type="application/json", headers={"X-Cache": "HIT"})
+    result = await inference_pool.run(request_profiler.wrap(compute), request)
+    with metrics.span("serialize"):
+        content = dumps(result)
+    response_cache.set_bytes(key, content)
+    return Response(content, media_type="application/json", headers={"X-Cache": "MISS"})
+
+# Каскадный режим включается, если задан хотя бы один из лимитов первой ступени
+def uses_cascade(request: BaseModel) -> bool:
+    return request.cascade_k is not None or request.cascade_skill_floor is not None
+
+# Сколько кандидатов отсеяла каждая ступень каскада
+def cascade_stats(candidates: int, embedded: int, recommended: int) -> Dict[str, int]:
+    """
+    Report how many candidates each stage of the cascade pruned.
+
+    Returns:
+        Dict: "candidates" in the request, "pruned_by_skills" at the skill stage, "embedded" at the
+        embedding stage and "pruned_by_ranking" by the percentile threshold or `top_k`.
+    """
+    return {"candidates": candidates, "pruned_by_skills": candidates - embedded, "embedded": embedded,
+            "pruned_by_ranking": embedded - recommended}
+
+# Переранжирование DPP: отобранное число кандидатов, релевантных и непохожих друг на друга
+def diversify(selected: np.ndarray, scores: np.ndarray, top_k: Optional[int], diversity: Optional[float],
+              candidate_features) -> np.ndarray:
+    """
+    Re-rank the selected candidates with a DPP when the request asks for diversity.
+
+    With `top_k` the DPP picks k candidates out of all of them; otherwise it orders the
+    candidates above the percentile threshold, most valuable first. Only the
+    `DPP_DIVERSITY_POOL_SIZE` best-scored of those candidates enter the DPP, so its cost does not
+    grow with the catalogue; places it leaves are filled by the rest in order of score.
+
+    Args:
+        selected (np.ndarray): Indices selected by `select_recommendations`.
+        scores (np.ndarray): Scores of all candidates.
+        top_k (int, optional): Number of candidates requested.
+        diversity (float, optional): Relevance/diversity trade-off in [0, 1]; None keeps `selected`.
+        candidate_features (Callable): Returns the similarity features of the given candidate indices.
+
+    Returns:
+        np.ndarray: Indices of the recommended candidates in ranking order.
+    """
+    if diversity is None or len(selected) == 0:
+        return selected
+    pool = np.arange(len(scores)) if top_k is not None else selected
+    if len(pool) > settings.diversity_pool_size:
+        pool = pool[select_top_k(scores[pool], settings.diversity_pool_size)]
+    with metrics.span("diversify"):
+        features = candidate_features(pool)
+        diverse = pool[select_diverse(scores[pool], features, min(len(selected), len(pool)), diversity)]
+    if len(diverse) < len(selected):
+        rest = np.setdiff1d(selected, diverse)
+        diverse = np.concatenate([diverse, rest[np.argsort(-scores[rest], kind="stable")][:len(selected) - len(diverse)]])
+    return diverse
+
 # Рекомендация: Человек - Команда
 @app.post("/recommend_team_to_person")
 async def recommend_team_to_person(request: RecommendTeamToPersonRequest):
@@ -107,39 +460,49 @@ async def recommend_team_to_person(request: RecommendTeamToPersonRequest):
         request (RecommendTeamToPersonRequest): Contains person skills, list of teams, and filtering criteria.
 
     Returns:
-        Dict: List of recommended teams meeting the percentile confidence threshold.
+        Dict: Recommended teams (all above the percentile threshold, or the `top_k` best) and the threshold.
 
     Raises:
         HTTPException: If no suitable teams are found above the threshold.
     """
-    similarities = []
-
-    for team in request.teams:
-        # Определяем заполненные роли в команде
-        filled_roles = get_filled_roles(team.skills, team.required_roles, threshold=request.role_filled_threshold)
-        unfilled_roles = [role for role in team.required_roles if role not in filled_roles]
-
-        # Если есть незаполненные роли, рассчитываем сходство с их учетом
-        if unfilled_roles:
-            unfilled_role_skills = get_required_skills(unfilled_roles)
-            all_required_skills = get_required_skills(team.required_roles)
-            similarity = calculate_weighted_similarity(request.person_skills, unfilled_role_skills, all_required_skills, request.unfilled_role_weight)
-        else:
-            # Если все роли заполнены, рассчитываем сходство по навыкам команды
-            team_skills = [skill for skills in team.skills.values() for skill in skills]
-            similarity = calculate_weighted_similarity(request.person_skills, team_skills, team_skills)
-
-        similarities.append({"team_id": team.team_id, "team_name": team.name, "similarity": similarity})
-
-    # Определяем персентильный порог
-    df_similarities = pd.DataFrame(similarities)
-    threshold_value = df_similarities['similarity'].quantile(request.confidence_percentile)
+    return await cached_recommendation(
+        "recommend_team_to_person", request, uses_catalogue=request.teams is None, compute=_recommend_team_to_person
+    )
 
-    # Выбираем команды, которые соответствуют порогу
-    recommended_teams = df_similarities[df_similarities['similarity'] >= threshold_value].to_dict(orient="records")
+# Синхронная часть: выполняется в пуле потоков, чтобы не блокировать цикл событий
+def _recommend_team_to_person(request: RecommendTeamToPersonRequest):
+    # Заполненность ролей и сходство считаются сразу для всех команд: с незаполненными ролями —
+    # по навыкам этих ролей (с весом unfilled_role_weight), иначе — по навыкам самой команды
+    if request.teams is not None:
+        teams = [team.model_dump() for team in request.teams]
+        if not teams:
+            raise HTTPException(status_code=404, detail="Подходящие команды не найдены")
+        scores = score_teams_for_person(
+            request.person_skills,
+            teams,
+            threshold=request.role_filled_threshold,
+            unfilled_role_weight=request.unfilled_role_weight,
+        )
+    else:
+        # Для каталога оценщик строится один раз и переиспользуется, пока состав команд не изменится
+        teams, scorer = catalogue.person_scorer(request.role_filled_threshold, request.unfilled_role_weight)
+        if not teams:
+            raise HTTPException(status_code=404, detail="Подходящие команды не найдены")
+        scores = scorer.score_many([request.person_skills])[0]
+
+    # Выбираем команды по персентильному порогу или k лучших
+    with metrics.span("ranking"):
+        selected, threshold_value = select_recommendations(scores, request.confidence_percentile, request.top_k)
+    # Сходство команд для разнообразия — по их навыкам, без эмбеддингов
+    selected = diversify(selected, scores, request.top_k, request.diversity,
+                         lambda pool: similarity_features((team_skill_matrix([teams[i] for i in pool]), 1.0)))
+    recommended_teams = [
+        {"team_id": teams[i]['team_id'], "team_name": teams[i]['name'], "similarity": float(scores[i])}
+        for i in selected
+    ]
 
     if recommended_teams:
-        return {"recommended_teams": recommended_teams}
+        return {"recommended_teams": recommended_teams, "threshold": threshold_value}
     else:
         raise HTTPException(status_code=404, detail="Подходящие команды не найдены")
 
@@ -157,31 +520,55 @@ async def recommend_case_to_team(request: RecommendCaseToTeamRequest):
         request (RecommendCaseToTeamRequest): Contains team skills, list of cases, and filtering criteria.
 
     Returns:
-        Dict: List of recommended cases meeting the percentile confidence threshold.
+        Dict: Recommended cases (all above the percentile threshold, or the `top_k` best) and the threshold.
 
     Raises:
         HTTPException: If no suitable cases are found above the threshold.
     """
-    df_cases = pd.DataFrame([case.dict() for case in request.cases])
-
-    # Расчет сходства для эмбеддингов и навыков
-    df_cases = get_case_to_team_recs_by_embedding(request.team.skills, df_cases)
-    df_cases = get_case_to_team_recs_by_mapping(request.team.skills, df_cases, role_to_skills_mapping, all_skills)
-
-    # Гибридное сходство
-    df_cases['hybrid_similarity'] = calculate_hybrid_similarity(
-        df_cases['embedding_similarity'],
-        df_cases['skills_similarity'],
-        request.alpha,
-        request.beta
+    return await cached_recommendation(
+        "recommend_case_to_team", request, uses_catalogue=request.team is None or request.cases is None, compute=_recommend_case_to_team
     )
 
-    # Порог персентиля
-    threshold_value = df_cases['hybrid_similarity'].quantile(request.confidence_percentile)
-    recommended_cases = df_cases[df_cases['hybrid_similarity'] >= threshold_value][['id', 'title', 'hybrid_similarity']].to_dict(orient="records")
+# Синхронная часть: выполняется в пуле потоков, чтобы не блокировать цикл событий
+def _recommend_case_to_team(request: RecommendCaseToTeamRequest):
+    team = resolve_team(request.team, request.team_id)
+
+    # Без списка кейсов в запросе оцениваем все кейсы каталога по предрассчитанному индексу
+    if request.cases is None:
+        # Названия берутся под той же блокировкой, что и оценки: кейс могут удалить сразу после оценки
+        case_ids, _, _, hybrid, scored = catalogue.score_cases(team.model_dump(), request.alpha, request.beta,
+                                                               request.retrieve_k)
+        titles = [case['title'] for case in scored]
+        case_vectors_of = lambda pool: catalogue.case_vectors(case_ids[pool])
+    else:
+        cases = [case.model_dump() for case in request.cases]
+        if uses_cascade(request):
+            # Каскад: по эмбеддингам оцениваются только кейсы, прошедшие отбор по навыкам
+            survivors, _, _, hybrid = score_cases_for_team_cascade(team.skills, cases, request.alpha, request.beta,
+                                                                   request.cascade_k, request.cascade_skill_floor)
+            cases = [cases[i] for i in survivors]
+        else:
+            _, _, hybrid = score_cases_for_team(team.skills, cases, request.alpha, request.beta)
+        case_ids, titles = [case['id'] for case in cases], [case['title'] for case in cases]
+        # Эмбеддинги кейсов уже в кэше эмбеддингов после оценки
+        case_vectors_of = lambda pool: case_vectors([cases[i] for i in pool], model_registry.get_encoder())
+
+    # Порог персентиля или k лучших
+    with metrics.span("ranking"):
+        selected, threshold_value = select_recommendations(hybrid, request.confidence_percentile, request.top_k)
+    # Сходство кейсов между собой — то же гибридное сходство с весами alpha и beta
+    selected = diversify(selected, hybrid, request.top_k, request.diversity, lambda pool: similarity_features(
+        *zip(case_vectors_of(pool), (request.alpha, request.beta))))
+    recommended_cases = [
+        {"id": int(case_ids[i]), "title": titles[i], "hybrid_similarity": float(hybrid[i])}
+        for i in selected
+    ]
 
     if recommended_cases:
-        return {"recommended_cases": recommended_cases}
+        response = {"recommended_cases": recommended_cases, "threshold": threshold_value}
+        if request.cases is not None and uses_cascade(request):
+            response["cascade"] = cascade_stats(len(request.cases), len(cases), len(recommended_cases))
+        return response
     else:
         raise HTTPException(status_code=404, detail="Подходящие кейсы не найдены")
 
@@ -199,34 +586,360 @@ async def recommend_team_to_case(request: RecommendTeamToCaseRequest):
         request (RecommendTeamToCaseRequest): Contains case requirements, list of teams, and filtering criteria.
 
     Returns:
-        Dict: List of recommended teams meeting the percentile confidence threshold.
+        Dict: Recommended teams (best first; all above the percentile threshold, or the `top_k` best) and the threshold.
 
     Raises:
         HTTPException: If no suitable teams are found above the threshold.
     """
-    teams_dict = {team.team_id: team.dict() for team in request.teams}
-    df_hybrid = get_team_to_case_recs(
-        request.case.dict(),
-        teams_dict,
-        role_to_skills_mapping,
-        all_skills,
-        request.alpha,
-        request.beta
+    return await cached_recommendation(
+        "recommend_team_to_case", request, uses_catalogue=request.case is None or request.teams is None, compute=_recommend_team_to_case
     )
 
-    # Порог персентиля
-    threshold_value = df_hybrid['hybrid_similarity'].quantile(request.confidence_percentile)
-    recommended_teams = df_hybrid[df_hybrid['hybrid_similarity'] >= threshold_value][['team_id', 'team_name', 'hybrid_similarity']].to_dict(orient="records")
+# Синхронная часть: выполняется в пуле потоков, чтобы не блокировать цикл событий
+def _recommend_team_to_case(request: RecommendTeamToCaseRequest):
+    case = resolve_case(request.case, request.case_id)
+
+    # Без списка команд в запросе оцениваем все команды каталога по предрассчитанному индексу
+    if request.teams is None:
+        team_ids, _, _, hybrid, scored = catalogue.score_teams(case.model_dump(), request.alpha, request.beta,
+                                                               request.retrieve_k)
+        names = [team['name'] for team in scored]
+        team_vectors_of = lambda pool: catalogue.team_vectors(team_ids[pool])
+    else:
+        # Команды с одинаковым ID учитываются один раз (последняя из них)
+        teams = list({team.team_id: team.model_dump() for team in request.teams}.values())
+        if uses_cascade(request):
+            # Каскад: по эмбеддингам оцениваются только команды, прошедшие отбор по навыкам
+            survivors, _, _, hybrid = score_teams_for_case_cascade(case.model_dump(), teams, request.alpha, request.beta,
+                                                                   request.cascade_k, request.cascade_skill_floor)
+            teams = [teams[i] for i in survivors]
+        else:
+            _, _, hybrid = score_teams_for_case(case.model_dump(), teams, request.alpha, request.beta)
+        team_ids, names = [team['team_id'] for team in teams], [team['name'] for team in teams]
+        # Эмбеддинги команд уже в кэше эмбеддингов после оценки
+        team_vectors_of = lambda pool: team_vectors([teams[i] for i in pool], model_registry.get_encoder())
+
+    # Порог персентиля или k лучших; результат упорядочен по убыванию сходства
+    with metrics.span("ranking"):
+        selected, threshold_value = select_recommendations(hybrid, request.confidence_percentile, request.top_k)
+        selected = selected[np.argsort(-hybrid[selected], kind="stable")]
+    # Сходство команд между собой — то же гибридное сходство с весами alpha и beta
+    selected = diversify(selected, hybrid, request.top_k, request.diversity, lambda pool: similarity_features(
+        *zip(team_vectors_of(pool), (request.alpha, request.beta))))
+    recommended_teams = [
+        {"team_id": int(team_ids[i]), "team_name": names[i], "hybrid_similarity": float(hybrid[i])}
+        for i in selected
+    ]
 
     if recommended_teams:
-        return {"recommended_teams": recommended_teams}
+        response = {"recommended_teams": recommended_teams, "threshold": threshold_value}
+        if request.teams is not None and uses_cascade(request):
+            response["cascade"] = cascade_stats(len({team.team_id for team in request.teams}), len(teams),
+                                                len(recommended_teams))
+        return response
     else:
         raise HTTPException(status_code=404, detail="No suitable team found")
 
+# Пакетный подбор: все кейсы × все команды
+@app.post("/match_matrix")
+async def match_matrix(request: MatchMatrixRequest):
+    """
+    Score M cases against N teams and stream the best matches as NDJSON.
+
+    Every case and team is embedded once; the M × N hybrid similarity is computed in blocks of
+    cases and never held in memory as a whole.
+
+    Args:
+        request (MatchMatrixRequest): Cases, teams, weights and the number of matches to return.
+
+    Returns:
+        StreamingResponse: One JSON object per line: {"type": "case", "id", "teams"} for every case,
+        then {"type": "team", "team_id", "cases"} for every team, matches sorted best first.
+    """
+    matrix = await inference_pool.run(request_profiler.wrap(_build_match_matrix), request)
+    records = matrix.iter_results(request.alpha, request.beta, request.top_k, request.block_size)
+    return StreamingResponse(
+        (dumps(record) + b"\n" for record in records),
+        media_type="application/x-ndjson",
+    )
+
+# Синхронная часть: эмбеддинги всех кейсов и команд считаются в пуле потоков
+def _build_match_matrix(request: MatchMatrixRequest) -> MatchMatrix:
+    cases = [case.model_dump() for case in request.cases] if request.cases is not None else catalogue.list_cases()
+    teams = [team.model_dump() for team in request.teams] if request.teams is not None else catalogue.list_teams()
+    return MatchMatrix(cases, teams)
+
+# Каталог: добавление или обновление команды. Обработчики изменений каталога синхронные: FastAPI выполняет
+# их в пуле потоков, и fsync журнала не блокирует цикл событий
+@app.post("/teams")
+def upsert_team(team: Team):
+    """
+    Add a team to the stored catalogue or replace the stored team with the same ID.
+
+    Returns:
+        Dict: Confirmation with the team ID.
+    """
+    catalogue.upsert_team(team.model_dump())
+    return {"message": "Команда сохранена", "team_id": team.team_id}
+
+# Каталог: получение команды
+@app.get("/teams/{team_id}")
+async def get_team(team_id: int):
+    """
+    Return a stored team.
+
+    Raises:
+        HTTPException: If the team does not exist.
+    """
+    team = catalogue.teams.get(team_id)
+    if team is None:
+        raise HTTPException(status_code=404, detail="Команда не найдена")
+    return team
+
+# Каталог: удаление команды
+@app.delete("/teams/{team_id}")
+def delete_team(team_id: int):
+    """
+    Delete a stored team.
+
+    Raises:
+        HTTPException: If the team does not exist.
+    """
+    if not catalogue.delete_team(team_id):
+        raise HTTPException(status_code=404, detail="Команда не найдена")
+    return {"message": "Команда удалена", "team_id": team_id}
+
+# Каталог: добавление или обновление кейса
+@app.post("/cases")
+def upsert_case(case: Case):
+    """
+    Add a case to the stored catalogue or replace the stored case with the same ID.
+
+    Returns:
+        Dict: Confirmation with the case ID.
+    """
+    catalogue.upsert_case(case.model_dump())
+    return {"message": "Кейс сохранен", "id": case.id}
+
+# Каталог: получение кейса
+@app.get("/cases/{case_id}")
+async def get_case(case_id: int):
+    """
+    Return a stored case.
+
+    Raises:
+        HTTPException: If the case does not exist.
+    """
+    case = catalogue.cases.get(case_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail="Кейс не найден")
+    return case
+
+# Каталог: удаление кейса
+@app.delete("/cases/{case_id}")
+def delete_case(case_id: int):
+    """
+    Delete a stored case.
+
+    Raises:
+        HTTPException: If the case does not exist.
+    """
+    if not catalogue.delete_case(case_id):
+        raise HTTPException(status_code=404, detail="Кейс не найден")
+    return {"message": "Кейс удален", "id": case_id}
+
+# Проверка готовности: модель эмбеддингов загружена
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe for the service.
+
+    Returns:
+        Dict: Readiness status once the embedding model has been warmed up.
+
+    Raises:
+        HTTPException: 503 while the embedding model is still loading.
+    """
+    if not model_registry.is_ready:
+        raise HTTPException(status_code=503, detail="Модель эмбеддингов еще загружается")
+    return {"status": "ready"}
+
+# Статистика кэша эмбеддингов
+@app.get("/embedding_cache_stats")
+async def embedding_cache_stats():
+    """
+    Report hit/miss counters of the embedding cache.
+
+    Returns:
+        Dict: Memory hits, disk hits, misses and the size of the in-memory tier.
+    """
+    return embedding_cache.stats()
+
+# Загрузка пула инференса
+@app.get("/inference_pool_stats")
+async def inference_pool_stats():
+    """
+    Report the load of the inference pool and the micro-batching of the embedding model.
+
+    Returns:
+        Dict: Running and queued requests, counters of rejected and timed-out requests, and
+        micro-batching counters per model under "micro_batching".
+    """
+    return {**inference_pool.stats(), "micro_batching": model_registry.batching_stats()}
+
+# Статистика кэша ответов
+@app.get("/response_cache_stats")
+async def response_cache_stats():
+    """
+    Report the state of the recommendation response cache.
+
+    Returns:
+        Dict: Hits, misses, the catalogue generation and the size of the in-process cache.
+    """
+    return response_cache.stats()
+
+# Память процесса, обслужившего запрос
+@app.get("/memory_stats")
+async def memory_stats():
+    """
+    Report the memory of the worker process that served the request.
+
+    With several uvicorn workers each request reaches one of them; compare "pss" across pids,
+    or run `python -m src.memory` on the host to see all workers at once.
+
+    Returns:
+        Dict: "pid" and memory figures in bytes: "rss", "pss", "shared" and "private" on Linux,
+        otherwise "max_rss".
+    """
+    return {"pid": os.getpid(), **process_memory()}
+
+# Метрики в текстовом формате Prometheus
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Expose metrics in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Histograms of stage and request durations and of model batch sizes,
+        followed by cache, inference pool, micro-batching and ingest counters and the memory of the process.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Доступ к административным эндпоинтам по токену DPP_ADMIN_TOKEN
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """
+    Allow the request only with the admin token in the `X-Admin-Token` header.
+
+    Raises:
+        HTTPException: 404 if no admin token is configured, 401 if the header is missing or wrong.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Неверный токен администратора")
+
+# Профилирование следующих запросов
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_next_requests(request: ProfileNextRequest):
+    """
+    Profile the next requests that run scoring in the inference pool.
+
+    Args:
+        request (ProfileNextRequest): Number of requests to profile; 0 cancels.
+
+    Returns:
+        Dict: Number of requests still to be profiled.
+    """
+    return {"armed": request_profiler.arm(request.count)}
+
+# Список сохраненных профилей
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    List the stored request profiles, newest first.
+
+    Returns:
+        Dict: Profiles with their id, request, profiled function, creation time and duration,
+        and the number of requests still to be profiled.
+    """
+    return {"profiles": request_profiler.store.list(), "armed": request_profiler.armed}
+
+# Скачивание профиля
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str, format: str = "pstats", sort: str = "cumulative", limit: int = 50):
+    """
+    Download a stored profile.
+
+    Args:
+        profile_id (str): Id of the profile.
+        format (str): "pstats" for the binary file (`python -m pstats`, snakeviz) or "text" for a report.
+        sort (str): Sort key of the text report, e.g. "cumulative" or "tottime".
+        limit (int): Number of functions in the text report.
+
+    Returns:
+        FileResponse or PlainTextResponse: The profile.
+
+    Raises:
+        HTTPException: 404 if the profile does not exist, 422 for an unknown format or sort key.
+    """
+    path = request_profiler.store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
+    if format != "text":
+        raise HTTPException(status_code=422, detail="format должен быть pstats или text")
+    try:
+        report = await asyncio.to_thread(request_profiler.store.summary, profile_id, sort, limit)
+    except KeyError:
+        raise HTTPException(status_code=422, detail=f"Неизвестный ключ сортировки: {sort}")
+    return PlainTextResponse(report)
+
+# Статистика приема новых данных
+@app.get("/ingest_stats")
+async def ingest_stats():
+    """
+    Report the state of the `/new_data` ingest queue.
+
+    Returns:
+        Dict: Queued events, applied batches and events, failed attempts, retries and dead letters.
+    """
+    return ingest_queue.stats()
+
+# События /new_data, которые не удалось применить
+@app.get("/admin/ingest/dead_letters", dependencies=[Depends(require_admin)])
+async def ingest_dead_letters():
+    """
+    List the `/new_data` events that could not be applied even one by one, oldest first.
+
+    Returns:
+        Dict: The events with the error each raised and the time it was given up.
+    """
+    return {"dead_letters": ingest_queue.dead_letters()}
+
 @app.post("/new_data")
 async def receive_new_data(request: NewDataRequest):
-    # Здесь можно добавить логику обработки данных:
+    """
+    Store new data in the catalogue: the user joins the team and the team's case is saved.
+
+    The event is queued and applied in the background together with other recent events; the
+    case is then stored under the team's ID and can be used with `case_id`.
+
+    Args:
+        request (NewDataRequest): Team, case and user data.
+
+    Returns:
+        Dict: Confirmation message with the received data.
+
+    Raises:
+        HTTPException: 429 if the ingest queue is full.
+    """
+    try:
+        ingest_queue.submit(request.model_dump())
+    except queue.Full:
+        raise HTTPException(status_code=429, detail="Очередь новых данных переполнена, повторите запрос позже",
+                            headers={"Retry-After": "1"})
     return {
         "message": "Новые данные успешно получены",
-        "data": request.dict()
+        "data": request.model_dump()
     }
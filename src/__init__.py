@@ -68,3 +68,15 @@ all_skills = [
     "Spring Boot", "S3", "Next", "Vue", "Android разработка", "IOS разработка", "Desktop разработка", "Helm",
     "Nexus", "Nginx", "ELK", "Graphana", "Zustand", "SSR", "Tailwind", "MUI", "Shadcn"
 ]
+
+# Синонимы навыков: написание из запроса -> навык из списка выше (регистр букв не учитывается)
+skill_aliases = {
+    "Graphana": "Grafana",
+    "K8S": "Kubernetes",
+    "PostgreSQL": "СУБД PostgreSQL",
+    "Postgres": "СУБД PostgreSQL",
+    "sklearn": "Scikit-Learn",
+    "Torch": "PyTorch",
+    "JS": "JavaScript",
+    "REST API": "Построение Rest API",
+}
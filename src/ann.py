@@ -0,0 +1,388 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.ranking import select_top_k
+
+
+# Нормализация векторов для поиска по косинусу через скалярное произведение
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+# Точный поиск перебором
+class ExactIndex:
+    """
+    Exact nearest-neighbour search by cosine similarity over pre-normalized float32 vectors.
+
+    Serves as the reference for approximate backends and as the fallback when no
+    approximate backend is configured. Row ids index the stored matrix directly; removed
+    ids are masked out of the search.
+    """
+
+    def __init__(self):
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    def build(self, vectors: np.ndarray) -> "ExactIndex":
+        """
+        Index a matrix of vectors; row numbers become the result ids.
+
+        Args:
+        vectors (np.ndarray): Matrix of shape (n, dim).
+
+        Returns:
+        ExactIndex: The index itself.
+        """
+        self.vectors = _normalized(vectors)
+        self.alive = np.ones(len(self.vectors), dtype=bool)
+        return self
+
+    def upsert(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Insert vectors under the given row ids, replacing the vectors already stored for them.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        vectors (np.ndarray): One vector per id.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) == 0:
+            return
+        vectors = _normalized(vectors).reshape(len(ids), -1)
+        end = int(ids.max()) + 1
+        if end > len(self.vectors) or self.vectors.shape[1] != vectors.shape[1]:
+            capacity = max(end, 2 * len(self.vectors))
+            vectors_grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            alive_grown = np.zeros(capacity, dtype=bool)
+            if self.vectors.shape[1] == vectors.shape[1]:
+                vectors_grown[:len(self.vectors)] = self.vectors
+                alive_grown[:len(self.alive)] = self.alive
+            self.vectors, self.alive = vectors_grown, alive_grown
+        self.vectors[ids] = vectors
+        self.alive[ids] = True
+
+    def remove(self, ids: np.ndarray) -> None:
+        """
+        Remove row ids from the index; unknown ids are ignored.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        self.alive[ids[ids < len(self.alive)]] = False
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows most similar to a query.
+
+        Args:
+        query (np.ndarray): Query vector.
+        k (int): Number of neighbours.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: Row ids and cosine similarities, best first.
+        """
+        scores = self.vectors @ _normalized(query).reshape(-1)
+        scores[~self.alive] = -np.inf
+        top = select_top_k(scores, min(k, len(self)))
+        return top, scores[top]
+
+
+# Инвертированный индекс с кластеризацией k-means (IVF-Flat) на NumPy
+class IVFFlatIndex:
+    """
+    Approximate nearest-neighbour search with an inverted file of k-means clusters (IVF-Flat).
+
+    Vectors are grouped by their nearest centroid and stored contiguously per cluster. A query
+    scores all centroids, then scans only the `n_probe` closest clusters exactly. Recall grows
+    and speed drops with `n_probe`.
+
+    After `build` the index is updated in place: an inserted vector is assigned to its nearest
+    existing centroid and appended after the sorted clusters, and a removed or replaced one is
+    tombstoned. Once appended and tombstoned entries exceed `compact_fraction` of the storage,
+    the live entries are regrouped by cluster with the same centroids; k-means runs only in
+    `build`.
+
+    Attributes:
+    n_lists (int): Number of clusters; defaults to about sqrt(n).
+    n_probe (int): Number of clusters scanned per query.
+    compact_fraction (float): Share of appended and tombstoned entries that triggers regrouping.
+    """
+
+    def __init__(self, n_lists: int = None, n_probe: int = 8, n_iter: int = 10, seed: int = 0,
+                 compact_fraction: float = 0.25):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.compact_fraction = compact_fraction
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self._store(np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    # Хранилище, сгруппированное по кластерам: позиции кластера p — offsets[p]..offsets[p + 1]
+    def _store(self, vectors: np.ndarray, row_ids: np.ndarray, lists: np.ndarray) -> None:
+        self.vectors = vectors
+        self.row_ids = row_ids
+        self.lists = lists
+        self.alive = np.ones(len(row_ids), dtype=bool)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=len(self.centroids)))]).astype(np.int64)
+        self.positions: Dict[int, int] = dict(zip(row_ids.tolist(), range(len(row_ids))))
+        self.n_sorted = self.size = len(row_ids)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        # Ближайший центроид для каждого вектора; считаем порциями, чтобы не держать всю матрицу n × lists
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def build(self, vectors: np.ndarray) -> "IVFFlatIndex":
+        """
+        Cluster and index a matrix of vectors; row numbers become the result ids.
+
+        Args:
+        vectors (np.ndarray): Matrix of shape (n, dim).
+
+        Returns:
+        IVFFlatIndex: The index itself.
+        """
+        vectors = _normalized(vectors)
+        n = len(vectors)
+        rng = np.random.default_rng(self.seed)
+        n_lists = max(1, min(self.n_lists or int(np.sqrt(n)), n))
+
+        # Сферический k-means на подвыборке: центроиды нормируются после каждого шага
+        sample = vectors[rng.choice(n, size=min(n, 256 * n_lists), replace=False)] if n else vectors
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy() if n else sample
+        for _ in range(self.n_iter if n else 0):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = _normalized(sums)
+
+        assignment = self._assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        self.centroids = centroids
+        self._store(vectors[order], order.astype(np.int64), assignment[order])
+        return self
+
+    def _tombstone(self, ids: np.ndarray) -> None:
+        for row_id in ids.tolist():
+            position = self.positions.pop(row_id, None)
+            if position is not None:
+                self.alive[position] = False
+
+    # Перегруппировка живых записей по кластерам, когда хвост и удаленные записи разрослись
+    def _maybe_compact(self) -> None:
+        if (self.size - self.n_sorted) + (self.size - len(self.positions)) <= self.compact_fraction * self.size:
+            return
+        live = np.flatnonzero(self.alive[:self.size])
+        order = live[np.argsort(self.lists[live], kind="stable")]
+        self._store(self.vectors[order], self.row_ids[order], self.lists[order])
+
+    def upsert(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Insert vectors under the given row ids, replacing the vectors already stored for them.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        vectors (np.ndarray): One vector per id.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) == 0:
+            return
+        vectors = _normalized(vectors).reshape(len(ids), -1)
+        if len(self.centroids) == 0:
+            self.centroids = vectors[:1].copy()
+            self._store(np.zeros((0, vectors.shape[1]), dtype=np.float32), self.row_ids[:0], self.lists[:0])
+        self._tombstone(ids)
+
+        end = self.size + len(ids)
+        if end > len(self.row_ids):
+            capacity = max(end, 2 * len(self.row_ids))
+            grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+            self.row_ids, self.lists = np.resize(self.row_ids, capacity), np.resize(self.lists, capacity)
+            self.alive = np.concatenate([self.alive[:self.size], np.zeros(capacity - self.size, dtype=bool)])
+        self.vectors[self.size:end] = vectors
+        self.row_ids[self.size:end] = ids
+        self.lists[self.size:end] = self._assign(vectors, self.centroids)
+        self.alive[self.size:end] = True
+        self.positions.update(zip(ids.tolist(), range(self.size, end)))
+        self.size = end
+        self._maybe_compact()
+
+    def remove(self, ids: np.ndarray) -> None:
+        """
+        Remove row ids from the index; unknown ids are ignored.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        """
+        self._tombstone(np.asarray(ids, dtype=np.int64).reshape(-1))
+        self._maybe_compact()
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k rows most similar to a query.
+
+        Args:
+        query (np.ndarray): Query vector.
+        k (int): Number of neighbours.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: Row ids and cosine similarities, best first.
+        """
+        if not self.positions:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = _normalized(query).reshape(-1)
+        probes = select_top_k(self.centroids @ query, self.n_probe)
+        # Отсортированные кластеры плюс хвост вставленных после построения записей
+        tail = self.n_sorted + np.flatnonzero(np.isin(self.lists[self.n_sorted:self.size], probes))
+        positions = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes] + [tail])
+        positions = positions[self.alive[positions]]
+        scores = self.vectors[positions] @ query
+        top = select_top_k(scores, k)
+        return self.row_ids[positions[top]], scores[top]
+
+
+# Граф HNSW через необязательную библиотеку hnswlib
+class HNSWIndex:
+    """
+    Approximate nearest-neighbour search with an HNSW graph from the optional `hnswlib` package.
+
+    The graph is updated in place: inserted vectors are added to it, replaced ones are updated,
+    and removed ones are marked deleted so that searches skip them.
+
+    Attributes:
+    m (int): Graph degree.
+    ef_construction (int): Candidate list size while building.
+    ef_search (int): Candidate list size while searching; larger means better recall.
+    """
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        import hnswlib  # необязательная зависимость
+
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = None
+        self._live = set()
+        self._labels = set()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def build(self, vectors: np.ndarray) -> "HNSWIndex":
+        """
+        Index a matrix of vectors; row numbers become the result ids.
+
+        Args:
+        vectors (np.ndarray): Matrix of shape (n, dim).
+
+        Returns:
+        HNSWIndex: The index itself.
+        """
+        vectors = _normalized(vectors)
+        size = len(vectors)
+        self._index = self._hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self._index.init_index(max_elements=max(1, size), ef_construction=self.ef_construction, M=self.m)
+        if size:
+            self._index.add_items(vectors, np.arange(size))
+        self._index.set_ef(self.ef_search)
+        self._live = set(range(size))
+        self._labels = set(self._live)
+        return self
+
+    def upsert(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Insert vectors under the given row ids, replacing the vectors already stored for them.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        vectors (np.ndarray): One vector per id.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) == 0:
+            return
+        vectors = _normalized(vectors).reshape(len(ids), -1)
+        if self._index is None:
+            self.build(vectors[:0])
+        # Метки, помеченные удаленными, hnswlib восстанавливает при повторном добавлении
+        needed = len(self._labels.union(ids.tolist()))
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        self._index.add_items(vectors, ids)
+        self._labels.update(ids.tolist())
+        self._live.update(ids.tolist())
+
+    def remove(self, ids: np.ndarray) -> None:
+        """
+        Remove row ids from the index; unknown ids are ignored.
+
+        Args:
+        ids (np.ndarray): Row ids.
+        """
+        for row_id in np.asarray(ids, dtype=np.int64).reshape(-1).tolist():
+            if row_id in self._live:
+                self._index.mark_deleted(row_id)
+                self._live.discard(row_id)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k rows most similar to a query.
+
+        Args:
+        query (np.ndarray): Query vector.
+        k (int): Number of neighbours.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: Row ids and cosine similarities, best first.
+        """
+        k = min(k, len(self._live))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        self._index.set_ef(max(self.ef_search, k))
+        labels, distances = self._index.knn_query(_normalized(query).reshape(1, -1), k=k)
+        # Для пространства "ip" hnswlib возвращает 1 - скалярное произведение
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+
+# Создание индекса по имени бэкенда
+def create_ann_index(backend: str = "exact", **options):
+    """
+    Create a nearest-neighbour index.
+
+    Args:
+    backend (str, optional): "exact", "ivf" or "hnsw". Defaults to "exact".
+    **options: Backend-specific parameters, e.g. `n_probe` for "ivf" or `ef_search` for "hnsw".
+
+    Returns:
+    ExactIndex, IVFFlatIndex or HNSWIndex: An empty index; call `build` before searching, then keep
+    it current with `upsert` and `remove`.
+
+    Raises:
+    ValueError: If the backend is unknown.
+    ImportError: If "hnsw" is requested and `hnswlib` is not installed.
+    """
+    if backend == "exact":
+        return ExactIndex()
+    if backend == "ivf":
+        return IVFFlatIndex(**options)
+    if backend == "hnsw":
+        return HNSWIndex(**options)
+    raise ValueError(f"Unknown ANN backend: {backend}")
@@ -0,0 +1,256 @@
+"""
+Offline batch recommender over CSV or Parquet files.
+
+Reads users or cases in chunks, scores every chunk against all teams with the same functions as
+the HTTP API and appends the recommendations to a CSV or Parquet file, so memory does not grow
+with the size of the input. Chunks can be scored by several worker processes.
+
+Input formats (CSV with --sep, ';' by default, or Parquet):
+    users:  user_id, skills                                  (skills separated by --list-sep)
+    teams:  team_id, name, member, skills[, required_roles]  (one row per member; roles separated by ", ")
+    cases:  id, title, description, required_roles           (as in data/cases_with_roles.csv)
+
+Usage:
+    python -m src.batch_recommend teams-for-users --users users.csv --teams teams.csv --output recs.parquet
+    python -m src.batch_recommend teams-for-cases --cases data/cases_with_roles.csv --teams teams.csv --output recs.csv
+"""
+import argparse
+import multiprocessing
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from src.matching import MatchMatrix
+from src.ranking import select_recommendations
+from src.roles import PersonTeamScorer
+from src.skills import skill_dictionary
+
+
+# Чтение таблицы порциями из CSV или Parquet
+def read_chunks(path: str, chunk_size: int, sep: str = ";") -> Iterator[pd.DataFrame]:
+    """
+    Read a table in chunks of rows.
+
+    Args:
+    path (str): CSV file, or Parquet file if the name ends with ".parquet" (requires `pyarrow`).
+    chunk_size (int): Number of rows per chunk.
+    sep (str, optional): CSV field separator. Defaults to ";".
+
+    Yields:
+    pd.DataFrame: Consecutive chunks of the table.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # необязательная зависимость
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, sep=sep, encoding="utf-8-sig", chunksize=chunk_size)
+
+
+# Запись результатов порциями в CSV или Parquet
+class RecommendationWriter:
+    """
+    Appends DataFrames with the same columns to a CSV or Parquet file.
+
+    Attributes:
+    path (str): Output file; Parquet if the name ends with ".parquet" (requires `pyarrow`), CSV otherwise.
+    rows (int): Number of rows written so far.
+    """
+
+    def __init__(self, path: str, sep: str = ";"):
+        self.path = path
+        self.sep = sep
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa  # необязательная зависимость
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, sep=self.sep, index=False, mode="w" if self.rows == 0 else "a",
+                         header=self.rows == 0, encoding="utf-8")
+        self.rows += len(frame)
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def __enter__(self) -> "RecommendationWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Разбор списка значений из ячейки таблицы
+def split_list(value, sep: str) -> List[str]:
+    if not isinstance(value, str):
+        return []
+    return [item.strip() for item in value.split(sep) if item.strip()]
+
+# Сборка команд из таблицы «одна строка — один участник»
+def load_teams(path: str, sep: str = ";", list_sep: str = "|") -> List[Dict]:
+    """
+    Load teams from a table with one row per team member.
+
+    Args:
+    path (str): CSV or Parquet file with 'team_id', 'name', 'member', 'skills' and optional 'required_roles'.
+    sep (str, optional): CSV field separator. Defaults to ";".
+    list_sep (str, optional): Separator of skills within a cell. Defaults to "|".
+
+    Returns:
+    List[Dict]: Teams in the format of the API: 'team_id', 'name', 'skills' and 'required_roles'.
+    """
+    teams: Dict = {}
+    for chunk in read_chunks(path, 100_000, sep):
+        for row in chunk.to_dict("records"):
+            team = teams.setdefault(row['team_id'], {
+                'team_id': row['team_id'], 'name': row['name'], 'skills': {}, 'required_roles': [],
+            })
+            team['skills'].setdefault(row['member'], []).extend(map(skill_dictionary.canonical, split_list(row['skills'], list_sep)))
+            for role in split_list(row.get('required_roles'), ","):
+                if role not in team['required_roles']:
+                    team['required_roles'].append(role)
+    return list(teams.values())
+
+
+# Состояние процесса-обработчика: команды и предрассчитанные матрицы
+_state: Dict = {}
+
+def _init_worker(mode: str, teams: List[Dict], options: Dict) -> None:
+    _state['teams'] = teams
+    _state['options'] = options
+    if mode == "teams-for-users":
+        _state['scorer'] = PersonTeamScorer(teams, options['role_filled_threshold'], options['unfilled_role_weight'])
+        _state['score'] = _score_users
+    else:
+        _state['matrix'] = MatchMatrix([], teams)
+        _state['score'] = _score_cases
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _state['score'](chunk)
+
+def _ranked(scores: np.ndarray, options: Dict) -> np.ndarray:
+    selected, _ = select_recommendations(scores, options['confidence_percentile'], options['top_k'])
+    return selected[np.argsort(-scores[selected], kind="stable")]
+
+def _score_users(chunk: pd.DataFrame) -> pd.DataFrame:
+    options, teams = _state['options'], _state['teams']
+    scores = _state['scorer'].score_many(split_list(skills, options['list_sep']) for skills in chunk['skills'])
+    rows = []
+    for user_id, user_scores in zip(chunk['user_id'], scores):
+        for rank, column in enumerate(_ranked(user_scores, options), start=1):
+            rows.append((user_id, rank, teams[column]['team_id'], teams[column]['name'], float(user_scores[column])))
+    return pd.DataFrame(rows, columns=["user_id", "rank", "team_id", "team_name", "similarity"])
+
+def _score_cases(chunk: pd.DataFrame) -> pd.DataFrame:
+    options, teams = _state['options'], _state['teams']
+    cases = chunk.fillna("").to_dict("records")
+    matrix = _state['matrix'].with_cases(cases)
+    rows = []
+    # Блоки ограничены по числу кейсов: в памяти не больше block_size × N оценок каждого вида
+    for start, embedding, skills, hybrid in matrix.blocks(options['alpha'], options['beta'], options['block_size']):
+        for offset, case_scores in enumerate(hybrid):
+            for rank, column in enumerate(_ranked(case_scores, options), start=1):
+                rows.append((cases[start + offset]['id'], rank, teams[column]['team_id'], teams[column]['name'],
+                             float(case_scores[column]), float(embedding[offset, column]),
+                             float(skills[offset, column])))
+    return pd.DataFrame(rows, columns=["case_id", "rank", "team_id", "team_name", "hybrid_similarity",
+                                       "embedding_similarity", "skills_similarity"])
+
+
+# Параллельная обработка с ограниченным числом порций в работе
+def _map_bounded(pool, fn: Callable, items: Iterable, max_pending: int) -> Iterator:
+    # Pool.imap читает весь вход заранее; здесь в памяти не больше max_pending порций
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(fn, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+# Пакетный расчет рекомендаций
+def run(mode: str, input_path: str, teams_path: str, output_path: str, chunk_size: int = 10_000,
+        workers: int = 1, sep: str = ";", list_sep: str = "|", **options) -> int:
+    """
+    Score a file of users or cases against all teams and write the recommendations.
+
+    Args:
+    mode (str): "teams-for-users" or "teams-for-cases".
+    input_path (str): File with users or cases.
+    teams_path (str): File with teams, one row per member.
+    output_path (str): Output CSV or Parquet file; recommendations are ranked best first per user or case.
+    chunk_size (int, optional): Number of input rows scored at once. Defaults to 10000.
+    workers (int, optional): Number of worker processes; 1 scores in the current process. Defaults to 1.
+    sep (str, optional): CSV field separator of the input and output. Defaults to ";".
+    list_sep (str, optional): Separator of skills within a cell. Defaults to "|".
+    **options: Scoring parameters as in the API: confidence_percentile, top_k, and role_filled_threshold
+        with unfilled_role_weight for users or alpha, beta and block_size (cases scored at once) for cases.
+
+    Returns:
+    int: Number of recommendation rows written.
+    """
+    options = {"confidence_percentile": 0.9, "top_k": None, "role_filled_threshold": 0.5,
+               "unfilled_role_weight": 1.5, "alpha": 0.5, "beta": 0.5, "block_size": 256, **options,
+               "list_sep": list_sep}
+    teams = load_teams(teams_path, sep, list_sep)
+    chunks = read_chunks(input_path, chunk_size, sep)
+
+    with RecommendationWriter(output_path, sep) as writer:
+        if workers <= 1:
+            _init_worker(mode, teams, options)
+            for chunk in chunks:
+                writer.write(_score_chunk(chunk))
+        else:
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(mode, teams, options)) as pool:
+                for result in _map_bounded(pool, _score_chunk, chunks, max_pending=2 * workers):
+                    writer.write(result)
+        return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["teams-for-users", "teams-for-cases"])
+    parser.add_argument("--users", help="Users file (teams-for-users)")
+    parser.add_argument("--cases", help="Cases file (teams-for-cases)")
+    parser.add_argument("--teams", required=True, help="Teams file, one row per member")
+    parser.add_argument("--output", required=True, help="Output .csv or .parquet file")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; each loads its own model")
+    parser.add_argument("--sep", default=";", help="CSV field separator")
+    parser.add_argument("--list-sep", default="|", help="Separator of skills within a cell")
+    parser.add_argument("--confidence-percentile", type=float, default=0.9)
+    parser.add_argument("--top-k", type=int, help="Keep the k best teams instead of filtering by the percentile")
+    parser.add_argument("--role-filled-threshold", type=float, default=0.5)
+    parser.add_argument("--unfilled-role-weight", type=float, default=1.5)
+    parser.add_argument("--alpha", type=float, default=0.5)
+    parser.add_argument("--beta", type=float, default=0.5)
+    parser.add_argument("--block-size", type=int, default=256,
+                        help="Cases whose similarity to all teams is held in memory at once (teams-for-cases)")
+    args = parser.parse_args()
+
+    input_path = args.users if args.mode == "teams-for-users" else args.cases
+    if input_path is None:
+        parser.error(f"{args.mode} needs --{'users' if args.mode == 'teams-for-users' else 'cases'}")
+    rows = run(
+        args.mode, input_path, args.teams, args.output, args.chunk_size, args.workers, args.sep, args.list_sep,
+        confidence_percentile=args.confidence_percentile, top_k=args.top_k,
+        role_filled_threshold=args.role_filled_threshold, unfilled_role_weight=args.unfilled_role_weight,
+        alpha=args.alpha, beta=args.beta, block_size=args.block_size,
+    )
+    print(f"Wrote {rows} recommendations to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
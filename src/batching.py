@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.config import settings
+
+
+# Планировщик микробатчей: объединяет тексты одновременных запросов в один прогон модели
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler in front of a batched encode function.
+
+    Callers from any thread submit their texts and block until the embeddings are ready. A
+    single background thread takes the first pending submission, keeps collecting further
+    submissions for up to `max_wait_ms` milliseconds or until `max_batch_size` texts are
+    gathered, runs one `encode_fn` call over all of them and hands every caller its own rows.
+    A submission larger than `max_batch_size` is never split; it simply forms a batch of its own.
+    An empty submission returns an empty array at once, without calling `encode_fn`.
+
+    Attributes:
+    max_batch_size (int): Number of texts after which a batch is run without further waiting.
+    max_wait_ms (float): Longest time the first submission of a batch waits for company.
+    dim (Callable[[], int]): Returns the embedding dimension for empty results before any batch has run.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = settings.embedding_batch_max_size,
+                 max_wait_ms: float = settings.embedding_batch_max_wait_ms, dim: Callable[[], int] = None):
+        self.encode_fn = encode_fn
+        self.dim = dim
+        self._dim = None
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.texts = 0
+        self.submissions = 0
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts together with the texts of concurrent callers.
+
+        Args:
+        texts (List[str]): Texts to embed.
+
+        Returns:
+        numpy.ndarray: Array of shape (len(texts), dim) with one embedding per text.
+        """
+        if not texts:
+            # Пустой запрос не должен загружать модель
+            dim = self._dim if self._dim is not None else self.dim() if self.dim is not None else 0
+            return np.zeros((0, dim), dtype=np.float32)
+        future: Future = Future()
+        self._ensure_thread()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self) -> List:
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _loop(self) -> None:
+        while True:
+            pending = self._collect()
+            texts = [text for submitted, _ in pending for text in submitted]
+            try:
+                embeddings = self.encode_fn(texts)
+            except BaseException as error:
+                for _, future in pending:
+                    future.set_exception(error)
+                continue
+
+            self._dim = embeddings.shape[1]
+            with self._lock:
+                self.batches += 1
+                self.texts += len(texts)
+                self.submissions += len(pending)
+
+            start = 0
+            for submitted, future in pending:
+                future.set_result(embeddings[start:start + len(submitted)])
+                start += len(submitted)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return batching counters.
+
+        Returns:
+        Dict[str, float]: Numbers of model batches, texts and submissions, and the mean batch size in texts.
+        """
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "submissions": self.submissions,
+                "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            }
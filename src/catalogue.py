@@ -0,0 +1,721 @@
+import json
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src import role_to_skills_mapping, all_skills
+from src.ann import create_ann_index
+from src.config import settings
+from src.embeddings import model_registry
+from src.persistence import CatalogueJournal
+from src.roles import PersonTeamScorer
+from src.utils import build_case_text, build_team_text, encode_teams, team_to_skills_vector, roles_to_skills_vector
+
+
+# Нормализация строк матрицы по L2-норме (нулевые строки остаются нулевыми)
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit L2 norm.
+
+    Args:
+    matrix (np.ndarray): Matrix of shape (n, dim) or a single vector.
+
+    Returns:
+    np.ndarray: float32 matrix of the same shape; all-zero rows stay zero.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+# Часть изменений не применилась: остальные применены и записаны в журнал
+class CommitError(Exception):
+    """
+    Raised when some changes of a commit could not be applied.
+
+    The other changes of the same commit are applied and logged; the failed ones leave the
+    catalogue untouched and are not logged.
+
+    Attributes:
+    failures (List[Tuple[int, Exception]]): Position of each failed change in the commit and its error.
+    """
+
+    def __init__(self, failures: List[Tuple[int, Exception]]):
+        super().__init__(f"{len(failures)} change(s) failed to apply, first: {failures[0][1]!r}")
+        self.failures = failures
+
+
+# Индекс сущностей каталога с непрерывными матрицами эмбеддингов и векторов навыков
+class VectorIndex:
+    """
+    Contiguous storage of embeddings and binary skill vectors for one kind of entity.
+
+    Rows are addressed by entity id. Deleting an entity moves the last row into its place, so
+    the first `len(index)` rows of every matrix are always the live entities. Embeddings are
+    computed lazily: changed rows are marked stale and encoded together in one batch, either by
+    `ensure_embeddings` or, without holding any lock during inference, through `stale_items` and
+    `store_embeddings`. Until then a stale row keeps its previous embedding, and a new row has a
+    zero embedding. The nearest-neighbour index over the embeddings is built on the first search
+    and then updated in place with every stored, moved or removed row; it is rebuilt from scratch
+    only when the embedding dimension changes.
+    """
+
+    def __init__(self, n_skills: int, capacity: int = 64, ann_backend: str = "exact", **ann_options):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.texts: List[Optional[str]] = [None] * capacity
+        self.skills = np.zeros((capacity, n_skills), dtype=np.float32)
+        self.skill_norms = np.zeros(capacity, dtype=np.float32)
+        self.embeddings: Optional[np.ndarray] = None
+        self.rows: Dict[int, int] = {}
+        self.stale = set()
+        self.ann_backend = ann_backend
+        self.ann_options = ann_options
+        self._ann = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self) -> None:
+        # Удваиваем ёмкость, сохраняя непрерывность матриц
+        capacity = 2 * len(self.ids)
+        self.ids = np.resize(self.ids, capacity)
+        self.texts.extend([None] * (capacity - len(self.texts)))
+        self.skills = np.vstack([self.skills, np.zeros_like(self.skills)])
+        self.skill_norms = np.resize(self.skill_norms, capacity)
+        if self.embeddings is not None:
+            self.embeddings = np.vstack([self.embeddings, np.zeros_like(self.embeddings)])
+
+    def upsert(self, entity_id: int, text: str, skill_vector: np.ndarray) -> None:
+        """
+        Insert or replace an entity.
+
+        Args:
+        entity_id (int): Identifier of the entity.
+        text (str): Text to embed for the entity.
+        skill_vector (np.ndarray): Binary skill vector of the entity.
+        """
+        row = self.rows.get(entity_id)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.ids):
+                self._grow()
+            self.rows[entity_id] = row
+            self.ids[row] = entity_id
+            if self.embeddings is not None:
+                self.embeddings[row] = 0.0
+                self._ann_upsert([row])
+            self.stale.add(row)
+        elif self.texts[row] != text:
+            self.stale.add(row)
+        self.texts[row] = text
+        self.skills[row] = skill_vector
+        self.skill_norms[row] = np.linalg.norm(skill_vector)
+
+    def remove(self, entity_id: int) -> None:
+        """
+        Remove an entity, keeping the live rows contiguous.
+
+        Args:
+        entity_id (int): Identifier of the entity.
+        """
+        row = self.rows.pop(entity_id)
+        last = len(self.rows)
+        if self._ann is not None:
+            self._ann.remove([last])
+        if row != last:
+            moved_id = int(self.ids[last])
+            self.rows[moved_id] = row
+            self.ids[row] = moved_id
+            self.texts[row] = self.texts[last]
+            self.skills[row] = self.skills[last]
+            self.skill_norms[row] = self.skill_norms[last]
+            if self.embeddings is not None:
+                self.embeddings[row] = self.embeddings[last]
+                self._ann_upsert([row])
+            if last in self.stale:
+                self.stale.add(row)
+            else:
+                self.stale.discard(row)
+        self.stale.discard(last)
+        self.texts[last] = None
+
+    def ensure_embeddings(self, encoder) -> None:
+        """
+        Encode all stale rows in one batch.
+
+        Args:
+        encoder: Text encoder with an `encode(texts)` method.
+        """
+        if not self.stale:
+            return
+        rows = sorted(self.stale)
+        vectors = normalize_rows(encoder.encode([self.texts[row] for row in rows]))
+        if self._reset_if_dimension_changed(vectors.shape[1]):
+            return self.ensure_embeddings(encoder)
+        if self.embeddings is None:
+            self.embeddings = np.zeros((len(self.ids), vectors.shape[1]), dtype=np.float32)
+        self.embeddings[rows] = vectors
+        self.stale.clear()
+        self._ann_upsert(rows)
+
+    # Обновление индекса ближайших соседей на месте; до первого поиска индекса нет
+    def _ann_upsert(self, rows: List[int]) -> None:
+        if self._ann is not None and len(rows):
+            self._ann.upsert(rows, self.embeddings[rows])
+
+    def _reset_if_dimension_changed(self, dim: int) -> bool:
+        # Эмбеддинги другой модели несовместимы с текущими: все строки пересчитываются
+        if self.embeddings is None or self.embeddings.shape[1] == dim:
+            return False
+        self.embeddings = None
+        self.stale = set(range(len(self.rows)))
+        self._ann = None
+        return True
+
+    def stale_items(self) -> List[Tuple[int, str]]:
+        """
+        Return the entities whose embeddings are out of date, for encoding outside the catalogue lock.
+
+        Returns:
+        List[Tuple[int, str]]: (entity id, text) pairs.
+        """
+        return [(int(self.ids[row]), self.texts[row]) for row in sorted(self.stale)]
+
+    def store_embeddings(self, items: List[Tuple[int, str]], vectors: np.ndarray) -> None:
+        """
+        Store embeddings computed for `stale_items`, skipping entities changed or removed meanwhile.
+
+        Args:
+        items (List[Tuple[int, str]]): (entity id, text) pairs as returned by `stale_items`.
+        vectors (np.ndarray): One embedding per item.
+        """
+        vectors = normalize_rows(vectors)
+        if len(vectors) and self._reset_if_dimension_changed(vectors.shape[1]):
+            return
+        stored = []
+        for (entity_id, text), vector in zip(items, vectors):
+            row = self.rows.get(entity_id)
+            if row is None or self.texts[row] != text or row not in self.stale:
+                continue
+            if self.embeddings is None:
+                self.embeddings = np.zeros((len(self.ids), len(vector)), dtype=np.float32)
+            self.embeddings[row] = vector
+            self.stale.discard(row)
+            stored.append(row)
+        self._ann_upsert(stored)
+
+    def nearest(self, query_embedding: np.ndarray, k: int) -> np.ndarray:
+        """
+        Return the rows whose embeddings are most similar to a query.
+
+        Stale rows are searched with their previous embedding.
+
+        Args:
+        query_embedding (np.ndarray): Embedding of the query entity.
+        k (int): Number of rows to retrieve.
+
+        Returns:
+        np.ndarray: Row numbers, best first.
+        """
+        if self.embeddings is None:
+            return np.arange(min(k, len(self.rows)))
+        if self._ann is None:
+            self._ann = create_ann_index(self.ann_backend, **self.ann_options).build(self.embeddings[:len(self.rows)])
+        rows, _ = self._ann.search(query_embedding, k)
+        return rows
+
+    def vectors(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the embeddings and skill vectors of entities; removed entities get zero vectors.
+
+        Args:
+        ids (np.ndarray): Entity ids.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: (embeddings, skill vectors), one row per id.
+        """
+        rows = np.array([self.rows.get(int(entity_id), -1) for entity_id in ids], dtype=np.int64)
+        present = (rows >= 0)[:, None]
+        embeddings = np.where(present, self.embeddings[rows], 0) if self.embeddings is not None else np.zeros((len(rows), 0))
+        return embeddings.astype(np.float32), np.where(present, self.skills[rows], 0).astype(np.float32)
+
+    def hybrid_scores(self, query_embedding: np.ndarray, query_skills: np.ndarray, alpha: float, beta: float,
+                      rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score live entities against a query with one matrix-vector product per signal.
+
+        Args:
+        query_embedding (np.ndarray): Embedding of the query entity.
+        query_skills (np.ndarray): Binary skill vector of the query entity.
+        alpha (float): Weight for embedding similarity.
+        beta (float): Weight for skill similarity.
+        rows (np.ndarray, optional): Rows to score, e.g. from `nearest`. Defaults to all live rows.
+
+        Returns:
+        Tuple: (ids, embedding_similarity, skills_similarity, hybrid_similarity) arrays aligned by row.
+        """
+        n = len(self.rows)
+        if n == 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return np.zeros(0, dtype=np.int64), empty, empty, empty
+        if rows is None:
+            rows = slice(0, n)
+
+        if self.embeddings is None:
+            embedding_similarity = np.zeros(len(self.ids[rows]), dtype=np.float32)
+        else:
+            embedding_similarity = self.embeddings[rows] @ normalize_rows(query_embedding).reshape(-1)
+
+        # Косинус бинарных векторов: скалярное произведение, деленное на произведение норм
+        query_skills = np.asarray(query_skills, dtype=np.float32)
+        denominator = self.skill_norms[rows] * np.linalg.norm(query_skills)
+        dot = self.skills[rows] @ query_skills
+        skills_similarity = np.divide(dot, denominator, out=np.zeros_like(dot), where=denominator > 0)
+
+        hybrid_similarity = alpha * embedding_similarity + beta * skills_similarity
+        return self.ids[rows].copy(), embedding_similarity, skills_similarity, hybrid_similarity
+
+
+# Каталог команд и кейсов, хранимый на сервере
+class Catalogue:
+    """
+    Server-side catalogue of teams and cases with precomputed vectors.
+
+    Teams and cases are kept as plain dictionaries (the same shape as the request models) and,
+    in parallel, in `VectorIndex` objects holding their e5 embeddings and binary skill vectors.
+    With a `CatalogueJournal` opened via `open_journal`, every change that was applied is logged
+    before the call returns and the catalogue survives restarts. All methods are thread-safe.
+    """
+
+    def __init__(self, encoder_factory: Callable = model_registry.get_encoder, ann_backend: str = settings.ann_backend,
+                 team_embedding: str = settings.team_embedding):
+        ann_options = {"n_probe": settings.ann_n_probe} if ann_backend == "ivf" else {}
+        self.teams: Dict[int, Dict] = {}
+        self.cases: Dict[int, Dict] = {}
+        # Кейсы, созданные событиями /new_data; кейс из /cases событие не перезаписывает
+        self._ingested_case_ids: Set[int] = set()
+        self.team_index = VectorIndex(len(all_skills), ann_backend=ann_backend, **ann_options)
+        self.case_index = VectorIndex(len(all_skills), ann_backend=ann_backend, **ann_options)
+        self.journal: Optional[CatalogueJournal] = None
+        self._encoder_factory = encoder_factory
+        self.team_embedding = team_embedding
+        self._lock = threading.RLock()
+        # Модель работает без блокировки каталога; эта блокировка лишь не дает кодировать одни и те же строки дважды
+        self._refresh_lock = threading.Lock()
+        self._teams_version = 0
+        self._person_scorers: Dict[Tuple, PersonTeamScorer] = {}
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback invoked after every change of the catalogue, e.g. to invalidate caches.
+
+        Args:
+        callback (Callable[[], None]): Function called without arguments.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    # Текст строки индекса команд; при пулинге навыков важны и навыки каждого участника, поэтому это JSON навыков
+    def _team_text(self, team_skills: Dict) -> str:
+        if self.team_embedding == "skills":
+            return json.dumps(team_skills, ensure_ascii=False, sort_keys=True)
+        return build_team_text(team_skills)
+
+    # Кодировщик строк индекса команд
+    def _team_encoder(self):
+        encoder = self._encoder_factory()
+        if self.team_embedding != "skills":
+            return encoder
+        return SimpleNamespace(encode=lambda texts: encode_teams([json.loads(text) for text in texts], encoder,
+                                                                 mode="skills")[0])
+
+    # Изменения каталога без записи в журнал; вызываются под блокировкой.
+    # Строки индекса готовятся до изменения каталога, поэтому запись с плохими данными его не трогает
+    def _team_row(self, team: Dict) -> Callable[[], None]:
+        text, vector = self._team_text(team['skills']), team_to_skills_vector(team['skills'], all_skills)
+
+        def store():
+            self.teams[team['team_id']] = team
+            self.team_index.upsert(team['team_id'], text, vector)
+            self._teams_version += 1
+        return store
+
+    def _case_row(self, case: Dict) -> Callable[[], None]:
+        case_roles = case['required_roles'].split(", ")
+        text, vector = build_case_text(case), roles_to_skills_vector(case_roles, role_to_skills_mapping, all_skills)
+
+        def store():
+            self.cases[case['id']] = case
+            self.case_index.upsert(case['id'], text, vector)
+        return store
+
+    def _upsert_team(self, team: Dict) -> None:
+        self._team_row(team)()
+
+    def _upsert_case(self, case: Dict) -> None:
+        self._case_row(case)()
+        self._ingested_case_ids.discard(case['id'])
+
+    def _delete_team(self, data: Dict) -> bool:
+        if self.teams.pop(data['team_id'], None) is None:
+            return False
+        self.team_index.remove(data['team_id'])
+        self._teams_version += 1
+        return True
+
+    def _delete_case(self, data: Dict) -> bool:
+        if self.cases.pop(data['id'], None) is None:
+            return False
+        self._ingested_case_ids.discard(data['id'])
+        self.case_index.remove(data['id'])
+        return True
+
+    def _apply_new_data(self, data: Dict) -> None:
+        if data['team_id'] in self.cases and data['team_id'] not in self._ingested_case_ids:
+            raise ValueError(f"Case {data['team_id']} was created through /cases and is not overwritten by /new_data")
+        stored = self.teams.get(data['team_id'])
+        skills = dict(stored['skills']) if stored is not None else {}
+        skills[data['user_fio']] = list(data['person_skills'])
+        store_team = self._team_row({
+            'team_id': data['team_id'],
+            'name': data['team_title'],
+            'skills': skills,
+            'required_roles': list(data['case_required_roles']),
+        })
+        store_case = self._case_row({
+            'id': data['team_id'],
+            'title': data['case_title'],
+            'description': data['case_description'],
+            'required_roles': ", ".join(data['case_required_roles']),
+        })
+        store_team()
+        store_case()
+        self._ingested_case_ids.add(data['team_id'])
+
+    _operations = {
+        "upsert_team": _upsert_team,
+        "upsert_case": _upsert_case,
+        "delete_team": _delete_team,
+        "delete_case": _delete_case,
+        "new_data": _apply_new_data,
+    }
+
+    # Сначала изменения в памяти, затем журнал (одна запись на диск на пакет) только для применившихся:
+    # упавшая запись не попадает в журнал и не ломает его воспроизведение при запуске
+    def _commit(self, records: List[Tuple[str, Dict]]) -> List:
+        results, applied, failures = [], [], []
+        with self._lock:
+            for position, (op, data) in enumerate(records):
+                try:
+                    results.append(self._operations[op](self, data))
+                except Exception as e:
+                    results.append(None)
+                    failures.append((position, e))
+                else:
+                    applied.append((op, data))
+            if self.journal is not None and applied:
+                self.journal.append(applied)
+                if self.journal.needs_snapshot:
+                    self.journal.write_snapshot(list(self.teams.values()), list(self.cases.values()),
+                                                sorted(self._ingested_case_ids))
+        if applied:
+            self._notify()
+        if failures:
+            raise CommitError(failures)
+        return results
+
+    def open_journal(self, journal: CatalogueJournal) -> int:
+        """
+        Restore the catalogue from a journal and log all further changes to it.
+
+        The snapshot is loaded first, then the changes logged after it are replayed. A logged
+        change that fails to apply is skipped with a warning instead of aborting the start.
+
+        Args:
+        journal (CatalogueJournal): Journal to restore from and write to.
+
+        Returns:
+        int: Number of replayed log records, not counting the skipped ones.
+        """
+        logger = logging.getLogger(__name__)
+        with self._lock:
+            snapshot = journal.load_snapshot()
+            for team in snapshot['teams']:
+                self._upsert_team(team)
+            for case in snapshot['cases']:
+                self._upsert_case(case)
+            self._ingested_case_ids.update(snapshot['ingested_case_ids'])
+            replayed = skipped = 0
+            for number, (op, data) in enumerate(journal.read_log(), start=1):
+                try:
+                    self._operations[op](self, data)
+                    replayed += 1
+                except Exception:
+                    skipped += 1
+                    logger.warning("Skipping log record %d (%s) that failed to replay", number, op, exc_info=True)
+            if skipped:
+                logger.warning("Skipped %d of %d log records of %s", skipped, replayed + skipped, journal.wal_path)
+            self.journal = journal
+        self._notify()
+        return replayed
+
+    def upsert_team(self, team: Dict) -> None:
+        """
+        Insert or replace a team.
+
+        Args:
+        team (Dict): Team with 'team_id', 'name', 'skills' and optional 'required_roles'.
+        """
+        self._commit([("upsert_team", team)])
+
+    def upsert_case(self, case: Dict) -> None:
+        """
+        Insert or replace a case.
+
+        Args:
+        case (Dict): Case with 'id', 'title', 'description' and 'required_roles'.
+        """
+        self._commit([("upsert_case", case)])
+
+    def delete_team(self, team_id: int) -> bool:
+        """
+        Delete a team.
+
+        Args:
+        team_id (int): Identifier of the team.
+
+        Returns:
+        bool: True if the team existed.
+        """
+        with self._lock:
+            return team_id in self.teams and self._commit([("delete_team", {'team_id': team_id})])[0]
+
+    def delete_case(self, case_id: int) -> bool:
+        """
+        Delete a case.
+
+        Args:
+        case_id (int): Identifier of the case.
+
+        Returns:
+        bool: True if the case existed.
+        """
+        with self._lock:
+            return case_id in self.cases and self._commit([("delete_case", {'id': case_id})])[0]
+
+    def list_teams(self) -> List[Dict]:
+        """
+        Return a snapshot of all stored teams.
+
+        Returns:
+        List[Dict]: Stored teams.
+        """
+        with self._lock:
+            return list(self.teams.values())
+
+    def list_cases(self) -> List[Dict]:
+        """
+        Return a snapshot of all stored cases.
+
+        Returns:
+        List[Dict]: Stored cases.
+        """
+        with self._lock:
+            return list(self.cases.values())
+
+    def apply_new_data(self, data: Dict) -> None:
+        """
+        Apply a `/new_data` event: add the user to the team and store the team's case.
+
+        The user's skills are merged into the team under the user's name, the team takes the
+        case's required roles, and the case is stored under the team's id. A case with that id
+        created through `upsert_case` is not overwritten: the event is rejected instead.
+
+        Args:
+        data (Dict): Event with 'team_id', 'team_title', 'case_title', 'case_description',
+            'user_fio', 'person_skills' and 'case_required_roles'.
+
+        Raises:
+        CommitError: If the event could not be applied.
+        """
+        self.apply_new_data_batch([data])
+
+    def apply_new_data_batch(self, events: List[Dict]) -> None:
+        """
+        Apply many `/new_data` events in order, logging them with a single write to disk.
+
+        Args:
+        events (List[Dict]): Events in the format of `apply_new_data`.
+
+        Raises:
+        CommitError: If some events could not be applied; the others are applied and logged.
+        """
+        self._commit([("new_data", data) for data in events])
+
+    # Кодирование устаревших строк индекса: снимок под блокировкой, модель без нее, запись под блокировкой
+    def _refresh_index(self, index: VectorIndex, encoder_factory: Callable, rounds: int = 3) -> int:
+        encoded = 0
+        with self._lock:
+            if not index.stale:
+                return 0
+        with self._refresh_lock:
+            # Строки, измененные во время кодирования, кодируются в следующем раунде
+            for _ in range(rounds):
+                with self._lock:
+                    items = index.stale_items()
+                if not items:
+                    break
+                vectors = encoder_factory().encode([text for _, text in items])
+                with self._lock:
+                    index.store_embeddings(items, vectors)
+                encoded += len(items)
+        return encoded
+
+    def refresh_embeddings(self) -> int:
+        """
+        Encode the embeddings of all changed teams and cases ahead of the next query.
+
+        The model runs outside the catalogue lock, so queries and changes are not blocked while it works.
+
+        Returns:
+        int: Number of encoded entities.
+        """
+        return (self._refresh_index(self.team_index, self._team_encoder)
+                + self._refresh_index(self.case_index, self._encoder_factory))
+
+    def person_scorer(self, threshold: float = 0.5, unfilled_role_weight: float = 1.5) -> Tuple[List[Dict], PersonTeamScorer]:
+        """
+        Return the stored teams with a person scorer over them, rebuilt only after the teams change.
+
+        Args:
+        threshold (float, optional): Minimum share of a role's skills for the role to count as filled. Defaults to 0.5.
+        unfilled_role_weight (float, optional): Weight of scores computed against unfilled roles. Defaults to 1.5.
+
+        Returns:
+        Tuple[List[Dict], PersonTeamScorer]: Teams in scorer column order and the scorer.
+        """
+        with self._lock:
+            key = (self._teams_version, threshold, unfilled_role_weight)
+            cached = self._person_scorers.get(key)
+            if cached is None:
+                teams = list(self.teams.values())
+                cached = (teams, PersonTeamScorer(teams, threshold, unfilled_role_weight))
+                # Оценщики для прежнего состава команд больше не нужны
+                self._person_scorers = {k: v for k, v in self._person_scorers.items() if k[0] == key[0]}
+                self._person_scorers[key] = cached
+            return cached
+
+    def team_query(self, team: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the embedding and skill vector of a team, reusing stored vectors for known teams.
+
+        Args:
+        team (Dict): Team with 'team_id' and 'skills'.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: (embedding, skill vector) of the team.
+        """
+        with self._lock:
+            stored = self.teams.get(team['team_id'])
+            known = stored is not None and stored['skills'] == team['skills']
+        if known:
+            self._refresh_index(self.team_index, self._team_encoder)
+            with self._lock:
+                row = self.team_index.rows.get(team['team_id'])
+                if row is not None and row not in self.team_index.stale and \
+                        self.teams[team['team_id']]['skills'] == team['skills']:
+                    return self.team_index.embeddings[row].copy(), self.team_index.skills[row].copy()
+        embedding = encode_teams([team['skills']], self._encoder_factory(), mode=self.team_embedding)[0][0]
+        return embedding, team_to_skills_vector(team['skills'], all_skills)
+
+    def case_query(self, case: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the embedding and skill vector of a case, reusing stored vectors for known cases.
+
+        Args:
+        case (Dict): Case with 'id', 'title', 'description' and 'required_roles'.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: (embedding, skill vector) of the case.
+        """
+        with self._lock:
+            known = self.cases.get(case['id']) == case
+        if known:
+            self._refresh_index(self.case_index, self._encoder_factory)
+            with self._lock:
+                row = self.case_index.rows.get(case['id'])
+                if row is not None and row not in self.case_index.stale and self.cases[case['id']] == case:
+                    return self.case_index.embeddings[row].copy(), self.case_index.skills[row].copy()
+        embedding = self._encoder_factory().encode([build_case_text(case)])[0]
+        case_roles = case['required_roles'].split(", ")
+        return embedding, roles_to_skills_vector(case_roles, role_to_skills_mapping, all_skills)
+
+    def score_cases(self, team: Dict, alpha: float = 0.5, beta: float = 0.5,
+                    retrieve_k: int = None) -> Tuple[np.ndarray, ...]:
+        """
+        Score stored cases for a team.
+
+        Args:
+        team (Dict): Query team.
+        alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+        beta (float, optional): Weight for skill similarity. Defaults to 0.5.
+        retrieve_k (int, optional): Score only the cases nearest to the team in the embedding index. Defaults to all cases.
+
+        Returns:
+        Tuple: (case_ids, embedding_similarity, skills_similarity, hybrid_similarity) arrays and the
+        list of scored cases, taken under the same lock, so a case deleted meanwhile is still there.
+        """
+        embedding, skills = self.team_query(team)
+        self._refresh_index(self.case_index, self._encoder_factory)
+        with self._lock:
+            rows = self.case_index.nearest(embedding, retrieve_k) if retrieve_k and len(self.case_index) else None
+            scores = self.case_index.hybrid_scores(embedding, skills, alpha, beta, rows)
+            return (*scores, [self.cases[int(case_id)] for case_id in scores[0]])
+
+    def score_teams(self, case: Dict, alpha: float = 0.5, beta: float = 0.5,
+                    retrieve_k: int = None) -> Tuple[np.ndarray, ...]:
+        """
+        Score stored teams for a case.
+
+        Args:
+        case (Dict): Query case.
+        alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+        beta (float, optional): Weight for skill similarity. Defaults to 0.5.
+        retrieve_k (int, optional): Score only the teams nearest to the case in the embedding index. Defaults to all teams.
+
+        Returns:
+        Tuple: (team_ids, embedding_similarity, skills_similarity, hybrid_similarity) arrays and the
+        list of scored teams, taken under the same lock, so a team deleted meanwhile is still there.
+        """
+        embedding, skills = self.case_query(case)
+        self._refresh_index(self.team_index, self._team_encoder)
+        with self._lock:
+            rows = self.team_index.nearest(embedding, retrieve_k) if retrieve_k and len(self.team_index) else None
+            scores = self.team_index.hybrid_scores(embedding, skills, alpha, beta, rows)
+            return (*scores, [self.teams[int(team_id)] for team_id in scores[0]])
+
+    def case_vectors(self, case_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the stored embeddings and skill vectors of cases, e.g. returned by `score_cases`.
+        """
+        self._refresh_index(self.case_index, self._encoder_factory)
+        with self._lock:
+            return self.case_index.vectors(case_ids)
+
+    def team_vectors(self, team_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the stored embeddings and skill vectors of teams, e.g. returned by `score_teams`.
+        """
+        self._refresh_index(self.team_index, self._team_encoder)
+        with self._lock:
+            return self.team_index.vectors(team_ids)
+
+
+catalogue = Catalogue()
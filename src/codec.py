@@ -0,0 +1,87 @@
+import json
+from typing import Any
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+try:
+    import orjson  # необязательная зависимость
+except ImportError:
+    orjson = None
+
+
+# Значения NumPy, которые стандартный json не умеет кодировать
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Кодирование в JSON: orjson, если установлен, иначе стандартный json
+def dumps(value: Any, sort_keys: bool = False) -> bytes:
+    """
+    Encode a value as UTF-8 JSON, with NumPy arrays and scalars encoded directly.
+
+    Uses orjson when it is installed and the standard library otherwise. Both produce compact
+    JSON without ASCII escaping; key order and float formatting may differ between them.
+
+    Args:
+    value: JSON-compatible value; may contain NumPy arrays and scalars.
+    sort_keys (bool, optional): Order dictionary keys. Defaults to False.
+
+    Returns:
+    bytes: Encoded JSON.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(value, default=_default, option=option)
+    return json.dumps(value, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+# Разбор JSON тем же кодеком
+def loads(data: bytes) -> Any:
+    """
+    Decode JSON with orjson when it is installed.
+
+    Raises:
+    json.JSONDecodeError: If the data is not valid JSON (orjson's error is a subclass).
+    """
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# Ответ, кодируемый без промежуточных объектов стандартного json
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with `dumps`, so NumPy score arrays need no conversion to lists of floats.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Запрос, тело которого разбирается через `loads`
+class FastJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+# Маршрут FastAPI с быстрым разбором тела; проверка Pydantic и ответы 422 не меняются
+class FastJSONRoute(APIRoute):
+    """
+    Route whose request body is parsed with `loads` before the usual Pydantic validation.
+
+    Invalid JSON still ends as FastAPI's 422 "json_invalid" error, because orjson raises a
+    subclass of `json.JSONDecodeError`.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def fast_json_handler(request: Request):
+            return await handler(FastJSONRequest(request.scope, request.receive))
+
+        return fast_json_handler
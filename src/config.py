@@ -0,0 +1,96 @@
+import os
+from dataclasses import dataclass
+
+
+# Настройки сервиса, читаемые из переменных окружения
+@dataclass(frozen=True)
+class Settings:
+    """
+    Service settings read from environment variables.
+
+    Attributes:
+    embedding_model_path (str): Hugging Face model id or local path of the embedding model.
+    embedding_device (str): Device for the embedding model ("auto", "cpu", "cuda" or "mps").
+    embedding_backend (str): Inference backend of the embedding model: "torch" (fp32), "torch-int8"
+        (dynamic int8 quantization, CPU) or "onnx" (ONNX Runtime, CPU; the model path must point to an export).
+    embedding_mmap (bool): Whether the "torch" backend on CPU keeps the weights of a local safetensors snapshot
+        memory-mapped, so that worker processes share them instead of each holding a private copy.
+    warmup_on_startup (bool): Whether to load the embedding model when the application starts.
+    embedding_batch_size (int): Number of texts per forward pass of the embedding model.
+    embedding_max_length (int): Maximum number of tokens per text; longer texts are truncated.
+    embedding_cache_memory_mb (int): Size limit of the in-memory embedding cache tier in megabytes.
+    embedding_cache_path (str): SQLite file of the on-disk embedding cache tier; empty to disable it.
+    ann_backend (str): Nearest-neighbour backend for catalogue embeddings: "exact", "ivf" or "hnsw".
+    ann_n_probe (int): Number of clusters scanned per query by the "ivf" backend.
+    inference_workers (int): Number of threads running recommendation scoring and model inference; also the
+        number of requests whose texts a micro-batch can merge.
+    inference_queue_size (int): Number of requests allowed to wait for a free inference thread.
+    inference_timeout (float): Seconds a request waits for its result before failing with 503.
+    torch_threads (int): torch intra-op threads; 0 keeps the torch default.
+    embedding_batch_max_size (int): Number of texts after which a micro-batch of concurrent requests runs at once.
+    embedding_batch_max_wait_ms (float): Milliseconds a micro-batch waits for more requests; 0 disables micro-batching.
+    catalogue_dir (str): Directory of the catalogue write-ahead log and snapshot; empty to keep the catalogue in memory only.
+    catalogue_snapshot_every (int): Number of logged catalogue changes after which a snapshot is written.
+    ingest_batch_size (int): Maximum number of /new_data events applied together.
+    ingest_max_delay_ms (float): Milliseconds the first /new_data event of a batch waits for more.
+    ingest_queue_size (int): Number of /new_data events allowed to wait; further events get 429.
+    ingest_retries (int): Extra attempts for a /new_data batch that failed to apply.
+    ingest_dead_letter_size (int): Number of /new_data events that failed to apply kept for inspection.
+    response_cache_backend (str): Cache of recommendation responses: "memory", "redis" or "none".
+    response_cache_ttl (float): Lifetime of a cached response in seconds.
+    response_cache_memory_mb (int): Size limit of the in-process response cache in megabytes.
+    response_cache_redis_url (str): URL of the Redis-compatible server for the "redis" backend.
+    metrics_enabled (bool): Whether stage timings and request latencies are recorded for /metrics and Server-Timing.
+    admin_token (str): Token of the admin endpoints and of the X-Profile debug header; empty disables them.
+    profile_dir (str): Directory of the on-disk ring buffer of request profiles.
+    profile_keep (int): Number of request profiles kept; older ones are deleted.
+    diversity_pool_size (int): Number of best-scored candidates the DPP diversity re-ranking chooses from.
+    team_embedding (str): How team embeddings are computed: "text" (the model runs on the team text) or
+        "skills" (weighted mean of per-skill embeddings; the model runs only for unseen skills).
+    skill_embedding_weighting (str): Pooling weights of the "skills" mode: "count" (members having the skill) or "idf".
+    skill_embeddings_path (str): .npz file of the per-skill embedding table; empty to keep it in memory only.
+    skill_aliases_path (str): JSON file {"alias": "skill"} with aliases added to the built-in `skill_aliases`; empty for none.
+    gc_gen0_threshold (int): Allocations between collections of the youngest generation of the garbage collector;
+        a positive value also freezes the objects created at startup. 0 (the default) leaves the collector untouched.
+    """
+    embedding_model_path: str = os.getenv("DPP_EMBEDDING_MODEL_PATH", "intfloat/multilingual-e5-large")
+    embedding_device: str = os.getenv("DPP_EMBEDDING_DEVICE", "auto")
+    embedding_backend: str = os.getenv("DPP_EMBEDDING_BACKEND", "torch")
+    embedding_mmap: bool = os.getenv("DPP_EMBEDDING_MMAP", "1") == "1"
+    warmup_on_startup: bool = os.getenv("DPP_WARMUP_ON_STARTUP", "1") == "1"
+    embedding_batch_size: int = int(os.getenv("DPP_EMBEDDING_BATCH_SIZE", "32"))
+    embedding_max_length: int = int(os.getenv("DPP_EMBEDDING_MAX_LENGTH", "512"))
+    embedding_cache_memory_mb: int = int(os.getenv("DPP_EMBEDDING_CACHE_MEMORY_MB", "256"))
+    embedding_cache_path: str = os.getenv("DPP_EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+    ann_backend: str = os.getenv("DPP_ANN_BACKEND", "exact")
+    ann_n_probe: int = int(os.getenv("DPP_ANN_N_PROBE", "8"))
+    inference_workers: int = int(os.getenv("DPP_INFERENCE_WORKERS", "8"))
+    inference_queue_size: int = int(os.getenv("DPP_INFERENCE_QUEUE_SIZE", "32"))
+    inference_timeout: float = float(os.getenv("DPP_INFERENCE_TIMEOUT", "30"))
+    torch_threads: int = int(os.getenv("DPP_TORCH_THREADS", "0"))
+    embedding_batch_max_size: int = int(os.getenv("DPP_EMBEDDING_BATCH_MAX_SIZE", "64"))
+    embedding_batch_max_wait_ms: float = float(os.getenv("DPP_EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    catalogue_dir: str = os.getenv("DPP_CATALOGUE_DIR", ".cache/catalogue")
+    catalogue_snapshot_every: int = int(os.getenv("DPP_CATALOGUE_SNAPSHOT_EVERY", "1000"))
+    ingest_batch_size: int = int(os.getenv("DPP_INGEST_BATCH_SIZE", "256"))
+    ingest_max_delay_ms: float = float(os.getenv("DPP_INGEST_MAX_DELAY_MS", "20"))
+    ingest_queue_size: int = int(os.getenv("DPP_INGEST_QUEUE_SIZE", "10000"))
+    ingest_retries: int = int(os.getenv("DPP_INGEST_RETRIES", "3"))
+    ingest_dead_letter_size: int = int(os.getenv("DPP_INGEST_DEAD_LETTER_SIZE", "1000"))
+    response_cache_backend: str = os.getenv("DPP_RESPONSE_CACHE_BACKEND", "memory")
+    response_cache_ttl: float = float(os.getenv("DPP_RESPONSE_CACHE_TTL", "300"))
+    response_cache_memory_mb: int = int(os.getenv("DPP_RESPONSE_CACHE_MEMORY_MB", "64"))
+    response_cache_redis_url: str = os.getenv("DPP_RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    metrics_enabled: bool = os.getenv("DPP_METRICS_ENABLED", "1") == "1"
+    admin_token: str = os.getenv("DPP_ADMIN_TOKEN", "")
+    profile_dir: str = os.getenv("DPP_PROFILE_DIR", ".cache/profiles")
+    profile_keep: int = int(os.getenv("DPP_PROFILE_KEEP", "20"))
+    diversity_pool_size: int = int(os.getenv("DPP_DIVERSITY_POOL_SIZE", "500"))
+    team_embedding: str = os.getenv("DPP_TEAM_EMBEDDING", "text")
+    skill_embedding_weighting: str = os.getenv("DPP_SKILL_EMBEDDING_WEIGHTING", "count")
+    skill_embeddings_path: str = os.getenv("DPP_SKILL_EMBEDDINGS_PATH", ".cache/skill_embeddings.npz")
+    skill_aliases_path: str = os.getenv("DPP_SKILL_ALIASES_PATH", "")
+    gc_gen0_threshold: int = int(os.getenv("DPP_GC_GEN0_THRESHOLD", "0"))
+
+
+settings = Settings()
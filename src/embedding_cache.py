@@ -0,0 +1,209 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+# Нормализация текста перед вычислением ключа кэша
+def normalize_text(text: str) -> str:
+    """
+    Normalize a text so that trivially different spellings share one cache entry.
+
+    Args:
+    text (str): Input text.
+
+    Returns:
+    str: NFC-normalized text with runs of whitespace collapsed to single spaces.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+# Ключ кэша: хэш идентификатора модели и нормализованного текста
+def cache_key(model_id: str, text: str) -> str:
+    """
+    Compute the content-addressed cache key of a text for a model.
+
+    Args:
+    model_id (str): Identifier of the embedding model.
+    text (str): Input text.
+
+    Returns:
+    str: Hex SHA-256 digest of the model id and the normalized text.
+    """
+    return hashlib.sha256(f"{model_id}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+# Двухуровневый кэш эмбеддингов: LRU в памяти и SQLite на диске
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-memory LRU bounded by bytes and an optional SQLite file.
+
+    Vectors found on disk are promoted to the memory tier. All methods are thread-safe.
+
+    Attributes:
+    max_memory_bytes (int): Upper bound on the size of vectors kept in memory.
+    disk_path (str): Path of the SQLite file, or None to keep the cache in memory only.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_path: str = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_path = disk_path
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        # Добавляем вектор в LRU и вытесняем самые старые записи при превышении лимита
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        if vector.nbytes > self.max_memory_bytes:
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up several keys at once.
+
+        Args:
+        keys (List[str]): Cache keys to look up.
+
+        Returns:
+        Dict[str, np.ndarray]: Found vectors by key; missing keys are absent.
+        """
+        found = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            if pending and self._db is not None:
+                # SQLite ограничивает число параметров в запросе, поэтому читаем порциями
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+
+            self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """
+        Store several vectors at once in both tiers.
+
+        Args:
+        vectors (Dict[str, np.ndarray]): Vectors to store by key.
+        """
+        with self._lock:
+            rows = []
+            for key, vector in vectors.items():
+                vector = np.ascontiguousarray(vector, dtype=np.float32).reshape(-1)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            if rows and self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters and the current size of the memory tier.
+
+        Returns:
+        Dict[str, int]: Counters for memory hits, disk hits, misses, entries and bytes in memory.
+        """
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+# Кодировщик, который обращается к модели только для текстов, отсутствующих в кэше
+class CachedEncoder:
+    """
+    Text encoder that serves embeddings from an `EmbeddingCache` and encodes only the misses.
+
+    The underlying encoder is created lazily by `encoder_factory`, so requests fully served
+    from the cache, and empty requests, never load or run the transformer.
+
+    Attributes:
+    model_id (str): Identifier of the embedding model, part of every cache key.
+    cache (EmbeddingCache): Cache used for lookups and stores.
+    dim (Callable[[], int]): Returns the embedding dimension for empty results before any vector has been seen.
+    """
+
+    def __init__(self, model_id: str, cache: EmbeddingCache, encoder_factory: Callable,
+                 dim: Callable[[], int] = None):
+        self.model_id = model_id
+        self.cache = cache
+        self._encoder_factory = encoder_factory
+        self.dim = dim
+        self._dim = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of texts, running the model only for texts not found in the cache.
+
+        Args:
+        texts (List[str]): Texts to embed.
+
+        Returns:
+        numpy.ndarray: Array of shape (len(texts), dim) with one embedding per text.
+        """
+        if not texts:
+            if self._dim is None and self.dim is not None:
+                self._dim = self.dim()
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+        keys = [cache_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Повторяющиеся тексты кодируем один раз
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = normalize_text(text)
+
+        if missing:
+            encoded = self._encoder_factory().encode(list(missing.values()))
+            computed = dict(zip(missing.keys(), encoded))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        embeddings = np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
+        self._dim = embeddings.shape[1]
+        return embeddings
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+from src.batching import MicroBatcher
+from src.config import settings
+from src.embedding_cache import EmbeddingCache, CachedEncoder
+from src.metrics import metrics
+
+# torch и transformers импортируются при первой загрузке модели: пути без эмбеддингов их не ждут
+if TYPE_CHECKING:
+    import torch
+
+
+# Выбор устройства для модели эмбеддингов
+def resolve_device(device: str = "auto") -> torch.device:
+    """
+    Resolve the device on which the embedding model should run.
+
+    Args:
+    device (str, optional): "auto" to pick MPS when available and CPU otherwise, or an explicit torch device name. Defaults to "auto".
+
+    Returns:
+    torch.device: The device to place the model on.
+    """
+    import torch
+
+    if device == "auto":
+        return torch.device("mps" if torch.backends.mps.is_available() else "cpu")
+    return torch.device(device)
+
+
+# Усреднение скрытых состояний только по реальным токенам (без паддинга)
+def masked_mean_pool(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """
+    Average token embeddings over the non-padding positions of each sequence.
+
+    Args:
+    last_hidden_state (torch.Tensor): Hidden states of shape (batch, tokens, dim).
+    attention_mask (torch.Tensor): Attention mask of shape (batch, tokens) with 1 for real tokens.
+
+    Returns:
+    torch.Tensor: Pooled embeddings of shape (batch, dim).
+    """
+    mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(dim=1)
+    counts = mask.sum(dim=1).clamp(min=1.0)
+    return summed / counts
+
+# Пакетное получение эмбеддингов для списка текстов
+def encode_texts(texts: List[str], model, tokenizer, device, batch_size: int = settings.embedding_batch_size,
+                 max_length: int = settings.embedding_max_length) -> np.ndarray:
+    """
+    Embed a list of texts in padded micro-batches.
+
+    Texts are tokenized once, sorted by token length so that each micro-batch is padded as
+    little as possible, and pooled with an attention-mask-aware mean. The output rows are
+    returned in the order of the input texts.
+
+    Args:
+    texts (List[str]): Texts to embed.
+    model: The transformer model used for embedding.
+    tokenizer: The tokenizer associated with the model.
+    device: The device (CPU/GPU) where the model runs.
+    batch_size (int, optional): Maximum number of texts per forward pass. Defaults to the configured batch size.
+    max_length (int, optional): Maximum number of tokens per text. Defaults to the configured maximum length.
+
+    Returns:
+    numpy.ndarray: Array of shape (len(texts), dim) with one float32 embedding per text.
+    """
+    import torch
+
+    if not texts:
+        return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+
+    # Токенизируем один раз и сортируем по длине, чтобы минимизировать паддинг
+    with metrics.span("tokenize"):
+        encoded = tokenizer(list(texts), truncation=True, max_length=max_length)
+    input_ids = encoded["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+
+    embeddings = np.empty((len(texts), model.config.hidden_size), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        with metrics.span("tokenize"):
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in batch_idx]
+            inputs = tokenizer.pad(features, padding=True, return_tensors="pt")
+            inputs = {key: value.to(device) for key, value in inputs.items()}
+
+        metrics.observe(metrics.batch_size, len(batch_idx))
+        with metrics.span("forward"), torch.no_grad():
+            outputs = model(**inputs)
+
+        with metrics.span("pooling"):
+            pooled = masked_mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+            embeddings[batch_idx] = pooled.float().cpu().numpy()
+
+    return embeddings
+
+
+# Модель ONNX Runtime с тем же интерфейсом, что и модель transformers
+class OnnxEncoderModel:
+    """
+    Wrapper around an ONNX Runtime session exported by `python -m src.export_encoder`.
+
+    Exposes the small part of the transformers model interface that `encode_texts` uses:
+    `config.hidden_size` and a call with tokenizer tensors returning `last_hidden_state`.
+    Requires the optional `onnxruntime` package.
+
+    Attributes:
+    model_dir (str): Directory of the export.
+    config: Model configuration saved next to the export.
+    session: The ONNX Runtime inference session.
+    """
+
+    def __init__(self, model_dir: str, intra_op_threads: int = settings.torch_threads):
+        import onnxruntime  # необязательная зависимость
+        from transformers import AutoConfig
+
+        self.model_dir = model_dir
+        options = onnxruntime.SessionOptions()
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, **inputs) -> SimpleNamespace:
+        import torch
+
+        feeds = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        (last_hidden_state,) = self.session.run(["last_hidden_state"], feeds)
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(last_hidden_state))
+
+    def eval(self) -> "OnnxEncoderModel":
+        return self
+
+
+# Загрузка модели эмбеддингов для выбранного бэкенда
+def load_embedding_model(model_path: str, backend: str = settings.embedding_backend,
+                         device: str = settings.embedding_device) -> Tuple:
+    """
+    Load the embedding model, tokenizer and device for an inference backend.
+
+    A local directory, e.g. a snapshot written by `python -m src.model_snapshot`, is loaded
+    without any requests to the Hugging Face Hub. With the "torch" backend on CPU, the weights of
+    a snapshot's model.safetensors stay memory-mapped (unless DPP_EMBEDDING_MMAP=0), so all
+    worker processes on the node share one copy of them.
+
+    Args:
+    model_path (str): Model id or local path; for "onnx", the directory of an ONNX export.
+    backend (str, optional): "torch" for fp32 PyTorch, "torch-int8" for PyTorch with dynamic int8
+        quantization of the linear layers, or "onnx" for ONNX Runtime. Defaults to the configured backend.
+    device (str, optional): Device for the "torch" backend; the other backends always run on CPU.
+
+    Returns:
+    Tuple: (model, tokenizer, device) ready for `encode_texts`.
+
+    Raises:
+    ValueError: If the backend is unknown.
+    ImportError: If "onnx" is requested and `onnxruntime` is not installed.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    local_files_only = os.path.isdir(model_path)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=local_files_only)
+    if backend == "torch":
+        device = resolve_device(device)
+        model = None
+        if (settings.embedding_mmap and device.type == "cpu"
+                and os.path.exists(os.path.join(model_path, "model.safetensors"))):
+            from src.model_snapshot import load_mmap_model
+
+            try:
+                model = load_mmap_model(model_path)
+            except ValueError:
+                logging.getLogger(__name__).warning("Cannot memory-map %s, loading a private copy", model_path,
+                                                    exc_info=True)
+        if model is None:
+            model = AutoModel.from_pretrained(model_path, local_files_only=local_files_only).to(device)
+    elif backend == "torch-int8":
+        device = torch.device("cpu")
+        model = torch.ao.quantization.quantize_dynamic(
+            AutoModel.from_pretrained(model_path, local_files_only=local_files_only), {torch.nn.Linear},
+            dtype=torch.qint8
+        )
+    elif backend == "onnx":
+        device = torch.device("cpu")
+        model = OnnxEncoderModel(model_path)
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    model.eval()
+    return model, tokenizer, device
+
+
+# Кодировщик текстов поверх загруженной модели
+class TextEncoder:
+    """
+    Batched text encoder bound to a loaded model, tokenizer and device.
+
+    Attributes:
+    model: The transformer model used for embedding.
+    tokenizer: The tokenizer associated with the model.
+    device: The device (CPU/GPU) where the model runs.
+    batch_size (int): Maximum number of texts per forward pass.
+    """
+
+    def __init__(self, model, tokenizer, device, batch_size: int = settings.embedding_batch_size):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.batch_size = batch_size
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of texts.
+
+        Args:
+        texts (List[str]): Texts to embed.
+
+        Returns:
+        numpy.ndarray: Array of shape (len(texts), dim) with one embedding per text.
+        """
+        return encode_texts(texts, self.model, self.tokenizer, self.device, self.batch_size)
+
+
+# Реестр моделей эмбеддингов, общий для всего процесса
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of loaded embedding models.
+
+    Models are loaded once per process and shared read-only between requests. The registry
+    is safe to use from several threads: concurrent callers of `get` for a model that is not
+    loaded yet wait for a single load instead of loading their own copy. With a positive
+    `batch_max_wait_ms`, texts of concurrent requests are merged into shared forward passes
+    by one `MicroBatcher` per model.
+    """
+
+    def __init__(self, model_path: str = settings.embedding_model_path, device: str = settings.embedding_device,
+                 cache: EmbeddingCache = None, batch_max_size: int = settings.embedding_batch_max_size,
+                 batch_max_wait_ms: float = settings.embedding_batch_max_wait_ms,
+                 backend: str = settings.embedding_backend):
+        self.default_model_path = model_path
+        self.device = device
+        self.backend = backend
+        self.cache = cache
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self._models: Dict[str, Tuple] = {}
+        self._dims: Dict[str, int] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._encoders: Dict[str, CachedEncoder] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def get(self, model_path: str = None) -> Tuple:
+        """
+        Return the model, tokenizer and device for a model path, loading them on first use.
+
+        Args:
+        model_path (str, optional): Model id or local path. Defaults to the registry's default model.
+
+        Returns:
+        Tuple: (model, tokenizer, device) ready for inference.
+        """
+        model_path = model_path or self.default_model_path
+        entry = self._models.get(model_path)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            # Другой поток мог загрузить модель, пока мы ждали блокировку
+            entry = self._models.get(model_path)
+            if entry is None:
+                with metrics.span("model_load"):
+                    entry = load_embedding_model(model_path, self.backend, self.device)
+                self._models[model_path] = entry
+            if model_path == self.default_model_path:
+                self._ready.set()
+        return entry
+
+    def get_encoder(self, model_path: str = None):
+        """
+        Return a batched text encoder for a model path.
+
+        When the registry has an embedding cache, the encoder serves cached vectors and loads
+        the model only when some text is not in the cache. It is created once per model, so the
+        embedding dimension it remembers is looked up once.
+
+        Args:
+        model_path (str, optional): Model id or local path. Defaults to the registry's default model.
+
+        Returns:
+        TextEncoder, MicroBatcher or CachedEncoder: Encoder sharing the registry's model, tokenizer and device.
+        """
+        model_path = model_path or self.default_model_path
+        if self.cache is None:
+            return self._model_encoder(model_path)
+        encoder = self._encoders.get(model_path)
+        if encoder is None:
+            with self._lock:
+                encoder = self._encoders.setdefault(model_path, CachedEncoder(
+                    self.model_id(model_path), self.cache, lambda: self._model_encoder(model_path),
+                    lambda: self.embedding_dim(model_path),
+                ))
+        return encoder
+
+    def embedding_dim(self, model_path: str = None) -> int:
+        """
+        Return the embedding dimension of a model without loading its weights.
+
+        Args:
+        model_path (str, optional): Model id or local path. Defaults to the registry's default model.
+
+        Returns:
+        int: Hidden size of the model, read from the loaded model or from its configuration.
+        """
+        model_path = model_path or self.default_model_path
+        if model_path in self._models:
+            return self._models[model_path][0].config.hidden_size
+        if model_path not in self._dims:
+            from transformers import AutoConfig
+
+            config = AutoConfig.from_pretrained(model_path, local_files_only=os.path.isdir(model_path))
+            self._dims[model_path] = config.hidden_size
+        return self._dims[model_path]
+
+    def model_id(self, model_path: str = None) -> str:
+        """
+        Return the identifier of a model's embeddings, used as part of the embedding cache keys.
+
+        Quantized backends produce slightly different vectors, so their embeddings are cached
+        separately from the fp32 ones.
+
+        Args:
+        model_path (str, optional): Model id or local path. Defaults to the registry's default model.
+
+        Returns:
+        str: The model path, suffixed with the backend for backends other than "torch".
+        """
+        model_path = model_path or self.default_model_path
+        return model_path if self.backend == "torch" else f"{model_path}#{self.backend}"
+
+    def _model_encoder(self, model_path: str):
+        # Без микробатчинга каждый запрос запускает модель сам
+        if self.batch_max_wait_ms <= 0:
+            return TextEncoder(*self.get(model_path))
+        batcher = self._batchers.get(model_path)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.setdefault(model_path, MicroBatcher(
+                    lambda texts: TextEncoder(*self.get(model_path)).encode(texts),
+                    self.batch_max_size, self.batch_max_wait_ms, lambda: self.embedding_dim(model_path),
+                ))
+        return batcher
+
+    def batching_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return micro-batching counters for every model that has served requests.
+
+        Returns:
+        Dict[str, Dict[str, float]]: `MicroBatcher.stats()` per model path.
+        """
+        return {model_path: batcher.stats() for model_path, batcher in list(self._batchers.items())}
+
+    def warm_up(self) -> None:
+        """
+        Load the default model so that the first request does not pay the loading cost.
+        """
+        self.get()
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        bool: True once the default model has been loaded.
+        """
+        return self._ready.is_set()
+
+
+embedding_cache = EmbeddingCache(
+    max_memory_bytes=settings.embedding_cache_memory_mb * 1024 * 1024,
+    disk_path=settings.embedding_cache_path or None,
+)
+model_registry = EmbeddingModelRegistry(cache=embedding_cache)
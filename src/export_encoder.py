@@ -0,0 +1,182 @@
+"""
+Export the embedding model to ONNX and validate the CPU backends against the fp32 reference.
+
+Every requested backend embeds the case texts of a CSV file (by default data/cases_with_roles.csv)
+and is compared with fp32 PyTorch: cosine agreement per text, latency per text and model weight size.
+The command exits with status 1 if some backend's minimum cosine is below --min-cosine.
+
+Usage:
+    python -m src.export_encoder --onnx-dir models/e5-onnx --backends torch-int8 onnx --output backends.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+from transformers import AutoConfig, AutoModel, AutoTokenizer
+
+from src.config import settings
+from src.embeddings import OnnxEncoderModel, encode_texts, load_embedding_model
+from src.utils import build_case_text
+
+
+# Обертка, возвращающая из модели только тензор скрытых состояний
+class _LastHiddenState(torch.nn.Module):
+    def __init__(self, model, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+
+# Экспорт модели эмбеддингов в ONNX
+def export_onnx(model_path: str, output_dir: str, opset: int = 17) -> str:
+    """
+    Export an embedding model to ONNX together with its tokenizer and config.
+
+    Batch and sequence dimensions are dynamic, so the export serves any batch of padded texts.
+
+    Args:
+    model_path (str): Model id or local path of the PyTorch model.
+    output_dir (str): Directory for model.onnx, the tokenizer and the config.
+    opset (int, optional): ONNX opset version. Defaults to 17.
+
+    Returns:
+    str: Path of the exported model.onnx.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).eval()
+
+    sample = tokenizer(["query: пример текста", "passage: ещё один пример"], padding=True, return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "tokens"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    onnx_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(model, input_names), tuple(sample[name] for name in input_names), onnx_path,
+            input_names=input_names, output_names=["last_hidden_state"], dynamic_axes=dynamic_axes,
+            opset_version=opset, dynamo=False,
+        )
+    tokenizer.save_pretrained(output_dir)
+    AutoConfig.from_pretrained(model_path).save_pretrained(output_dir)
+    return onnx_path
+
+
+# Объем весов модели в байтах
+def model_size_bytes(model) -> int:
+    """
+    Return the size of a model's weights: tensor bytes for PyTorch, file size for ONNX.
+
+    Args:
+    model: A model returned by `load_embedding_model`.
+
+    Returns:
+    int: Size in bytes.
+    """
+    if isinstance(model, OnnxEncoderModel):
+        model_dir = model.model_dir
+        return sum(os.path.getsize(os.path.join(model_dir, name)) for name in os.listdir(model_dir)
+                   if name.endswith((".onnx", ".onnx_data", ".data")))
+
+    def tensors(value):
+        if isinstance(value, torch.Tensor):
+            yield value
+        elif isinstance(value, (tuple, list)):
+            for item in value:
+                yield from tensors(item)
+
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in tensors(value):
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+# Прогон бэкенда на текстах: эмбеддинги, задержка, объем весов
+def run_backend(model_path: str, backend: str, texts: List[str], batch_size: int) -> Dict:
+    model, tokenizer, device = load_embedding_model(model_path, backend, "cpu")
+    encode_texts(texts[:batch_size], model, tokenizer, device, batch_size)  # прогрев
+    start = time.perf_counter()
+    embeddings = encode_texts(texts, model, tokenizer, device, batch_size)
+    seconds = time.perf_counter() - start
+    return {
+        "embeddings": embeddings,
+        "ms_per_text": 1000 * seconds / len(texts),
+        "weights_mb": model_size_bytes(model) / 2 ** 20,
+    }
+
+
+# Косинусное сходство соответствующих строк двух матриц
+def rowwise_cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Compute the cosine similarity between corresponding rows of two matrices.
+
+    Args:
+    a (np.ndarray): Matrix of shape (n, dim).
+    b (np.ndarray): Matrix of shape (n, dim).
+
+    Returns:
+    np.ndarray: n similarity scores.
+    """
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.divide((a * b).sum(axis=1), norms, out=np.zeros(len(a), dtype=np.float32), where=norms > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_path, help="PyTorch model id or path")
+    parser.add_argument("--onnx-dir", help="Export the model to ONNX into this directory before validating")
+    parser.add_argument("--backends", nargs="+", default=["torch-int8", "onnx"],
+                        help="Backends to validate: torch-int8 and/or onnx")
+    parser.add_argument("--texts", default="data/cases_with_roles.csv", help="CSV with cases (sep=';')")
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Minimum allowed cosine to fp32")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.onnx_dir:
+        print(f"Exported {export_onnx(args.model, args.onnx_dir)}")
+
+    cases = pd.read_csv(args.texts, sep=";", encoding="utf-8-sig").fillna("")
+    texts = [build_case_text(case) for _, case in cases.iterrows()]
+
+    reference = run_backend(args.model, "torch", texts, args.batch_size)
+    results = [{"backend": "torch", "ms_per_text": round(reference["ms_per_text"], 3),
+                "weights_mb": round(reference["weights_mb"], 1)}]
+    failed = False
+    for backend in args.backends:
+        if backend == "onnx" and not args.onnx_dir:
+            print("Skipping onnx: pass --onnx-dir to export the model first", file=sys.stderr)
+            continue
+        path = args.onnx_dir if backend == "onnx" else args.model
+        candidate = run_backend(path, backend, texts, args.batch_size)
+        cosine = rowwise_cosine(reference["embeddings"], candidate["embeddings"])
+        failed |= bool(cosine.min() < args.min_cosine)
+        results.append({
+            "backend": backend,
+            "ms_per_text": round(candidate["ms_per_text"], 3),
+            "weights_mb": round(candidate["weights_mb"], 1),
+            "cosine_min": round(float(cosine.min()), 5),
+            "cosine_mean": round(float(cosine.mean()), 5),
+        })
+
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "n_texts": len(texts), "results": results}, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from src.catalogue import Catalogue, CommitError, catalogue
+from src.config import settings
+
+
+# Очередь приема /new_data: события применяются к каталогу пакетами в фоновом потоке
+class IngestQueue:
+    """
+    Asynchronous, batched ingestion of `/new_data` events into the catalogue.
+
+    `submit` only enqueues an event and returns. A background thread takes the first pending
+    event, collects more for up to `max_delay_ms` milliseconds or `batch_size` events, applies
+    the batch with one journal write, and then encodes the changed teams and cases outside the
+    catalogue lock. A burst of updates therefore costs one disk sync and one model pass per
+    batch instead of per event, and recommendation requests keep being served meanwhile.
+
+    Events the catalogue rejects (`CommitError`) are kept as dead letters (the newest
+    `dead_letter_size` of them) instead of being dropped, while the rest of their batch is
+    applied and logged once. A batch that fails for another reason, e.g. the journal is
+    unavailable, is retried up to `retries` times with a growing pause; if it still fails, its
+    events are applied one by one and those that fail alone become dead letters too.
+
+    Attributes:
+    batch_size (int): Maximum number of events applied together.
+    max_delay_ms (float): Longest time the first event of a batch waits for more.
+    retries (int): Extra attempts for a failed batch.
+    retry_delay_ms (float): Pause before the first retry; doubled before each next one.
+    """
+
+    def __init__(self, target: Catalogue = catalogue, batch_size: int = settings.ingest_batch_size,
+                 max_delay_ms: float = settings.ingest_max_delay_ms, max_queue: int = settings.ingest_queue_size,
+                 retries: int = settings.ingest_retries, retry_delay_ms: float = 100,
+                 dead_letter_size: int = settings.ingest_dead_letter_size):
+        self.target = target
+        self.batch_size = batch_size
+        self.max_delay_ms = max_delay_ms
+        self.retries = retries
+        self.retry_delay_ms = retry_delay_ms
+        self._dead_letters: deque = deque(maxlen=dead_letter_size)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.events = 0
+        self.errors = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="ingest", daemon=True)
+                self._thread.start()
+
+    def submit(self, event: Dict) -> None:
+        """
+        Enqueue a `/new_data` event.
+
+        Args:
+        event (Dict): Event in the format of `Catalogue.apply_new_data`.
+
+        Raises:
+        queue.Full: If the queue already holds `max_queue` unapplied events.
+        """
+        self._ensure_thread()
+        self._queue.put_nowait(event)
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay_ms / 1000
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dead_letter(self, event: Dict, error: Exception) -> None:
+        self.dead_lettered += 1
+        self._dead_letters.append({"event": event, "error": repr(error), "time": time.time()})
+        logging.getLogger(__name__).error("Moved a /new_data event to dead letters", exc_info=error)
+
+    # Применение пакета. Отклоненные каталогом события сразу уходят в dead letters: остальные уже применены
+    # и записаны, повтор записал бы их еще раз. Прочие сбои повторяются, затем события применяются по одному
+    def _apply(self, batch: list) -> None:
+        logger = logging.getLogger(__name__)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                time.sleep(self.retry_delay_ms / 1000 * 2 ** (attempt - 1))
+            try:
+                self.target.apply_new_data_batch(batch)
+            except CommitError as e:
+                self.errors += 1
+                self.batches += 1
+                self.events += len(batch) - len(e.failures)
+                for position, error in e.failures:
+                    self._dead_letter(batch[position], error)
+                return
+            except Exception:
+                self.errors += 1
+                logger.exception("Failed to ingest a batch of %d events (attempt %d)", len(batch), attempt + 1)
+            else:
+                self.batches += 1
+                self.events += len(batch)
+                return
+        for event in batch:
+            try:
+                self.target.apply_new_data(event)
+                self.events += 1
+            except CommitError as e:
+                self._dead_letter(event, e.failures[0][1])
+            except Exception as e:
+                self._dead_letter(event, e)
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._apply(batch)
+                self.target.refresh_embeddings()
+            except Exception:
+                # Устаревшие эмбеддинги пересчитаются при следующем запросе
+                self.errors += 1
+                logging.getLogger(__name__).exception("Failed to encode a batch of %d events", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """
+        Wait until every submitted event has been applied.
+        """
+        self._queue.join()
+
+    def dead_letters(self) -> List[Dict]:
+        """
+        Return the events that could not be applied, oldest first.
+
+        Returns:
+        List[Dict]: Records with the "event", the "error" it raised and the Unix "time" it was given up.
+        """
+        return list(self._dead_letters)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return ingestion counters.
+
+        Returns:
+        Dict[str, int]: Queued events, applied batches and events, failed attempts, retries,
+        events moved to dead letters in total and dead letters currently kept.
+        """
+        return {"queued": self._queue.qsize(), "batches": self.batches, "events": self.events, "errors": self.errors,
+                "retried": self.retried, "dead_lettered": self.dead_lettered, "dead_letters": len(self._dead_letters)}
+
+
+ingest_queue = IngestQueue()
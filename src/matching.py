@@ -0,0 +1,152 @@
+import copy
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from src import all_skills, role_to_skills_mapping
+from src.catalogue import normalize_rows
+from src.embeddings import model_registry
+from src.skills import get_vocabulary
+from src.utils import build_case_text, calculate_hybrid_similarity, encode_teams, get_team_skills, roles_to_skills
+
+
+# Матрица сходства «кейсы × команды» для пакетного ночного подбора
+class MatchMatrix:
+    """
+    Hybrid similarity between M cases and N teams, computed in row blocks.
+
+    Every case and team is embedded exactly once, in one batched encoder call (see `encode_teams`).
+    The M x N similarity is then computed block by block of cases: for each block the embedding cosine is
+    one matrix product of normalized embeddings and the skill cosine is one sparse product of
+    binary skill matrices, so peak memory is O(block_size * N) rather than O(M * N).
+
+    Attributes:
+    cases (List[Dict]): Cases with 'id', 'title', 'description' and 'required_roles'.
+    teams (List[Dict]): Teams with 'team_id', 'name' and 'skills'.
+    case_embeddings (np.ndarray): Normalized case embeddings of shape (M, dim).
+    team_embeddings (np.ndarray): Normalized team embeddings of shape (N, dim).
+    """
+
+    def __init__(self, cases: List[Dict], teams: List[Dict], encoder=None,
+                 role_to_skills_mapping: Dict = role_to_skills_mapping, all_skills: list = all_skills):
+        self.teams = teams
+        self.role_to_skills_mapping = role_to_skills_mapping
+        self.vocabulary = get_vocabulary(all_skills)
+        self.encoder = encoder or model_registry.get_encoder()
+        team_embeddings, case_embeddings = encode_teams([team['skills'] for team in teams], self.encoder,
+                                                        [build_case_text(case) for case in cases])
+        self.team_embeddings = normalize_rows(team_embeddings)
+        team_skills = self.vocabulary.encode_many(get_team_skills(team['skills']) for team in teams)
+        self.team_skills_t = team_skills.T.tocsr()
+        # Векторы навыков бинарные, поэтому норма строки — корень из числа навыков
+        self.team_skill_norms = np.sqrt(np.diff(team_skills.indptr)).astype(np.float32)
+        self._set_cases(cases, case_embeddings)
+
+    def _set_cases(self, cases: List[Dict], embeddings: np.ndarray) -> None:
+        self.cases = cases
+        self.case_embeddings = normalize_rows(embeddings)
+        self.case_skills = self.vocabulary.encode_many(
+            roles_to_skills(case['required_roles'].split(", "), self.role_to_skills_mapping) for case in cases
+        )
+        self.case_skill_norms = np.sqrt(np.diff(self.case_skills.indptr)).astype(np.float32)
+
+    def with_cases(self, cases: List[Dict]) -> "MatchMatrix":
+        """
+        Return a matrix of other cases against the same teams, embedding only the new cases.
+
+        Args:
+        cases (List[Dict]): Cases with 'id', 'title', 'description' and 'required_roles'.
+
+        Returns:
+        MatchMatrix: A matrix sharing this matrix's team embeddings and skill vectors.
+        """
+        matrix = copy.copy(self)
+        matrix._set_cases(cases, self.encoder.encode([build_case_text(case) for case in cases]))
+        return matrix
+
+    def blocks(self, alpha: float = 0.5, beta: float = 0.5, block_size: int = 256) -> Iterator:
+        """
+        Yield the similarity matrix block by block of cases.
+
+        Args:
+        alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+        beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+        block_size (int, optional): Number of cases per block. Defaults to 256.
+
+        Yields:
+        Tuple[int, np.ndarray, np.ndarray, np.ndarray]: Index of the first case of the block and the
+        embedding, skills and hybrid similarity matrices of shape (block, N).
+        """
+        for start in range(0, len(self.cases), block_size):
+            stop = min(start + block_size, len(self.cases))
+            embedding = self.case_embeddings[start:stop] @ self.team_embeddings.T
+            dot = np.asarray((self.case_skills[start:stop] @ self.team_skills_t).todense(), dtype=np.float32)
+            norms = np.outer(self.case_skill_norms[start:stop], self.team_skill_norms)
+            skills = np.divide(dot, norms, out=np.zeros_like(dot), where=norms > 0)
+            yield start, embedding, skills, calculate_hybrid_similarity(embedding, skills, alpha, beta)
+
+    def _team_entry(self, column: int, embedding: float, skills: float, hybrid: float) -> Dict:
+        team = self.teams[column]
+        return {"team_id": team['team_id'], "team_name": team['name'], "hybrid_similarity": float(hybrid),
+                "embedding_similarity": float(embedding), "skills_similarity": float(skills)}
+
+    def _case_entry(self, row: int, embedding: float, skills: float, hybrid: float) -> Dict:
+        case = self.cases[row]
+        return {"id": case['id'], "title": case['title'], "hybrid_similarity": float(hybrid),
+                "embedding_similarity": float(embedding), "skills_similarity": float(skills)}
+
+    def iter_results(self, alpha: float = 0.5, beta: float = 0.5, top_k: int = 10,
+                     block_size: int = 256) -> Iterator[Dict]:
+        """
+        Yield the top-k teams of every case, then the top-k cases of every team.
+
+        Case records are produced as soon as their block is computed. The best cases per team
+        are merged across blocks in k x N buffers and produced after the last block.
+
+        Args:
+        alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+        beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+        top_k (int, optional): Number of best matches per case and per team. Defaults to 10.
+        block_size (int, optional): Number of cases per block. Defaults to 256.
+
+        Yields:
+        Dict: {"type": "case", "id", "teams": [...]} for every case, then
+        {"type": "team", "team_id", "cases": [...]} for every team; matches are sorted best first.
+        """
+        n_teams = len(self.teams)
+        k_rows, k_columns = min(top_k, n_teams), min(top_k, len(self.cases))
+        columns = np.arange(n_teams)
+
+        # Буферы k лучших кейсов для каждой команды: строки кейсов и три оценки
+        best_rows = np.full((k_columns, n_teams), -1, dtype=np.int64)
+        best = np.full((3, k_columns, n_teams), -np.inf, dtype=np.float32)
+
+        for start, embedding, skills, hybrid in self.blocks(alpha, beta, block_size):
+            if k_rows:
+                top = np.argpartition(-hybrid, k_rows - 1, axis=1)[:, :k_rows]
+                top_scores = np.take_along_axis(hybrid, top, axis=1)
+                top = np.take_along_axis(top, np.argsort(-top_scores, axis=1, kind="stable"), axis=1)
+            for offset in range(len(hybrid)):
+                yield {
+                    "type": "case",
+                    "id": self.cases[start + offset]['id'],
+                    "teams": [self._team_entry(column, embedding[offset, column], skills[offset, column],
+                                               hybrid[offset, column]) for column in (top[offset] if k_rows else [])],
+                }
+
+            if k_columns:
+                rows = np.broadcast_to(np.arange(start, start + len(hybrid))[:, None], hybrid.shape)
+                candidate_rows = np.vstack([best_rows, rows])
+                candidates = np.concatenate([best, np.stack([embedding, skills, hybrid])], axis=1)
+                keep = np.argpartition(-candidates[2], k_columns - 1, axis=0)[:k_columns]
+                best_rows = np.take_along_axis(candidate_rows, keep, axis=0)
+                best = candidates[:, keep, columns]
+
+        order = np.argsort(-best[2], axis=0, kind="stable")
+        for column in range(n_teams):
+            yield {
+                "type": "team",
+                "team_id": self.teams[column]['team_id'],
+                "cases": [self._case_entry(best_rows[i, column], *best[:, i, column])
+                          for i in order[:, column] if best_rows[i, column] >= 0],
+            }
@@ -0,0 +1,104 @@
+"""
+Memory usage of service processes, to check how much the worker processes share.
+
+RSS counts shared pages in full in every process, so N workers that share the memory-mapped
+model weights each report them. PSS divides every shared page among the processes mapping it,
+so the sum of PSS over the workers is their real physical footprint.
+
+Usage:
+    python -m src.memory --match uvicorn
+"""
+import argparse
+import os
+import resource
+import sys
+from typing import Dict, List, Union
+
+# Поля /proc/<pid>/smaps_rollup и ключи, под которыми они возвращаются
+_SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean", "Shared_Dirty": "shared_dirty",
+                 "Private_Clean": "private_clean", "Private_Dirty": "private_dirty"}
+
+
+# Память процесса по /proc/<pid>/smaps_rollup
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, int]:
+    """
+    Report the memory of a process in bytes.
+
+    On Linux the values come from `/proc/<pid>/smaps_rollup`: "rss", "pss", "shared" (pages
+    also mapped by other processes, e.g. memory-mapped model weights) and "private". Elsewhere
+    only the peak RSS of the current process is known, reported as "max_rss".
+
+    Args:
+    pid (Union[int, str], optional): Process id. Defaults to the current process.
+
+    Returns:
+    Dict[str, int]: Memory figures in bytes.
+
+    Raises:
+    OSError: If the process does not exist or its memory cannot be read.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        if pid != "self" and pid != os.getpid():
+            raise
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"max_rss": max_rss if sys.platform == "darwin" else max_rss * 1024}
+
+    values = {}
+    for line in lines:
+        field, _, rest = line.partition(":")
+        if field in _SMAPS_FIELDS:
+            values[_SMAPS_FIELDS[field]] = int(rest.split()[0]) * 1024
+    return {
+        "rss": values["rss"],
+        "pss": values["pss"],
+        "shared": values["shared_clean"] + values["shared_dirty"],
+        "private": values["private_clean"] + values["private_dirty"],
+    }
+
+
+# Память всех процессов, в командной строке которых есть подстрока
+def matching_processes_memory(match: str) -> List[Dict]:
+    """
+    Report the memory of every readable process whose command line contains `match`.
+
+    Args:
+    match (str): Substring of the command line, e.g. "uvicorn".
+
+    Returns:
+    List[Dict]: One entry per process with "pid", "cmdline" and the fields of `process_memory`.
+    """
+    processes = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{name}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+            if match in cmdline:
+                processes.append({"pid": int(name), "cmdline": cmdline, **process_memory(name)})
+        except OSError:
+            continue
+    return sorted(processes, key=lambda process: process["pid"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--match", default="uvicorn", help="Substring of the command line of the processes")
+    args = parser.parse_args()
+
+    processes = matching_processes_memory(args.match)
+    if not processes:
+        sys.exit(f"No processes matching {args.match!r}")
+    mib = 1024 * 1024
+    print(f"{'pid':>8} {'rss MiB':>9} {'pss MiB':>9} {'shared MiB':>11} {'private MiB':>12}  command")
+    for p in processes:
+        print(f"{p['pid']:>8} {p['rss'] / mib:>9.1f} {p['pss'] / mib:>9.1f} {p['shared'] / mib:>11.1f} "
+              f"{p['private'] / mib:>12.1f}  {p['cmdline'][:60]}")
+    print(f"{'total':>8} {sum(p['rss'] for p in processes) / mib:>9.1f} {sum(p['pss'] for p in processes) / mib:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+
+# Границы корзин гистограмм: длительности в секундах и размеры пакетов
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+# Гистограмма в формате Prometheus с произвольными метками
+class Histogram:
+    """
+    Cumulative histogram of observed values, one series per combination of label values.
+
+    Attributes:
+    name (str): Metric name.
+    help (str): Metric description.
+    label_names (Tuple[str, ...]): Names of the labels.
+    buckets (Tuple[float, ...]): Upper bounds of the buckets; +Inf is implied.
+    """
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = (), buckets: Tuple = DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = dict(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+# Длительности этапов текущего запроса для заголовка Server-Timing
+_request_timings: contextvars.ContextVar[Optional[List]] = contextvars.ContextVar("request_timings", default=None)
+
+
+# Замер одного этапа: запись в гистограмму и в тайминги текущего запроса
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+# Метрики сервиса: длительности этапов, задержки запросов и счетчики компонентов
+class Metrics:
+    """
+    In-process metrics exposed in the Prometheus text format.
+
+    Pipeline stages are timed with `span(stage)` into the `dpp_stage_duration_seconds`
+    histogram and, inside `collect_request_timings`, into a per-request list used for the
+    `Server-Timing` header. Counters that components already keep (cache hits, queue depths)
+    are read by collectors at scrape time instead of being duplicated. When disabled, `span`
+    returns a shared no-op context manager and `observe` returns at once.
+
+    Attributes:
+    enabled (bool): Whether timings and observations are recorded.
+    stage_seconds (Histogram): Duration of pipeline stages by stage.
+    request_seconds (Histogram): Duration of HTTP requests by method, route and status.
+    batch_size (Histogram): Number of texts per forward pass of the embedding model.
+    """
+
+    def __init__(self, enabled: bool = settings.metrics_enabled):
+        self.enabled = enabled
+        self.stage_seconds = Histogram("dpp_stage_duration_seconds", "Duration of pipeline stages.", ("stage",))
+        self.request_seconds = Histogram("dpp_request_duration_seconds", "Duration of HTTP requests.",
+                                         ("method", "route", "status"))
+        self.batch_size = Histogram("dpp_embedding_batch_size", "Number of texts per forward pass of the embedding model.",
+                                    buckets=SIZE_BUCKETS)
+        self._collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+    def span(self, stage: str):
+        """
+        Time a pipeline stage.
+
+        Args:
+        stage (str): Name of the stage, e.g. "forward" or "cosine_similarity".
+
+        Returns:
+        A context manager recording the duration of its block.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        """
+        Record the duration of a stage measured elsewhere.
+        """
+        if not self.enabled:
+            return
+        self.stage_seconds.observe(seconds, stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    def observe(self, histogram: Histogram, value: float, *label_values: str) -> None:
+        """
+        Add an observation to a histogram if metrics are enabled.
+        """
+        if self.enabled:
+            histogram.observe(value, *label_values)
+
+    @contextmanager
+    def collect_request_timings(self):
+        """
+        Collect the stages timed within the block, including those run in the inference pool.
+
+        Yields:
+        List[Tuple[str, float]]: (stage, seconds) pairs in the order the stages finished.
+        """
+        timings: List = []
+        token = _request_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            _request_timings.reset(token)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple]]) -> None:
+        """
+        Register a function called on every scrape.
+
+        Args:
+        collector (Callable): Returns (name, type, help, samples) tuples, where type is "counter" or
+            "gauge" and samples is a list of (labels dict, value) pairs.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+        str: The exposition text.
+        """
+        lines = []
+        for histogram in (self.stage_seconds, self.request_seconds, self.batch_size):
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            for name, metric_type, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+_NULL_SPAN = nullcontext()
+
+
+# Заголовок Server-Timing: суммарная длительность каждого этапа в миллисекундах
+def server_timing_header(timings: List[Tuple[str, float]], total: float = None) -> str:
+    """
+    Format stage timings as a `Server-Timing` header value.
+
+    Stages that ran several times are summed; nested stages are listed separately, so the sum
+    over all entries can exceed the total.
+
+    Args:
+    timings (List[Tuple[str, float]]): (stage, seconds) pairs.
+    total (float, optional): Duration of the whole request in seconds, added as "total".
+
+    Returns:
+    str: Header value, e.g. 'encode;dur=12.3, cosine_similarity;dur=0.4, total;dur=14.1'.
+    """
+    durations: Dict[str, float] = {}
+    for stage, seconds in timings:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(f"{stage};dur={1000 * seconds:.3f}" for stage, seconds in durations.items())
+
+
+metrics = Metrics()
@@ -0,0 +1,113 @@
+"""
+Save the embedding model as a local snapshot that loads without the Hugging Face Hub.
+
+The snapshot directory holds config.json, the weights as model.safetensors and the tokenizer.
+Point DPP_EMBEDDING_MODEL_PATH at the directory: a pod then starts without downloading weights,
+and on CPU the weights stay memory-mapped from the file (see `load_mmap_model`), so all worker
+processes of a node share one physical copy through the page cache.
+
+Usage:
+    python -m src.model_snapshot --model intfloat/multilingual-e5-large --output models/e5-large
+"""
+import argparse
+import copy
+import os
+import time
+
+from src.config import settings
+
+
+# Сохранение модели и токенизатора в локальный каталог в формате safetensors
+def save_snapshot(model_path: str, output_dir: str) -> str:
+    """
+    Save a model and its tokenizer as a local snapshot.
+
+    Args:
+    model_path (str): Model id or local path.
+    output_dir (str): Directory for config.json, model.safetensors and the tokenizer files.
+
+    Returns:
+    str: The snapshot directory.
+    """
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(output_dir)
+    AutoModel.from_pretrained(model_path).save_pretrained(output_dir, safe_serialization=True)
+    return output_dir
+
+
+# Загрузка модели с весами, отображенными в память из model.safetensors
+def load_mmap_model(model_dir: str):
+    """
+    Load a model whose parameters are read-only views of the memory-mapped `model.safetensors`.
+
+    `from_pretrained` copies the weights into private process memory, so N worker processes hold
+    N copies. Here the model is built on the meta device and the memory-mapped tensors are
+    assigned as its parameters: the pages stay clean, file-backed and shared by every process that
+    maps the same file. Inference never writes to the weights, so they are never copied on write.
+    Buffers that are not stored in the checkpoint (e.g. position ids) are taken from a tiny
+    instance of the same architecture.
+
+    Args:
+    model_dir (str): Snapshot directory with config.json and a single model.safetensors.
+
+    Returns:
+    The model in eval mode, on CPU.
+
+    Raises:
+    FileNotFoundError: If the directory has no model.safetensors.
+    ValueError: If the checkpoint does not match the model's parameters.
+    """
+    import torch
+    from safetensors.torch import load_file
+    from transformers import AutoConfig, AutoModel
+
+    weights_path = os.path.join(model_dir, "model.safetensors")
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(weights_path)
+    config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+    with torch.device("meta"):
+        model = AutoModel.from_config(config)
+
+    state_dict = load_file(weights_path)
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    if result.missing_keys or result.unexpected_keys:
+        raise ValueError(f"Checkpoint does not match the model: missing {result.missing_keys[:5]}, "
+                         f"unexpected {result.unexpected_keys[:5]}")
+
+    # Непостоянные буферы (position_ids и т. п.) не зависят от размеров слоев: берем их у маленькой копии
+    missing_buffers = [name for name, buffer in model.named_buffers() if buffer.is_meta]
+    if missing_buffers:
+        tiny_config = copy.deepcopy(config)
+        tiny_config.num_hidden_layers = 1
+        tiny_config.hidden_size = tiny_config.num_attention_heads
+        tiny_config.intermediate_size = 1
+        tiny_buffers = dict(AutoModel.from_config(tiny_config).named_buffers())
+        for name in missing_buffers:
+            module_name, _, buffer_name = name.rpartition(".")
+            buffer = tiny_buffers.get(name)
+            if buffer is None or buffer.shape != model.get_buffer(name).shape:
+                raise ValueError(f"Cannot materialize buffer {name}")
+            model.get_submodule(module_name)._buffers[buffer_name] = buffer
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_path, help="Model id or path")
+    parser.add_argument("--output", required=True, help="Snapshot directory")
+    args = parser.parse_args()
+
+    save_snapshot(args.model, args.output)
+
+    # Проверочная загрузка: столько же займет загрузка модели при старте сервиса
+    from src.embeddings import load_embedding_model
+
+    start = time.perf_counter()
+    load_embedding_model(args.output, backend="torch", device="cpu")
+    print(f"Saved snapshot to {args.output}; loads in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
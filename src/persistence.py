@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, List, Tuple
+
+
+# Журнал изменений каталога: журнал упреждающей записи (WAL) и периодический снимок
+class CatalogueJournal:
+    """
+    Append-only persistence for the catalogue: a write-ahead log plus periodic snapshots.
+
+    Every change is appended to `catalogue.wal` as one JSON line before it is applied, and a
+    batch of changes costs a single `fsync`. After `snapshot_every` logged changes the full
+    catalogue is written atomically to `catalogue.snapshot.json` and the log is truncated, so
+    a restart loads the snapshot and replays only the short tail of the log. Embeddings are not
+    stored here: they come back from the embedding cache.
+
+    Attributes:
+    directory (str): Directory holding the log and the snapshot.
+    snapshot_every (int): Number of logged changes after which a snapshot is due.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 1000):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.wal_path = os.path.join(directory, "catalogue.wal")
+        self.snapshot_path = os.path.join(directory, "catalogue.snapshot.json")
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._truncate_torn_tail()
+        self.pending = sum(1 for _ in self.read_log())
+        self._wal = open(self.wal_path, "a", encoding="utf-8")
+
+    # Обрезка недописанной последней строки: иначе следующая запись склеится с ней в одну испорченную строку
+    def _truncate_torn_tail(self, chunk: int = 65536) -> None:
+        if not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - chunk)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                logging.getLogger(__name__).warning("Dropping a torn record of %d bytes at the end of %s",
+                                                    size - end, self.wal_path)
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, records: List[Tuple[str, Dict]]) -> None:
+        """
+        Durably append changes to the log.
+
+        Args:
+        records (List[Tuple[str, Dict]]): (operation, payload) pairs.
+        """
+        with self._lock:
+            self._wal.write("".join(json.dumps({"op": op, "data": data}, ensure_ascii=False) + "\n"
+                                    for op, data in records))
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self.pending += len(records)
+
+    @property
+    def needs_snapshot(self) -> bool:
+        """
+        bool: True once `snapshot_every` changes have been logged since the last snapshot.
+        """
+        return self.pending >= self.snapshot_every
+
+    def read_log(self) -> Iterator[Tuple[str, Dict]]:
+        """
+        Read the logged changes in order.
+
+        A torn last line left by a crash during a write is cut off when the journal is opened;
+        an unterminated last line met here anyway is skipped with a warning.
+
+        Yields:
+        Tuple[str, Dict]: (operation, payload) pairs.
+
+        Raises:
+        ValueError: If a complete line of the log is not a valid record.
+        """
+        if not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.endswith("\n"):
+                    logging.getLogger(__name__).warning("Skipping a torn record at line %d of %s", number, self.wal_path)
+                    return
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Corrupt record at line {number} of {self.wal_path}") from e
+                yield record["op"], record["data"]
+
+    def load_snapshot(self) -> Dict[str, List[Dict]]:
+        """
+        Load the last snapshot.
+
+        Returns:
+        Dict[str, List]: {"teams": [...], "cases": [...], "ingested_case_ids": [...]}, empty lists
+        if there is no snapshot yet.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return {"teams": [], "cases": [], "ingested_case_ids": []}
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        # Снимки прежних версий не знают, какие кейсы пришли из /new_data
+        snapshot.setdefault("ingested_case_ids", [])
+        return snapshot
+
+    def write_snapshot(self, teams: List[Dict], cases: List[Dict], ingested_case_ids: List[int] = ()) -> None:
+        """
+        Atomically replace the snapshot and truncate the log.
+
+        The caller must make sure no changes are applied concurrently.
+
+        Args:
+        teams (List[Dict]): All stored teams.
+        cases (List[Dict]): All stored cases.
+        ingested_case_ids (List[int]): Ids of the cases created by `/new_data` events.
+        """
+        with self._lock:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"teams": teams, "cases": cases, "ingested_case_ids": list(ingested_case_ids)}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._wal.truncate(0)
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self.pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._wal.close()
@@ -0,0 +1,218 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from src.config import settings
+
+
+# Кольцевой буфер профилей на диске: хранятся только последние max_profiles
+class ProfileStore:
+    """
+    Bounded on-disk ring buffer of cProfile results.
+
+    Every profile is stored as `<id>.pstats` (readable with `pstats`, snakeviz or
+    `python -m pstats`) next to `<id>.json` with its metadata. Ids start with the creation time,
+    so they sort chronologically; once more than `max_profiles` are stored, the oldest are deleted.
+
+    Attributes:
+    directory (str): Directory holding the profiles.
+    max_profiles (int): Number of profiles kept.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 20):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, profile: cProfile.Profile, metadata: Dict) -> str:
+        """
+        Store a finished profile and drop the oldest ones beyond the limit.
+
+        Args:
+        profile (cProfile.Profile): Disabled profiler with collected data.
+        metadata (Dict): JSON-compatible description, e.g. the profiled request and its duration.
+
+        Returns:
+        str: Id of the stored profile.
+        """
+        profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(self._path(profile_id, "pstats"))
+            with open(self._path(profile_id, "json"), "w", encoding="utf-8") as f:
+                json.dump({"id": profile_id, **metadata}, f, ensure_ascii=False)
+            for stale_id in self._ids()[:-self.max_profiles]:
+                for extension in ("pstats", "json"):
+                    try:
+                        os.remove(self._path(stale_id, extension))
+                    except FileNotFoundError:
+                        pass
+        return profile_id
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".pstats")] for name in os.listdir(self.directory) if name.endswith(".pstats"))
+
+    def list(self) -> List[Dict]:
+        """
+        Return the metadata of the stored profiles, newest first.
+        """
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                profiles.append({"id": profile_id})
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """
+        Return the `.pstats` file of a stored profile, or None if it does not exist.
+        """
+        if profile_id not in self._ids():
+            return None
+        return self._path(profile_id, "pstats")
+
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """
+        Render the top functions of a stored profile as text.
+
+        Args:
+        profile_id (str): Id of the profile.
+        sort (str, optional): `pstats` sort key, e.g. "cumulative" or "tottime". Defaults to "cumulative".
+        limit (int, optional): Number of functions listed. Defaults to 50.
+
+        Returns:
+        Optional[str]: The `pstats` report, or None if the profile does not exist.
+        """
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+# Описание профилируемого запроса и id сохраненных профилей
+_profile_request: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("profile_request", default=None)
+
+
+# Профилирование выбранных запросов: следующие N запросов или запросы с отладочным заголовком
+class RequestProfiler:
+    """
+    Profiles selected requests with cProfile and keeps the results in a `ProfileStore`.
+
+    A request is profiled when an administrator has armed the profiler for the next N requests,
+    or when it carries the debug header with the admin token. Only the blocking part of a
+    request that runs in the inference pool is profiled — scoring, encoding and ranking — since
+    cProfile sees a single thread. At most one request is profiled at a time; a request
+    selected while another is being profiled runs without profiling.
+
+    Attributes:
+    store (ProfileStore): Where finished profiles are written.
+    admin_token (str): Token required by admin endpoints and the debug header; empty disables profiling.
+    """
+
+    def __init__(self, store: ProfileStore, admin_token: str = settings.admin_token):
+        self.store = store
+        self.admin_token = admin_token
+        self.armed = 0
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def check_token(self, token: Optional[str]) -> bool:
+        """
+        Return True if profiling is enabled and `token` is the admin token.
+        """
+        return self.enabled and token is not None and secrets.compare_digest(token, self.admin_token)
+
+    def arm(self, count: int) -> int:
+        """
+        Profile the next `count` requests; 0 cancels.
+
+        Returns:
+        int: Number of requests still to be profiled.
+        """
+        with self._lock:
+            self.armed = max(0, count)
+            return self.armed
+
+    def _take_armed(self) -> bool:
+        with self._lock:
+            if self.armed > 0:
+                self.armed -= 1
+                return True
+        return False
+
+    @contextmanager
+    def request(self, label: str, debug_header: Optional[str] = None):
+        """
+        Mark the block as serving a request that may be profiled.
+
+        Args:
+        label (str): Description of the request, e.g. "POST /recommend_team_to_case".
+        debug_header (Optional[str]): Value of the request's debug header; the admin token forces profiling.
+
+        Yields:
+        List[str]: Ids of the profiles stored while serving the request.
+        """
+        request = {"label": label, "forced": self.check_token(debug_header), "profile_ids": []}
+        token = _profile_request.set(request)
+        try:
+            yield request["profile_ids"]
+        finally:
+            _profile_request.reset(token)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """
+        Return `fn` itself, or a version that profiles its call if the current request is selected.
+
+        A request is selected by its debug header or by taking one of the armed slots, so slots
+        are only used up by requests that do profiled work. The wrapper may run in another
+        thread; the request is captured when `wrap` is called.
+        """
+        request = _profile_request.get()
+        if request is None or not (request["forced"] or self._take_armed()):
+            return fn
+
+        def profiled(*args, **kwargs):
+            if not self._busy.acquire(blocking=False):
+                return fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profile.enable()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    profile.disable()
+                    seconds = time.perf_counter() - start
+                    request["profile_ids"].append(self.store.save(profile, {
+                        "label": request["label"], "function": getattr(fn, "__name__", repr(fn)),
+                        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": round(seconds, 6),
+                    }))
+            finally:
+                self._busy.release()
+
+        return profiled
+
+
+request_profiler = RequestProfiler(ProfileStore(settings.profile_dir, settings.profile_keep))
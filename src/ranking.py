@@ -0,0 +1,199 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Порог персентиля по массиву оценок
+def percentile_threshold(scores: np.ndarray, percentile: float) -> float:
+    """
+    Compute the score at a given percentile.
+
+    Uses linear interpolation, the same as `pandas.Series.quantile`, via a partial sort.
+
+    Args:
+    scores (np.ndarray): Scores of all candidates.
+    percentile (float): Percentile in [0, 1].
+
+    Returns:
+    float: Score at the percentile.
+    """
+    return float(np.quantile(scores, percentile))
+
+# Индексы k лучших оценок без полной сортировки
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+
+    `np.argpartition` finds the k best candidates in linear time; only those k are sorted.
+
+    Args:
+    scores (np.ndarray): Scores of all candidates.
+    k (int): Number of candidates to return.
+
+    Returns:
+    np.ndarray: Indices of the k best candidates in descending order of score.
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+# Отбор рекомендаций: по порогу персентиля или k лучших
+def select_recommendations(scores: np.ndarray, confidence_percentile: float,
+                           top_k: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    Select the candidates to recommend.
+
+    Without `top_k` every candidate scoring at or above the percentile threshold is selected,
+    in input order. With `top_k` the k best candidates are selected, best first.
+
+    Args:
+    scores (np.ndarray): Scores of all candidates.
+    confidence_percentile (float): Percentile used for the threshold.
+    top_k (int, optional): Number of best candidates to return instead of filtering by the threshold.
+
+    Returns:
+    Tuple[np.ndarray, float]: Indices of the selected candidates and the percentile threshold.
+    """
+    scores = np.asarray(scores)
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64), float("nan")
+    threshold = percentile_threshold(scores, confidence_percentile)
+    if top_k is not None:
+        return select_top_k(scores, top_k), threshold
+    return np.flatnonzero(scores >= threshold), threshold
+
+# Первая ступень каскада: кандидаты, которые стоит оценивать дорогой моделью
+def cascade_survivors(scores: np.ndarray, max_candidates: Optional[int] = None,
+                      min_score: Optional[float] = None) -> np.ndarray:
+    """
+    Select the candidates that pass the cheap first stage of a cascade.
+
+    A candidate survives if its score is at least `min_score` and it is among the
+    `max_candidates` best; a limit that is not given does not apply.
+
+    Args:
+    scores (np.ndarray): First-stage scores of all candidates.
+    max_candidates (int, optional): Maximum number of survivors.
+    min_score (float, optional): Minimum first-stage score of a survivor.
+
+    Returns:
+    np.ndarray: Indices of the survivors in input order.
+    """
+    scores = np.asarray(scores)
+    survivors = np.arange(len(scores)) if min_score is None else np.flatnonzero(scores >= min_score)
+    if max_candidates is not None and len(survivors) > max_candidates:
+        survivors = np.sort(survivors[select_top_k(scores[survivors], max_candidates)])
+    return survivors
+
+# Признаки для ядра сходства DPP: нормированные блоки признаков с весами
+def similarity_features(*blocks: Tuple[np.ndarray, float]) -> np.ndarray:
+    """
+    Build features whose dot products are a weighted mix of cosine similarities.
+
+    Every block is L2-normalized row-wise and scaled by the square root of its share of the
+    total weight, so for the concatenation `F`, `F @ F.T` equals the weighted average of the
+    blocks' cosine similarity matrices, e.g. `alpha * cos(e5) + beta * cos(skills)` normalized
+    by `alpha + beta` — the hybrid similarity between two candidates. Rows with zero norm stay zero;
+    if no weight is positive, the blocks are weighted equally.
+
+    Args:
+    *blocks (Tuple[np.ndarray, float]): (matrix of shape (n, d_i), weight) pairs with equal n.
+
+    Returns:
+    np.ndarray: float32 matrix of shape (n, sum of d_i).
+    """
+    blocks = [(np.asarray(matrix, dtype=np.float32), weight) for matrix, weight in blocks]
+    # Без положительных весов блоки учитываются поровну
+    if not any(weight > 0 for _, weight in blocks):
+        blocks = [(matrix, 1.0) for matrix, _ in blocks]
+    blocks = [(matrix, weight) for matrix, weight in blocks if weight > 0]
+    total = sum(weight for _, weight in blocks)
+    # Блоки пишутся сразу в итоговую матрицу, без промежуточных копий
+    features = np.empty((len(blocks[0][0]), sum(matrix.shape[1] for matrix, _ in blocks)), dtype=np.float32)
+    offset = 0
+    for matrix, weight in blocks:
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        scale = np.divide(np.float32(np.sqrt(weight / total)), norms, out=np.zeros_like(norms), where=norms > 0)
+        np.multiply(matrix, scale[:, None], out=features[:, offset:offset + matrix.shape[1]])
+        offset += matrix.shape[1]
+    return features
+
+# Жадный MAP-вывод DPP с инкрементальным обновлением разложения Холецкого
+def dpp_greedy_map(quality: np.ndarray, features: np.ndarray, k: int, epsilon: float = 1e-10) -> np.ndarray:
+    """
+    Select up to k items that approximately maximize `det(L_Y)` for the DPP kernel
+    `L = diag(quality) @ features @ features.T @ diag(quality)`.
+
+    Fast greedy MAP inference (Chen, Zhang, Zhou, 2018): the Cholesky factor of the selected
+    submatrix is extended by one row per step, so each step costs one kernel row and an
+    O(N·k) update — O(N·k·(d + k)) in total, with no determinants and no N×N kernel. Selection
+    stops early once every remaining item is (numerically) spanned by the selected ones.
+
+    Args:
+    quality (np.ndarray): Non-negative quality of every item, shape (n,).
+    features (np.ndarray): Item features of shape (n, d); similarity is their dot product.
+    k (int): Maximum number of items to select.
+    epsilon (float, optional): Marginal gain below which selection stops. Defaults to 1e-10.
+
+    Returns:
+    np.ndarray: Indices of the selected items in the order they were selected.
+    """
+    quality = np.asarray(quality, dtype=np.float64)
+    features = np.asarray(features, dtype=np.float32)
+    n = len(quality)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # d2[i] — квадрат очередного диагонального элемента Холецкого, т. е. прирост log det при добавлении i
+    cholesky = np.zeros((k, n))
+    gains = quality ** 2 * np.einsum("ij,ij->i", features, features).astype(np.float64)
+    selected = [int(np.argmax(gains))]
+    if gains[selected[0]] < epsilon:
+        return np.zeros(0, dtype=np.int64)
+    while len(selected) < k:
+        j, t = selected[-1], len(selected) - 1
+        kernel_row = quality[j] * quality * (features @ features[j])
+        row = (kernel_row - cholesky[:t, j] @ cholesky[:t]) / np.sqrt(gains[j])
+        cholesky[t] = row
+        gains -= row ** 2
+        gains[selected] = -np.inf
+        j = int(np.argmax(gains))
+        if gains[j] < epsilon:
+            break
+        selected.append(j)
+    return np.array(selected, dtype=np.int64)
+
+# Выбор k разнообразных кандидатов: компромисс между релевантностью и разнообразием
+def select_diverse(scores: np.ndarray, features: np.ndarray, k: int, diversity: float) -> np.ndarray:
+    """
+    Re-rank candidates with a DPP so that the k selected ones are relevant and unlike each other.
+
+    The quality of a candidate is `exp(a * score)` with `a = (1 - diversity) / (2 * diversity)`,
+    so the greedy MAP objective is `(1 - diversity) * sum(scores) + diversity * log det(S_Y)`,
+    where S is the similarity of `features`. `diversity=0` is plain top-k by score, `diversity=1`
+    ignores the scores. Slots left once the DPP has nothing novel to add (e.g. duplicate
+    candidates) are filled with the best remaining candidates by score.
+
+    Args:
+    scores (np.ndarray): Relevance of every candidate.
+    features (np.ndarray): Candidate features, e.g. from `similarity_features`.
+    k (int): Number of candidates to select.
+    diversity (float): Trade-off in [0, 1].
+
+    Returns:
+    np.ndarray: Indices of the selected candidates in ranking order.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if diversity <= 0 or len(scores) == 0:
+        return select_top_k(scores, k)
+    # Сдвиг на максимум масштабирует все качества одинаково и не меняет выбор, но защищает exp от переполнения
+    quality = np.exp((1 - diversity) / (2 * diversity) * (scores - scores.max()))
+    selected = dpp_greedy_map(quality, features, k)
+    if len(selected) < min(k, len(scores)):
+        rest = np.setdiff1d(np.arange(len(scores)), selected)
+        selected = np.concatenate([selected, rest[select_top_k(scores[rest], k - len(selected))]])
+    return selected
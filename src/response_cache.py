@@ -0,0 +1,312 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.codec import dumps, loads
+from src.config import settings
+
+
+# Приведение тела запроса к канонической форме
+def canonicalize(value, key: str = None):
+    """
+    Bring a request body to a canonical form, so that equivalent requests hash equally.
+
+    - Floats are rounded to 6 decimals.
+    - Dictionaries are ordered by key.
+    - `person_skills` and team `required_roles` are sorted and deduplicated.
+    - Member skill lists are sorted but keep duplicates, because every occurrence of a skill counts when scoring teams for a person.
+    - Lists of teams and cases are ordered by id, keeping the relative order of duplicate ids.
+
+    Args:
+    value: A JSON-compatible value, e.g. `request.model_dump()`.
+    key (str, optional): Name of the field holding the value.
+
+    Returns:
+    A JSON-compatible value in canonical form.
+    """
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        if key == "skills":
+            return {member: sorted(skills) for member, skills in sorted(value.items())}
+        return {name: canonicalize(item, name) for name, item in sorted(value.items())}
+    if isinstance(value, list):
+        if key in ("person_skills", "required_roles"):
+            return sorted(set(value))
+        if key == "teams":
+            value = sorted(value, key=lambda team: team['team_id'])
+        elif key == "cases":
+            value = sorted(value, key=lambda case: case['id'])
+        return [canonicalize(item) for item in value]
+    return value
+
+# Ключ кэша: хэш канонического запроса
+def request_key(endpoint: str, body: Dict, generation: str = "") -> str:
+    """
+    Build the cache key of a request.
+
+    Args:
+    endpoint (str): Name of the endpoint.
+    body (Dict): Request body.
+    generation (str, optional): Version of the data the response depends on, e.g. the catalogue
+        generation and the embedding model; a new generation makes old entries unreachable.
+
+    Returns:
+    str: Hex digest identifying the request.
+    """
+    canonical = dumps(canonicalize(body), sort_keys=True)
+    return hashlib.sha256(f"{endpoint}\n{generation}\n".encode("utf-8") + canonical).hexdigest()
+
+
+# Хранилище ответов в памяти процесса: TTL и LRU с ограничением по объему
+class MemoryCacheBackend:
+    """
+    In-process store of serialized responses with a TTL and LRU eviction bounded by total size.
+
+    Attributes:
+    max_bytes (int): Limit on the total size of stored values.
+    ttl (float): Lifetime of an entry in seconds.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # Поколение каталога: у кэша в памяти процесса оно свое у каждого процесса
+    def generation(self) -> Optional[int]:
+        return self._generation
+
+    def bump_generation(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+# Хранилище ответов в Redis или совместимом сервере (необязательная зависимость redis)
+class RedisCacheBackend:
+    """
+    Store of serialized responses in a Redis-compatible server, shared by several processes.
+
+    Entries expire after `ttl` seconds; eviction under memory pressure is left to the server's
+    `maxmemory-policy`. The catalogue generation is a counter on the server too, so a change
+    made through one process makes the cached responses of all processes unreachable. Server
+    errors are treated as cache misses.
+
+    Attributes:
+    ttl (float): Lifetime of an entry in seconds.
+    prefix (str): Prefix of all keys.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "dpp:response:"):
+        import redis  # необязательная зависимость
+
+        self._redis = redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.generation_key = prefix + "generation"
+
+    # Поколение каталога общее для всех процессов (GET/INCR); None, если сервер недоступен
+    def generation(self) -> Optional[int]:
+        try:
+            return int(self.client.get(self.generation_key) or 0)
+        except self._redis.RedisError:
+            return None
+
+    def bump_generation(self) -> None:
+        try:
+            self.client.incr(self.generation_key)
+        except self._redis.RedisError:
+            logging.getLogger(__name__).warning("Failed to invalidate the shared response cache", exc_info=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except self._redis.RedisError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        try:
+            self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+        except self._redis.RedisError:
+            pass
+
+    def clear(self) -> None:
+        try:
+            for key in self.client.scan_iter(match=self.prefix + "*"):
+                if key != self.generation_key.encode():
+                    self.client.delete(key)
+        except self._redis.RedisError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+# Кэш ответов эндпоинтов рекомендаций
+class ResponseCache:
+    """
+    Cache of recommendation responses keyed by the canonical request.
+
+    Responses that depend on the stored catalogue include the catalogue generation in their
+    key. `invalidate` is registered as a catalogue listener and bumps the generation on every
+    change, so stale responses are never served and simply age out of the backend. The
+    generation is kept by the backend: per process in memory, shared by all processes in Redis.
+
+    Attributes:
+    backend: `MemoryCacheBackend`, `RedisCacheBackend` or None when caching is disabled.
+    hits (int): Number of responses served from the cache.
+    misses (int): Number of responses computed.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def key(self, endpoint: str, body: Dict, uses_catalogue: bool, model_id: str = "") -> Optional[str]:
+        """
+        Build the cache key of a request.
+
+        Args:
+        endpoint (str): Name of the endpoint.
+        body (Dict): Request body.
+        uses_catalogue (bool): Whether the response depends on the stored catalogue.
+        model_id (str, optional): Identifier of the embedding model the response depends on.
+
+        Returns:
+        Optional[str]: Cache key, or None if the catalogue generation is unknown (the backend is
+        unavailable) and the response must not be cached.
+        """
+        generation = model_id
+        if uses_catalogue:
+            catalogue_generation = self.backend.generation()
+            if catalogue_generation is None:
+                return None
+            generation = f"{model_id}#{catalogue_generation}"
+        return request_key(endpoint, body, generation)
+
+    def get_bytes(self, key: Optional[str]) -> Optional[bytes]:
+        """
+        Return a cached response as stored JSON, or None on a miss.
+        """
+        value = self.backend.get(key) if self.enabled and key is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return a cached response, or None on a miss.
+        """
+        value = self.get_bytes(key)
+        return loads(value) if value is not None else None
+
+    def set_bytes(self, key: Optional[str], value: bytes) -> None:
+        """
+        Store a response already encoded as JSON.
+        """
+        if self.enabled and key is not None:
+            self.backend.set(key, value)
+
+    def set(self, key: str, response: Dict) -> None:
+        """
+        Store a response.
+        """
+        self.set_bytes(key, dumps(response))
+
+    def invalidate(self) -> None:
+        """
+        Make all cached responses that depend on the catalogue unreachable.
+        """
+        if self.enabled:
+            self.backend.bump_generation()
+
+    def stats(self) -> Dict:
+        """
+        Return cache counters.
+
+        Returns:
+        Dict: Hits, misses, the catalogue generation and backend-specific counters.
+        """
+        backend_stats = self.backend.stats() if self.enabled else {}
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses,
+                "generation": self.backend.generation() if self.enabled else 0, **backend_stats}
+
+
+# Создание хранилища по имени бэкенда
+def create_response_cache(backend: str = settings.response_cache_backend) -> ResponseCache:
+    """
+    Create the response cache for a backend name.
+
+    Args:
+    backend (str, optional): "memory", "redis" or "none". Defaults to the configured backend.
+
+    Returns:
+    ResponseCache: The cache; disabled for "none".
+
+    Raises:
+    ValueError: If the backend is unknown.
+    ImportError: If "redis" is requested and the `redis` package is not installed.
+    """
+    if backend == "memory":
+        return ResponseCache(MemoryCacheBackend(settings.response_cache_memory_mb * 1024 * 1024,
+                                                settings.response_cache_ttl))
+    if backend == "redis":
+        return ResponseCache(RedisCacheBackend(settings.response_cache_redis_url, settings.response_cache_ttl))
+    if backend == "none":
+        return ResponseCache()
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+response_cache = create_response_cache()
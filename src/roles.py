@@ -0,0 +1,195 @@
+from itertools import chain
+from typing import Dict, Iterable, List
+
+import numpy as np
+from scipy import sparse
+
+from src import role_to_skills_mapping
+from src.skills import SkillVocabulary, skill_dictionary
+
+
+# Матрица «роли × навыки», компилируемая один раз при импорте
+class RoleSkillMatrix:
+    """
+    Compiled roles x skills boolean matrix built from a role-to-skills mapping.
+
+    Columns cover every skill mentioned in the mapping. Fill ratios of many teams for all roles
+    come from one matrix product of the teams' binary skill matrix with this matrix. Roles that
+    are not in the mapping have no skills and are never considered filled.
+
+    Attributes:
+    roles (List[str]): Role names in row order.
+    role_index (Dict[str, int]): Row index of every role.
+    vocabulary (SkillVocabulary): Vocabulary of the skills in the mapping.
+    matrix (np.ndarray): float32 matrix of shape (roles, skills) with 1 for every role skill.
+    role_sizes (np.ndarray): Number of skills of every role.
+    """
+
+    def __init__(self, mapping: Dict[str, List[str]]):
+        self.roles: List[str] = list(mapping)
+        self.role_index: Dict[str, int] = {role: row for row, role in enumerate(self.roles)}
+        self.vocabulary = SkillVocabulary(skill for skills in mapping.values() for skill in skills)
+        self.matrix = np.zeros((len(self.roles), len(self.vocabulary)), dtype=np.float32)
+        for row, role in enumerate(self.roles):
+            self.matrix[row, self.vocabulary.columns(mapping[role])] = 1.0
+        self.role_sizes = self.matrix.sum(axis=1)
+        self.role_skill_sets = {role: frozenset(skill_dictionary.canonical_many(skills)) for role, skills in mapping.items()}
+
+    def role_mask(self, roles_per_team: Iterable[Iterable[str]]) -> np.ndarray:
+        """
+        Encode role lists as a boolean matrix over the known roles.
+
+        Args:
+        roles_per_team (Iterable[Iterable[str]]): One list of roles per team.
+
+        Returns:
+        np.ndarray: bool matrix of shape (teams, roles).
+        """
+        roles_per_team = list(roles_per_team)
+        mask = np.zeros((len(roles_per_team), len(self.roles)), dtype=bool)
+        for row, roles in enumerate(roles_per_team):
+            columns = [self.role_index[role] for role in roles if role in self.role_index]
+            mask[row, columns] = True
+        return mask
+
+    def fill_ratios(self, team_skill_sets: Iterable[Iterable[str]]) -> np.ndarray:
+        """
+        Compute which share of every role's skills each team has.
+
+        Args:
+        team_skill_sets (Iterable[Iterable[str]]): One collection of skills per team.
+
+        Returns:
+        np.ndarray: float32 matrix of shape (teams, roles) with ratios in [0, 1].
+        """
+        team_matrix = self.vocabulary.encode_many(team_skill_sets)
+        matched = np.asarray((team_matrix @ self.matrix.T), dtype=np.float32)
+        return np.divide(matched, self.role_sizes, out=np.zeros_like(matched), where=self.role_sizes > 0)
+
+    def filled_mask(self, team_skill_sets: Iterable[Iterable[str]], roles_per_team: Iterable[Iterable[str]],
+                    threshold: float) -> np.ndarray:
+        """
+        Decide for every team which of its required roles are filled.
+
+        Args:
+        team_skill_sets (Iterable[Iterable[str]]): One collection of skills per team.
+        roles_per_team (Iterable[Iterable[str]]): One list of required roles per team.
+        threshold (float): Minimum share of a role's skills the team must have.
+
+        Returns:
+        np.ndarray: bool matrix of shape (teams, roles), True for required roles that are filled.
+        """
+        required = self.role_mask(roles_per_team)
+        filled = (self.fill_ratios(team_skill_sets) >= threshold) & (self.role_sizes > 0)
+        return filled & required
+
+    def skills_of(self, role_mask: np.ndarray) -> np.ndarray:
+        """
+        Return the union of the skills of the selected roles for every row of a role mask.
+
+        Args:
+        role_mask (np.ndarray): bool matrix of shape (teams, roles).
+
+        Returns:
+        np.ndarray: bool matrix of shape (teams, skills).
+        """
+        return (role_mask.astype(np.float32) @ self.matrix) > 0
+
+
+role_matrix = RoleSkillMatrix(role_to_skills_mapping)
+
+
+# Оценка людей по фиксированному списку команд: все, что зависит только от команд, считается один раз
+class PersonTeamScorer:
+    """
+    Scores many people against a fixed list of teams.
+
+    For a team with unfilled required roles the score is the cosine between the person and the
+    skills of the unfilled roles over the skills of all required roles, multiplied by
+    `unfilled_role_weight`. For a team whose roles are all filled the score is the cosine
+    between the person and the team's own skills, where every occurrence of a skill in a member
+    counts as a separate dimension. This reproduces the per-team logic of `get_filled_roles` and
+    `calculate_weighted_similarity`.
+
+    Filled roles, role skill matrices and team skill counts are computed once in the constructor;
+    scoring a block of people is then a few sparse matrix products.
+
+    Attributes:
+    has_unfilled (np.ndarray): bool array, True for teams with at least one unfilled required role.
+    unfilled_role_weight (float): Weight of scores computed against unfilled roles.
+    """
+
+    def __init__(self, teams: List[Dict], threshold: float = 0.5, unfilled_role_weight: float = 1.5):
+        # Все вхождения навыков в участников команды; повторы при кодировании ролей сливаются
+        occurrences = [list(chain.from_iterable(team['skills'].values())) for team in teams]
+        roles_per_team = [team.get('required_roles') or [] for team in teams]
+
+        required = role_matrix.role_mask(roles_per_team)
+        unfilled = required & ~role_matrix.filled_mask(occurrences, roles_per_team, threshold)
+        self.has_unfilled = np.array([
+            any(role not in role_matrix.role_index or unfilled[row, role_matrix.role_index[role]] for role in roles)
+            for row, roles in enumerate(roles_per_team)
+        ], dtype=bool)
+        self.unfilled_role_weight = unfilled_role_weight
+
+        # Навыки незаполненных (U) и всех требуемых (A) ролей каждой команды
+        unfilled_skills = role_matrix.skills_of(unfilled).astype(np.float32)
+        self.unfilled_skills_t = unfilled_skills.T
+        self.required_skills_t = role_matrix.skills_of(required).astype(np.float32).T
+        self.unfilled_counts = unfilled_skills.sum(axis=1)
+
+        # Число вхождений каждого навыка в участников команды
+        flat = list(chain.from_iterable(occurrences))
+        self.team_vocabulary = SkillVocabulary(flat)
+        columns = self.team_vocabulary.item_columns(flat)
+        indptr = np.concatenate([[0], np.cumsum(list(map(len, occurrences)))]).astype(np.int64)
+        counts = sparse.csr_matrix((np.ones(len(columns), dtype=np.float32), columns, indptr),
+                                   shape=(len(teams), len(self.team_vocabulary)))
+        self.occurrence_counts_t = counts.T.tocsr()
+        self.occurrence_totals = np.diff(indptr).astype(np.float32)
+
+    def score_many(self, people_skills: Iterable[Iterable[str]]) -> np.ndarray:
+        """
+        Score every person against every team.
+
+        Args:
+        people_skills (Iterable[Iterable[str]]): One collection of skills per person.
+
+        Returns:
+        np.ndarray: float32 matrix of shape (people, teams).
+        """
+        people_skills = [list(skills) for skills in people_skills]
+
+        # Косинус по навыкам ролей: |P∩U| / sqrt(|P∩A|·|U|)
+        people = role_matrix.vocabulary.encode_many(people_skills)
+        dot = np.asarray(people @ self.unfilled_skills_t, dtype=np.float32)
+        denominator = np.sqrt(np.asarray(people @ self.required_skills_t, dtype=np.float32) * self.unfilled_counts)
+        role_scores = np.divide(dot, denominator, out=np.zeros_like(dot), where=denominator > 0)
+        role_scores *= self.unfilled_role_weight
+
+        # Косинус с навыками самой команды: sqrt(совпавшие вхождения / все вхождения)
+        matched = (self.team_vocabulary.encode_many(people_skills) @ self.occurrence_counts_t).toarray()
+        team_scores = np.sqrt(np.divide(matched, self.occurrence_totals, out=np.zeros_like(matched),
+                                        where=self.occurrence_totals > 0))
+
+        return np.where(self.has_unfilled, role_scores, team_scores).astype(np.float32)
+
+
+# Сходство человека со всеми командами сразу, с учетом незаполненных ролей
+def score_teams_for_person(person_skills: List[str], teams: List[Dict], threshold: float = 0.5,
+                           unfilled_role_weight: float = 1.5) -> np.ndarray:
+    """
+    Score a person against many teams at once.
+
+    See `PersonTeamScorer` for the scoring rules.
+
+    Args:
+    person_skills (List[str]): Skills of the person.
+    teams (List[Dict]): Teams with 'skills' and optional 'required_roles'.
+    threshold (float, optional): Minimum share of a role's skills for the role to count as filled. Defaults to 0.5.
+    unfilled_role_weight (float, optional): Weight of scores computed against unfilled roles. Defaults to 1.5.
+
+    Returns:
+    np.ndarray: float32 array with one score per team.
+    """
+    return PersonTeamScorer(teams, threshold, unfilled_role_weight).score_many([person_skills])[0]
@@ -0,0 +1,230 @@
+import logging
+import math
+import os
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from src import all_skills, role_to_skills_mapping
+from src.config import settings
+from src.metrics import metrics
+from src.roles import role_matrix
+from src.skills import skill_dictionary
+
+
+# Все известные навыки: общий список и навыки ролей
+def known_skills() -> List[str]:
+    """
+    Return the skill vocabulary: `all_skills` followed by the skills that only appear in `role_to_skills_mapping`.
+
+    Returns:
+    List[str]: Unique canonical skill names; aliases such as "K8S" are not repeated.
+    """
+    return skill_dictionary.canonical_many(
+        all_skills + [skill for skills in role_to_skills_mapping.values() for skill in skills])
+
+# Веса IDF навыков по ролям: навык, нужный многим ролям, мало отличает команды друг от друга
+def role_idf(skill: str) -> float:
+    """
+    Compute the smoothed inverse document frequency of a skill over the roles of `role_to_skills_mapping`.
+
+    Args:
+    skill (str): Skill name.
+
+    Returns:
+    float: `log((1 + roles) / (1 + roles with the skill)) + 1`; skills of no role get the largest weight.
+    """
+    skill = skill_dictionary.canonical(skill)
+    frequency = sum(skill in skills for skills in role_matrix.role_skill_sets.values())
+    return math.log((1 + len(role_to_skills_mapping)) / (1 + frequency)) + 1
+
+
+# Таблица эмбеддингов навыков: эмбеддинги команд и людей без прогона трансформера
+class SkillEmbeddingTable:
+    """
+    One embedding per skill; team and person embeddings are weighted means of those rows.
+
+    A skill's row is the embedding of the skill name, i.e. of the text of a team with only that
+    skill. The known skills are encoded together on first use; a skill seen for the first time is
+    encoded with the model and appended, so the transformer runs only for unseen skills. With a
+    `path` the table is stored as .npz and reused across restarts while the model id matches.
+
+    Pooling weights:
+    - "count": the number of team members having the skill (1 for a person's skill);
+    - "idf": the count multiplied by `role_idf` of the skill.
+
+    Attributes:
+    model_id (str): Identifier of the embedding model, or None if the encoder has none.
+    weighting (str): "count" or "idf".
+    path (str): .npz file of the table, or None to keep it in memory only.
+    skills (List[str]): Skill names in row order.
+    index (Dict[str, int]): Row of every skill.
+    embeddings (np.ndarray): float32 matrix of shape (len(skills), dim).
+    """
+
+    def __init__(self, model_id: Optional[str] = None, weighting: str = settings.skill_embedding_weighting,
+                 path: Optional[str] = None):
+        if weighting not in ("count", "idf"):
+            raise ValueError(f"Unknown skill embedding weighting: {weighting}")
+        self.model_id = model_id
+        self.weighting = weighting
+        self.path = path
+        self.skills: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.embeddings: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as stored:
+            if str(stored["model_id"]) != str(self.model_id):
+                return
+            self._append(list(stored["skills"]), stored["embeddings"])
+
+    def _save(self) -> None:
+        # Атомарная запись: при сбое остается прежняя таблица
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, model_id=np.array(str(self.model_id)), skills=np.array(self.skills),
+                 embeddings=self.embeddings)
+        os.replace(tmp_path, self.path)
+
+    def _append(self, skills: List[str], embeddings: np.ndarray) -> None:
+        for skill in skills:
+            self.index[skill] = len(self.skills)
+            self.skills.append(skill)
+        self.idf = np.concatenate([self.idf, np.array([role_idf(skill) for skill in skills], dtype=np.float32)])
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.embeddings = embeddings if self.embeddings is None else np.vstack([self.embeddings, embeddings])
+
+    def ensure(self, skills: Iterable[str], encoder) -> None:
+        """
+        Encode the skills that have no row yet, together with all known skills on first use.
+
+        Args:
+        skills (Iterable[str]): Skill names.
+        encoder: Text encoder with an `encode(texts)` method.
+        """
+        missing = [skill for skill in dict.fromkeys(skills) if skill not in self.index]
+        if not missing and self.embeddings is not None:
+            return
+        with self._lock:
+            if self.embeddings is None:
+                missing = known_skills() + missing
+            missing = [skill for skill in dict.fromkeys(missing) if skill not in self.index]
+            if not missing:
+                return
+            with metrics.span("encode"):
+                embeddings = encoder.encode(missing)
+            self._append(missing, embeddings)
+            if self.path is not None:
+                try:
+                    self._save()
+                except OSError:
+                    logging.getLogger(__name__).warning("Cannot save skill embeddings to %s", self.path, exc_info=True)
+
+    def pool(self, skill_counts: List[Dict[str, float]], encoder) -> np.ndarray:
+        """
+        Embed skill sets as weighted means of skill rows.
+
+        The weights form one sparse matrix, so pooling all sets is a single sparse-dense product.
+
+        Args:
+        skill_counts (List[Dict[str, float]]): Count of every skill, one dictionary per set.
+        encoder: Text encoder for skills that have no row yet.
+
+        Returns:
+        np.ndarray: float32 array of shape (len(skill_counts), dim); sets without skills get zero vectors.
+        """
+        self.ensure((skill for counts in skill_counts for skill in counts), encoder)
+        # Строки только добавляются: снимок под блокировкой содержит все нужные навыки
+        with self._lock:
+            index, idf, embeddings = self.index, self.idf, self.embeddings
+        with metrics.span("skill_pooling"):
+            indices, weights, indptr = [], [], [0]
+            for counts in skill_counts:
+                indices.extend(index[skill] for skill in counts)
+                weights.extend(counts.values())
+                indptr.append(len(indices))
+            indices = np.array(indices, dtype=np.int64)
+            weights = np.array(weights, dtype=np.float32)
+            if self.weighting == "idf":
+                weights *= idf[indices]
+            matrix = sparse.csr_matrix((weights, indices, np.array(indptr)), shape=(len(skill_counts), len(embeddings)))
+            totals = np.asarray(matrix.sum(axis=1), dtype=np.float32)
+            pooled = np.asarray(matrix @ embeddings, dtype=np.float32)
+            return np.divide(pooled, totals, out=np.zeros_like(pooled), where=totals > 0)
+
+    def encode_teams(self, teams_skills: List[Dict[str, List[str]]], encoder) -> np.ndarray:
+        """
+        Embed teams by pooling the rows of their members' skills.
+
+        Args:
+        teams_skills (List[Dict[str, List[str]]]): Members and their skills, one dictionary per team.
+        encoder: Text encoder for skills that have no row yet.
+
+        Returns:
+        np.ndarray: One embedding per team.
+        """
+        counts = []
+        for team_skills in teams_skills:
+            team_counts: Dict[str, float] = {}
+            for skills in team_skills.values():
+                for skill in set(map(skill_dictionary.canonical, skills)):
+                    team_counts[skill] = team_counts.get(skill, 0.0) + 1.0
+            counts.append(team_counts)
+        return self.pool(counts, encoder)
+
+    def encode_people(self, people_skills: List[List[str]], encoder) -> np.ndarray:
+        """
+        Embed people by pooling the rows of their skills.
+
+        Args:
+        people_skills (List[List[str]]): Skills of every person.
+        encoder: Text encoder for skills that have no row yet.
+
+        Returns:
+        np.ndarray: One embedding per person.
+        """
+        return self.pool([dict.fromkeys(map(skill_dictionary.canonical, skills), 1.0) for skills in people_skills], encoder)
+
+
+# Таблицы по моделям: таблица реальной модели хранится на диске, заглушек — только в памяти
+_tables: Dict[str, SkillEmbeddingTable] = {}
+_anonymous_tables: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_tables_lock = threading.Lock()
+
+def skill_table_for(encoder) -> SkillEmbeddingTable:
+    """
+    Return the skill embedding table of an encoder's model, creating it on first use.
+
+    Encoders with a `model_id` (the cached encoders of the model registry) share one table per
+    model, stored at DPP_SKILL_EMBEDDINGS_PATH; other encoders get a table of their own in memory.
+
+    Args:
+    encoder: Text encoder with an `encode(texts)` method.
+
+    Returns:
+    SkillEmbeddingTable: Table whose rows come from this encoder's model.
+    """
+    model_id = getattr(encoder, "model_id", None)
+    with _tables_lock:
+        if model_id is None:
+            table = _anonymous_tables.get(encoder)
+            if table is None:
+                table = _anonymous_tables[encoder] = SkillEmbeddingTable()
+            return table
+        table = _tables.get(model_id)
+        if table is None:
+            table = _tables[model_id] = SkillEmbeddingTable(model_id, path=settings.skill_embeddings_path or None)
+        return table
@@ -0,0 +1,333 @@
+import json
+import threading
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, List
+
+import numpy as np
+from scipy import sparse
+
+from src import all_skills, role_to_skills_mapping, skill_aliases
+from src.config import settings
+
+
+# Ключ сравнения навыков: без учета регистра и лишних пробелов
+def fold_skill(skill: str) -> str:
+    """
+    Return the comparison key of a skill name: case-folded, with runs of whitespace collapsed.
+
+    Args:
+    skill (str): Skill name.
+
+    Returns:
+    str: Key under which spellings such as "Automated Testing" and "automated  testing" are equal.
+    """
+    return " ".join(skill.split()).casefold()
+
+
+# Конец цепочки синонимов: "Pg" -> "Postgres" -> "PostgreSQL"
+def _resolve_alias(key: str, aliases: Dict[str, str]) -> str:
+    """
+    Follows an alias through any further aliases to the skill it finally names.
+
+    Args:
+    key (str): Folded alias.
+    aliases (Dict[str, str]): Folded alias -> target spelling.
+
+    Returns:
+    str: Folded name of the skill at the end of the chain.
+
+    Raises:
+    ValueError: If the chain loops back on itself.
+    """
+    chain = [key]
+    target = fold_skill(aliases[key])
+    while target in aliases:
+        if target in chain:
+            raise ValueError("Skill aliases form a cycle: " + " -> ".join(chain + [target]))
+        chain.append(target)
+        target = fold_skill(aliases[target])
+    return target
+
+
+# Словарь навыков процесса: каждое написание навыка один раз сводится к целому id
+class SkillDictionary:
+    """
+    Interns skill names into compact integer ids, folding case and resolving aliases.
+
+    Known skills (`all_skills`, the skills of `role_to_skills_mapping` and alias targets) get
+    ids 0..len-1 in a fixed order. Every raw spelling is resolved once — case folding and the
+    alias table — and remembered, so later lookups cost one dictionary access and downstream
+    code compares ints instead of strings. Skills that are not known get id -1 and keep their
+    own spelling; the memo of spellings is bounded. An alias may point at another alias; chains
+    are followed to the skill at their end.
+
+    Attributes:
+    names (List[str]): Canonical name of every known skill, by id.
+
+    Raises:
+    ValueError: If the aliases form a cycle.
+    """
+
+    def __init__(self, skills: Iterable[str], aliases: Dict[str, str] = None, memo_size: int = 65536):
+        # Синоним, отличающийся от цели лишь регистром или пробелами, ничего не добавляет
+        aliases = {fold_skill(alias): target for alias, target in (aliases or {}).items()
+                   if fold_skill(alias) != fold_skill(target)}
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for skill in list(skills) + list(aliases.values()):
+            key = fold_skill(skill)
+            if key not in aliases and key not in self._ids:
+                self._ids[key] = len(self.names)
+                self.names.append(" ".join(skill.split()))
+        for key in aliases:
+            self._ids[key] = self._ids[_resolve_alias(key, aliases)]
+        self._memo: Dict[str, int] = {}
+        self._canonical_memo: Dict[str, str] = {}
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, skill: str) -> int:
+        """
+        Return the id of a skill, or -1 for an unknown skill.
+
+        Args:
+        skill (str): Skill name in any spelling.
+
+        Returns:
+        int: Id of the canonical skill.
+        """
+        skill_id = self._memo.get(skill)
+        if skill_id is None:
+            skill_id = self._ids.get(fold_skill(skill), -1)
+            self._remember(self._memo, skill, skill_id)
+        return skill_id
+
+    def _remember(self, memo: Dict, skill: str, value) -> None:
+        with self._lock:
+            # Незнакомых написаний может быть сколько угодно: память ограничена
+            if len(memo) >= self._memo_size:
+                memo.clear()
+            memo[skill] = value
+
+    def ids(self, skills: Iterable[str]) -> np.ndarray:
+        """
+        Return the ids of many skills.
+
+        Args:
+        skills (Iterable[str]): Skill names in any spelling.
+
+        Returns:
+        np.ndarray: int32 array of ids, -1 for unknown skills.
+        """
+        skills = skills if isinstance(skills, list) else list(skills)
+        # Почти все написания уже в памяти: промахи досчитываются отдельно
+        ids = list(map(self._memo.get, skills))
+        if None in ids:
+            ids = [self.id(skill) if skill_id is None else skill_id for skill, skill_id in zip(skills, ids)]
+        return np.array(ids, dtype=np.int32)
+
+    def canonical(self, skill: str) -> str:
+        """
+        Return the canonical name of a skill; an unknown skill keeps its spelling without extra whitespace.
+
+        Args:
+        skill (str): Skill name in any spelling.
+
+        Returns:
+        str: Canonical name, the same string object for every spelling of a known skill.
+        """
+        name = self._canonical_memo.get(skill)
+        if name is None:
+            skill_id = self.id(skill)
+            name = self.names[skill_id] if skill_id >= 0 else " ".join(skill.split())
+            self._remember(self._canonical_memo, skill, name)
+        return name
+
+    def canonical_many(self, skills: Iterable[str]) -> List[str]:
+        """
+        Return the canonical names of skills without duplicates, in order of first occurrence.
+
+        Args:
+        skills (Iterable[str]): Skill names in any spelling.
+
+        Returns:
+        List[str]: Canonical names.
+        """
+        return list(dict.fromkeys(self.canonical(skill) for skill in skills))
+
+
+# Синонимы навыков: встроенные и из файла DPP_SKILL_ALIASES_PATH
+def load_aliases(path: str = settings.skill_aliases_path) -> Dict[str, str]:
+    """
+    Return the built-in `skill_aliases` updated with the aliases of a JSON file.
+
+    Args:
+    path (str, optional): JSON file with an {"alias": "skill"} object; empty for none.
+
+    Returns:
+    Dict[str, str]: Alias -> skill.
+    """
+    aliases = dict(skill_aliases)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            aliases.update(json.load(f))
+    return aliases
+
+
+skill_dictionary = SkillDictionary(
+    all_skills + [skill for skills in role_to_skills_mapping.values() for skill in skills], load_aliases()
+)
+
+
+# Словарь навыков: сопоставление навыка и номера столбца в матрице
+class SkillVocabulary:
+    """
+    Fixed mapping from skill names to column indices of skill matrices.
+
+    The mapping is built once, so encoding a set of skills costs one lookup per skill instead
+    of a scan over the whole vocabulary. Skills are compared through `skill_dictionary`: case
+    and aliases do not matter, and all spellings of a skill share the column of its first
+    spelling in the vocabulary, so e.g. the column of "K8S" stays empty and Kubernetes is
+    counted once. Skills outside the vocabulary are ignored, exactly as in the list-based
+    binary vectors. Duplicate names are kept once.
+
+    Attributes:
+    skills (List[str]): Skill names in column order.
+    index (Dict[str, int]): Column index of every canonical skill name.
+    """
+
+    def __init__(self, skills: Iterable[str], dictionary: SkillDictionary = None):
+        self.skills: List[str] = list(dict.fromkeys(skills))
+        self.dictionary = dictionary or skill_dictionary
+        self.index: Dict[str, int] = {}
+        for column, skill in enumerate(self.skills):
+            self.index.setdefault(self.dictionary.canonical(skill), column)
+        # Столбец по id навыка; навыки вне словаря процесса сопоставляются по имени
+        self.id_columns = np.full(len(self.dictionary), -1, dtype=np.int32)
+        for name, column in self.index.items():
+            skill_id = self.dictionary.id(name)
+            if skill_id >= 0:
+                self.id_columns[skill_id] = column
+        self.unknown_index = {name: column for name, column in self.index.items() if self.dictionary.id(name) < 0}
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def item_columns(self, skills: Iterable[str]) -> np.ndarray:
+        """
+        Return the column of every skill in a sequence, keeping order and repetitions.
+
+        Args:
+        skills (Iterable[str]): Skill names in any spelling.
+
+        Returns:
+        np.ndarray: int32 array with one column index per skill, -1 for skills outside the vocabulary.
+        """
+        skills = skills if isinstance(skills, list) else list(skills)
+        ids = self.dictionary.ids(skills)
+        columns = np.where(ids >= 0, self.id_columns[ids], -1).astype(np.int32)
+        if self.unknown_index:
+            for position in np.flatnonzero(ids < 0):
+                columns[position] = self.unknown_index.get(" ".join(skills[position].split()), -1)
+        return columns
+
+    def columns(self, skills: Iterable[str]) -> np.ndarray:
+        """
+        Return the sorted unique column indices of the known skills in a collection.
+
+        Args:
+        skills (Iterable[str]): Skill names in any spelling.
+
+        Returns:
+        np.ndarray: int32 array of column indices.
+        """
+        columns = self.item_columns(skills)
+        return np.unique(columns[columns >= 0])
+
+    def encode(self, skills: Iterable[str]) -> np.ndarray:
+        """
+        Encode a collection of skills as a dense binary vector.
+
+        Args:
+        skills (Iterable[str]): Skill names.
+
+        Returns:
+        np.ndarray: float32 vector of length `len(self)` with 1 for every present skill.
+        """
+        vector = np.zeros(len(self.skills), dtype=np.float32)
+        vector[self.columns(skills)] = 1.0
+        return vector
+
+    def encode_many(self, skill_sets: Iterable[Iterable[str]]) -> sparse.csr_matrix:
+        """
+        Encode many collections of skills as one sparse binary matrix.
+
+        All skills are looked up in one pass over the concatenated collections; repeated skills
+        of a row are merged by the sparse constructor.
+
+        Args:
+        skill_sets (Iterable[Iterable[str]]): One collection of skill names per row.
+
+        Returns:
+        sparse.csr_matrix: float32 matrix of shape (rows, len(self)).
+        """
+        skill_sets = [skills if isinstance(skills, list) else list(skills) for skills in skill_sets]
+        lengths = np.fromiter(map(len, skill_sets), dtype=np.int64, count=len(skill_sets))
+        columns = self.item_columns(list(chain.from_iterable(skill_sets)))
+        rows = np.repeat(np.arange(len(skill_sets)), lengths)
+        known = columns >= 0
+        matrix = sparse.csr_matrix((np.ones(int(known.sum()), dtype=np.float32), (rows[known], columns[known])),
+                                   shape=(len(skill_sets), len(self.skills)))
+        matrix.data[:] = 1.0
+        return matrix
+
+
+# Косинусное сходство строк матрицы навыков с вектором запроса
+def cosine_scores(matrix, query: np.ndarray) -> np.ndarray:
+    """
+    Compute the cosine similarity of every row of a skill matrix with a query vector.
+
+    Rows or queries with zero norm get similarity 0, as in `sklearn.metrics.pairwise.cosine_similarity`.
+
+    Args:
+    matrix: Dense array or sparse matrix of shape (n, skills).
+    query (np.ndarray): Vector of length `skills`.
+
+    Returns:
+    np.ndarray: float32 array of n similarity scores.
+    """
+    query = np.asarray(query, dtype=np.float32).reshape(-1)
+    if sparse.issparse(matrix):
+        dot = np.asarray(matrix @ query, dtype=np.float32).reshape(-1)
+        row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float32).reshape(-1))
+    else:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        dot = matrix @ query
+        row_norms = np.linalg.norm(matrix, axis=1)
+    denominator = row_norms * np.linalg.norm(query)
+    return np.divide(dot, denominator, out=np.zeros_like(dot), where=denominator > 0)
+
+
+# Словарь для заданного списка навыков (строится один раз на список)
+@lru_cache(maxsize=32)
+def _cached_vocabulary(skills: tuple) -> SkillVocabulary:
+    return SkillVocabulary(skills)
+
+def get_vocabulary(skills: List[str]) -> SkillVocabulary:
+    """
+    Return a vocabulary for a list of skills, reusing vocabularies built for equal lists.
+
+    Args:
+    skills (List[str]): Skill names in column order.
+
+    Returns:
+    SkillVocabulary: Vocabulary over the given skills.
+    """
+    return _cached_vocabulary(tuple(skills))
+
+
+skill_vocabulary = get_vocabulary(all_skills)
@@ -1,10 +1,19 @@
-import torch
-from typing import List, Dict
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Tuple
 import numpy as np
-import pandas as pd
-from transformers import AutoTokenizer, AutoModel
-from sklearn.metrics.pairwise import cosine_similarity
 from src import role_to_skills_mapping, all_skills
+from src.embeddings import TextEncoder, model_registry, encode_texts
+from src.metrics import metrics
+from src.skills import get_vocabulary, cosine_scores, skill_dictionary
+from src.config import settings
+from src.ranking import cascade_survivors
+from src.skill_embeddings import skill_table_for
+from src.roles import role_matrix
+
+# pandas и scikit-learn импортируются при первом вызове: путь «человек — команда» их не использует
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # Функция для получения всех требуемых навыков для команды на основе необходимых ролей
@@ -18,10 +27,8 @@ def get_required_skills(roles: List[str]) -> List[str]:
     Returns:
     List[str]: A list of all required skills for the team.
     """
-    required_skills = []
-    for role in roles:
-        required_skills.extend(role_to_skills_mapping.get(role, []))
-    return list(set(required_skills))  # Убираем дубликаты
+    # Наборы навыков ролей скомпилированы заранее; объединение сразу убирает дубликаты
+    return list(frozenset().union(*(role_matrix.role_skill_sets.get(role, ()) for role in roles)))
 
 # Функция для получения общего списка скиллов команды
 def get_team_skills(team_skills: Dict) -> List[str]:
@@ -50,20 +57,13 @@ def get_filled_roles(team_skills: Dict, required_roles: List[str], threshold: fl
     threshold (float, optional): Minimum percentage of skills that must be matched to consider a role filled. Defaults to 0.45.
 
     Returns:
-    List[str]: A list of roles that are filled in the team.
-    """
-    filled_roles = []
-    team_skills_flat = get_team_skills(team_skills)
-    
-    for role in required_roles:
-        role_skills = role_to_skills_mapping.get(role, [])
-        matched_skills = [skill for skill in role_skills if skill in team_skills_flat]
-        
-        # Если хотя бы threshold % навыков из необходимых для роли совпадают с навыками команды
-        if len(matched_skills) / len(role_skills) >= threshold:
-            filled_roles.append(role)
-    
-    return filled_roles
+    List[str]: A list of roles that are filled in the team. Roles unknown to the mapping are never filled.
+    """
+    # Доли заполненности всех ролей считаются одним умножением на матрицу «роли × навыки»
+    filled = role_matrix.filled_mask([get_team_skills(team_skills)], [required_roles], threshold)[0]
+
+    # Если хотя бы threshold % навыков из необходимых для роли совпадают с навыками команды
+    return [role for role in required_roles if role in role_matrix.role_index and filled[role_matrix.role_index[role]]]
 
 # Функция для расчета схожести на основе Bag of Skills с весом для незаполненных ролей
 def calculate_weighted_similarity(person_skills: List[str], required_skills: List[str], all_skills: List[str], weight: float = 1.0) -> float:
@@ -79,10 +79,15 @@ def calculate_weighted_similarity(person_skills: List[str], required_skills: Lis
     Returns:
     float: Weighted similarity score between the person's skills and required skills.
     """
-    person_vector = np.array([1 if skill in person_skills else 0 for skill in all_skills])
-    required_vector = np.array([1 if skill in required_skills else 0 for skill in all_skills])
-    similarity = cosine_similarity([person_vector], [required_vector])[0][0]
-    return similarity * weight
+    # Проверка принадлежности по множествам: O(|all_skills|) вместо O(|all_skills|·|skills|).
+    # Навыки сравниваются по каноническим именам; повторы в all_skills сохраняются как отдельные измерения
+    canonical = skill_dictionary.canonical
+    person_set, required_set = set(map(canonical, person_skills)), set(map(canonical, required_skills))
+    all_skills = [canonical(skill) for skill in all_skills]
+    person_vector = np.fromiter((skill in person_set for skill in all_skills), dtype=np.float32, count=len(all_skills))
+    required_vector = np.fromiter((skill in required_set for skill in all_skills), dtype=np.float32, count=len(all_skills))
+    similarity = cosine_scores(person_vector.reshape(1, -1), required_vector)[0]
+    return float(similarity) * weight
 
 # Получение эмбеддинга текста
 def get_text_embedding(text, model, tokenizer, device):
@@ -98,16 +103,66 @@ def get_text_embedding(text, model, tokenizer, device):
     Returns:
     numpy.ndarray: A vector representing the text embedding.
     """
-    # Подготовка входного текста для модели
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    inputs = {key: value.to(device) for key, value in inputs.items()}
-    
-    # Генерация эмбеддинга текста без вычисления градиентов
-    with torch.no_grad():
-        outputs = model(**inputs)
-    
-    # Получаем среднее значение эмбеддингов для финального представления текста
-    return outputs.last_hidden_state.mean(dim=1).cpu().numpy()
+    # Одиночный текст — частный случай пакетного кодирования
+    return encode_texts([text], model, tokenizer, device)
+
+# Формирование текста кейса для эмбеддинга
+def build_case_text(case) -> str:
+    """
+    Build the text that represents a case for embedding.
+
+    Args:
+    case: A mapping (dict or DataFrame row) with 'title', 'description' and 'required_roles'.
+
+    Returns:
+    str: Case text in the form "title | description | Required roles: roles".
+    """
+    return case['title'] + " | " + case['description'] + " | Required roles: " + case['required_roles']
+
+# Формирование текста команды для эмбеддинга
+def build_team_text(team_skills: Dict) -> str:
+    """
+    Build the text that represents a team for embedding.
+
+    Args:
+    team_skills (Dict): A dictionary with team members as keys and their skills as values.
+
+    Returns:
+    str: Space-separated unique skills of the team, sorted so that the text is stable between processes.
+    """
+    return " ".join(sorted(get_team_skills(team_skills)))
+
+# Эмбеддинги команд: по тексту команды или пулингом эмбеддингов навыков
+def encode_teams(teams_skills: List[Dict], encoder, texts: List[str] = (), mode: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Embed teams, and other texts with the same encoder.
+
+    Args:
+    teams_skills (List[Dict]): Members and their skills, one dictionary per team.
+    encoder: Text encoder with an `encode(texts)` method.
+    texts (List[str], optional): Other texts to embed, e.g. case texts.
+    mode (str, optional): "text" to run the model on `build_team_text`, "skills" to pool the
+        per-skill embeddings of `skill_table_for(encoder)`. Defaults to DPP_TEAM_EMBEDDING.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: Team embeddings and embeddings of `texts`.
+
+    Raises:
+    ValueError: If the mode is unknown.
+    """
+    mode = mode or settings.team_embedding
+    texts = list(texts)
+    if mode == "text":
+        # Тексты команд и остальные тексты кодируются одним пакетным вызовом
+        embeddings = encoder.encode([build_team_text(team_skills) for team_skills in teams_skills] + texts)
+        return embeddings[:len(teams_skills)], embeddings[len(teams_skills):]
+    if mode == "skills":
+        team_embeddings = skill_table_for(encoder).encode_teams(teams_skills, encoder)
+        # Без остальных текстов модель не нужна вовсе
+        if not texts:
+            return team_embeddings, np.zeros((0, team_embeddings.shape[1]), dtype=np.float32)
+        return team_embeddings, encoder.encode(texts)
+    raise ValueError(f"Unknown team embedding mode: {mode}")
 
 # Вычисление схожести между эмбеддингами кейса и команды
 def compute_similarity(case_embeddings, team_embedding):
@@ -121,6 +176,8 @@ def compute_similarity(case_embeddings, team_embedding):
     Returns:
     numpy.ndarray: Cosine similarity scores between the case and team embeddings.
     """
+    from sklearn.metrics.pairwise import cosine_similarity
+
     # Вычисляем косинусное сходство между эмбеддингами кейсов и команды
     return cosine_similarity(case_embeddings, team_embedding.reshape(1, -1))
 
@@ -136,31 +193,40 @@ def get_case_to_team_recs_by_embedding(team: Dict, df_cases: pd.DataFrame) -> pd
     Returns:
     pd.DataFrame: Original case DataFrame with an additional column for embedding similarity scores.
     """
-    # Загрузка модели и токенизатора для генерации эмбеддингов
-    device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
-    model_path = "intfloat/multilingual-e5-large"
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModel.from_pretrained(model_path).to(device)
-
-    # Формирование текста и эмбеддинга для команды
-    team_skills = get_team_skills(team)
-    team_text = " ".join(team_skills)
-    team_embedding = get_text_embedding(team_text, model, tokenizer, device)
-
-    # Формирование эмбеддингов для каждого кейса
-    case_embeddings = []
-    for _, row in df_cases.iterrows():
-        case_text = row['title'] + " | " + row['description'] + " | Required roles: " + row['required_roles']
-        case_embedding = get_text_embedding(case_text, model, tokenizer, device)
-        case_embeddings.append(case_embedding)
+    # Кодировщик с кэшем: модель загружается один раз на процесс и запускается только для новых текстов
+    encoder = model_registry.get_encoder()
 
     # Вычисление схожести между эмбеддингами кейсов и команды
-    case_embeddings = np.vstack(case_embeddings)
-    similarities = compute_similarity(case_embeddings, team_embedding)
-    df_cases['embedding_similarity'] = similarities
+    with metrics.span("pandas"):
+        cases = df_cases.to_dict(orient="records")
+    similarities = embedding_similarities_to_cases(team, cases, encoder)
+    with metrics.span("pandas"):
+        df_cases['embedding_similarity'] = similarities
 
     return df_cases
 
+# Сходство эмбеддингов команды со списком кейсов
+def embedding_similarities_to_cases(team: Dict, cases: List[Dict], encoder) -> np.ndarray:
+    """
+    Compute the embedding similarity between a team and every case.
+
+    Args:
+    team (Dict): A dictionary with team members as keys and their skills as values.
+    cases (List[Dict]): Cases with 'title', 'description' and 'required_roles'.
+    encoder: Text encoder with an `encode(texts)` method, e.g. from `model_registry.get_encoder()`.
+
+    Returns:
+    np.ndarray: One cosine similarity per case.
+    """
+    # Команда и тексты всех кейсов кодируются одним вызовом
+    with metrics.span("encode"):
+        team_embeddings, case_embeddings = encode_teams([team], encoder, [build_case_text(case) for case in cases])
+    team_embedding = team_embeddings[0]
+    if len(cases) == 0:
+        return np.zeros(0, dtype=np.float32)
+    with metrics.span("cosine_similarity"):
+        return compute_similarity(case_embeddings, team_embedding)[:, 0]
+
 
 # Преобразование набора навыков в бинарный вектор
 def skills_to_vector(skills, all_skills):
@@ -174,8 +240,22 @@ def skills_to_vector(skills, all_skills):
     Returns:
     numpy.ndarray: A binary vector where each position indicates the presence of a skill.
     """
-    # Генерация бинарного вектора: 1, если навык присутствует, иначе 0
-    return np.array([1 if skill in skills else 0 for skill in all_skills])
+    # Генерация бинарного вектора через словарь навыков: 1, если навык присутствует, иначе 0
+    return get_vocabulary(all_skills).encode(skills)
+
+# Набор навыков, покрываемых списком ролей
+def roles_to_skills(roles, role_to_skills_mapping):
+    """
+    Collect the skills covered by a list of roles.
+
+    Args:
+    roles (List[str]): A list of roles.
+    role_to_skills_mapping (Dict): A dictionary mapping roles to associated skills.
+
+    Returns:
+    set: Skills of all the given roles.
+    """
+    return {skill for role in roles for skill in role_to_skills_mapping.get(role, [])}
 
 # Преобразование ролей в бинарный вектор навыков на основе маппинга ролей и навыков
 def roles_to_skills_vector(roles, role_to_skills_mapping, all_skills):
@@ -191,11 +271,7 @@ def roles_to_skills_vector(roles, role_to_skills_mapping, all_skills):
     numpy.ndarray: A binary vector representing the cumulative skills for the given roles.
     """
     # Собираем все навыки для указанных ролей и преобразуем их в вектор
-    all_case_skills = set()
-    for role in roles:
-        role_skills = role_to_skills_mapping.get(role, [])
-        all_case_skills.update(role_skills)
-    return skills_to_vector(all_case_skills, all_skills)
+    return skills_to_vector(roles_to_skills(roles, role_to_skills_mapping), all_skills)
 
 # Преобразование навыков команды в бинарный вектор на основе общего набора навыков
 def team_to_skills_vector(team, all_skills):
@@ -215,6 +291,55 @@ def team_to_skills_vector(team, all_skills):
         all_team_skills.update(skills)
     return skills_to_vector(all_team_skills, all_skills)
 
+# Векторы навыков списка команд одной матрицей
+def team_skill_matrix(teams: List[Dict], all_skills: list = all_skills) -> np.ndarray:
+    """
+    Encode the skills of many teams as binary vectors.
+
+    Args:
+    teams (List[Dict]): Teams with 'skills'.
+    all_skills (list, optional): List of all possible skills.
+
+    Returns:
+    np.ndarray: float32 matrix with one row per team.
+    """
+    return get_vocabulary(all_skills).encode_many(get_team_skills(team['skills']) for team in teams).toarray()
+
+# Эмбеддинги и векторы навыков команд, например для ядра сходства при переранжировании
+def team_vectors(teams: List[Dict], encoder) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the embeddings and binary skill vectors of teams.
+
+    Args:
+    teams (List[Dict]): Teams with 'skills'.
+    encoder: Text encoder with an `encode(texts)` method.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: (embeddings, skill vectors), one row per team.
+    """
+    with metrics.span("encode"):
+        embeddings, _ = encode_teams([team['skills'] for team in teams], encoder)
+    return embeddings, team_skill_matrix(teams)
+
+# Эмбеддинги и векторы навыков кейсов, например для ядра сходства при переранжировании
+def case_vectors(cases: List[Dict], encoder) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the embeddings and binary skill vectors (skills of the required roles) of cases.
+
+    Args:
+    cases (List[Dict]): Cases with 'title', 'description' and 'required_roles'.
+    encoder: Text encoder with an `encode(texts)` method.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: (embeddings, skill vectors), one row per case.
+    """
+    with metrics.span("encode"):
+        embeddings = encoder.encode([build_case_text(case) for case in cases])
+    vocabulary = get_vocabulary(all_skills)
+    skills = vocabulary.encode_many(roles_to_skills(case['required_roles'].split(", "), role_to_skills_mapping)
+                                    for case in cases).toarray()
+    return embeddings, skills
+
 # Рекомендации по кейсам для команды на основе сходства вектора навыков
 def get_case_to_team_recs_by_mapping(team: Dict, df_cases: pd.DataFrame, role_to_skills_mapping: Dict, all_skills: list) -> pd.DataFrame:
     """
@@ -229,21 +354,38 @@ def get_case_to_team_recs_by_mapping(team: Dict, df_cases: pd.DataFrame, role_to
     Returns:
     pd.DataFrame: DataFrame with an additional column for skill similarity scores.
     """
-    # Получаем бинарный вектор навыков команды
-    team_skills_vector = team_to_skills_vector(team, all_skills)
-    similarities = []
-    
-    # Вычисляем сходство навыков между каждым кейсом и командой
-    for _, row in df_cases.iterrows():
-        case_roles = row['required_roles'].split(", ")
-        case_skills_vector = roles_to_skills_vector(case_roles, role_to_skills_mapping, all_skills)
-        similarity = cosine_similarity([case_skills_vector], [team_skills_vector])[0][0]
-        similarities.append(similarity)
-
     # Добавляем столбец со значениями сходства в DataFrame кейсов
-    df_cases['skills_similarity'] = similarities
+    with metrics.span("pandas"):
+        cases = df_cases.to_dict(orient="records")
+    similarities = skill_similarities_to_cases(team, cases, role_to_skills_mapping, all_skills)
+    with metrics.span("pandas"):
+        df_cases['skills_similarity'] = similarities
     return df_cases
 
+# Сходство навыков команды со списком кейсов
+def skill_similarities_to_cases(team: Dict, cases: List[Dict], role_to_skills_mapping: Dict = role_to_skills_mapping,
+                                all_skills: list = all_skills) -> np.ndarray:
+    """
+    Compute the skill vector similarity between a team and every case.
+
+    Args:
+    team (Dict): A dictionary with team members as keys and their skills as values.
+    cases (List[Dict]): Cases with 'required_roles'.
+    role_to_skills_mapping (Dict, optional): A mapping of roles to skills.
+    all_skills (list, optional): A list of all possible skills.
+
+    Returns:
+    np.ndarray: One cosine similarity per case.
+    """
+    # Кодируем команду и все кейсы в одну разреженную матрицу и считаем сходство одной операцией
+    with metrics.span("skill_similarity"):
+        vocabulary = get_vocabulary(all_skills)
+        team_skills_vector = vocabulary.encode(get_team_skills(team))
+        case_matrix = vocabulary.encode_many(
+            roles_to_skills(case['required_roles'].split(", "), role_to_skills_mapping) for case in cases
+        )
+        return cosine_scores(case_matrix, team_skills_vector)
+
 # Вычисление гибридного сходства на основе эмбеддингов и навыков
 def calculate_hybrid_similarity(embedding_similarity, skill_similarity, alpha=0.5, beta=0.5):
     """
@@ -263,39 +405,41 @@ def calculate_hybrid_similarity(embedding_similarity, skill_similarity, alpha=0.
 
 
 # Рекомендации команды для кейса на основе эмбеддингов текста
-def get_team_to_case_recs_by_embedding(case: Dict, teams: Dict, model, tokenizer, device) -> pd.DataFrame:
+def get_team_to_case_recs_by_embedding(case: Dict, teams: Dict, encoder, tokenizer=None, device=None) -> pd.DataFrame:
     """
     Generate team-to-case recommendations based on text embeddings.
 
+    The former call `(case, teams, model, tokenizer, device)` keeps working: with a tokenizer
+    the third argument is taken as the model and wrapped in a `TextEncoder`.
+
     Args:
     case (Dict): A dictionary containing details about the case (title, description, required roles).
     teams (Dict): A dictionary of teams with their IDs, names, and skills.
-    model: Pre-trained embedding model to create text embeddings.
-    tokenizer: Tokenizer for the embedding model.
-    device: Device on which the model is run (CPU or GPU).
+    encoder: Text encoder with an `encode(texts)` method, e.g. from `model_registry.get_encoder()`,
+        or a pre-trained embedding model when `tokenizer` is given.
+    tokenizer (optional): Tokenizer for the model; only for the former call.
+    device (optional): Device on which the model is run; only for the former call.
 
     Returns:
     pd.DataFrame: A DataFrame with team IDs, names, and their embedding similarity scores to the case.
     """
-    # Формируем текст кейса для эмбеддинга
-    case_text = case['title'] + " | " + case['description'] + " | Required roles: " + case['required_roles']
-    case_embedding = get_text_embedding(case_text, model, tokenizer, device)
-    
-    team_embeddings = []
-    # Вычисляем эмбеддинг и схожесть для каждой команды
-    for team_id, team_data in teams.items():
-        team_name = team_data.get('name', f'Team {team_id}')  # Получаем team_name или создаем дефолтное имя
-        team_skills = get_team_skills(team_data['skills'])
-        team_text = " ".join(team_skills)
-        team_embedding = get_text_embedding(team_text, model, tokenizer, device)
-        similarity = compute_similarity(case_embedding, team_embedding)
-        team_embeddings.append({
-            'team_id': int(team_id),  # Приводим к int
-            'team_name': team_name,
-            'embedding_similarity': float(similarity[0][0])  # Приводим к float
-        })
-    
-    return pd.DataFrame(team_embeddings)
+    import pandas as pd
+
+    if tokenizer is not None:
+        encoder = TextEncoder(encoder, tokenizer, device)
+
+    similarities = embedding_similarities_to_teams(case, list(teams.values()), encoder)
+
+    with metrics.span("pandas"):
+        results = []
+        for (team_id, team_data), similarity in zip(teams.items(), similarities):
+            results.append({
+                'team_id': int(team_id),  # Приводим к int
+                'team_name': team_data.get('name', f'Team {team_id}'),  # Получаем team_name или создаем дефолтное имя
+                'embedding_similarity': float(similarity)  # Приводим к float
+            })
+
+        return pd.DataFrame(results, columns=['team_id', 'team_name', 'embedding_similarity'])
 
 # Рекомендации команды для кейса на основе схожести навыков
 def get_team_to_case_recs_by_mapping(case: Dict, teams: Dict, role_to_skills_mapping: Dict, all_skills: list) -> pd.DataFrame:
@@ -311,29 +455,160 @@ def get_team_to_case_recs_by_mapping(case: Dict, teams: Dict, role_to_skills_map
     Returns:
     pd.DataFrame: A DataFrame with team IDs, names, and their skills similarity scores to the case.
     """
-    # Формируем вектор навыков для кейса
-    case_roles = case['required_roles'].split(", ")
-    case_skills_vector = roles_to_skills_vector(case_roles, role_to_skills_mapping, all_skills)
-    
-    similarities = []
-    # Вычисляем схожесть навыков для каждой команды
-    for team_id, team_data in teams.items():
-        team_name = team_data.get('name', f'Team {team_id}')
-        team_skills_vector = team_to_skills_vector(team_data['skills'], all_skills)
-        similarity = cosine_similarity([case_skills_vector], [team_skills_vector])[0][0]
-        similarities.append({
-            'team_id': int(team_id),  # Приводим к int
-            'team_name': team_name,
-            'skills_similarity': float(similarity)  # Приводим к float
-        })
-    
-    return pd.DataFrame(similarities)
+    import pandas as pd
+
+    scores = skill_similarities_to_teams(case, list(teams.values()), role_to_skills_mapping, all_skills)
+
+    with metrics.span("pandas"):
+        similarities = []
+        for (team_id, team_data), similarity in zip(teams.items(), scores):
+            similarities.append({
+                'team_id': int(team_id),  # Приводим к int
+                'team_name': team_data.get('name', f'Team {team_id}'),
+                'skills_similarity': float(similarity)  # Приводим к float
+            })
+
+        return pd.DataFrame(similarities)
+
+# Сходство эмбеддингов кейса со списком команд
+def embedding_similarities_to_teams(case: Dict, teams: List[Dict], encoder) -> np.ndarray:
+    """
+    Compute the embedding similarity between a case and every team.
+
+    Args:
+    case (Dict): A dictionary with the case 'title', 'description' and 'required_roles'.
+    teams (List[Dict]): Teams with 'skills'.
+    encoder: Text encoder with an `encode(texts)` method, e.g. from `model_registry.get_encoder()`.
+
+    Returns:
+    np.ndarray: One cosine similarity per team.
+    """
+    # Текст кейса и все команды кодируются одним вызовом
+    with metrics.span("encode"):
+        team_embeddings, case_embeddings = encode_teams([team_data['skills'] for team_data in teams], encoder,
+                                                        [build_case_text(case)])
+    case_embedding = case_embeddings[0]
+    if len(teams) == 0:
+        return np.zeros(0, dtype=np.float32)
+    with metrics.span("cosine_similarity"):
+        return compute_similarity(team_embeddings, case_embedding)[:, 0]
+
+# Сходство навыков кейса со списком команд
+def skill_similarities_to_teams(case: Dict, teams: List[Dict], role_to_skills_mapping: Dict = role_to_skills_mapping,
+                                all_skills: list = all_skills) -> np.ndarray:
+    """
+    Compute the skill vector similarity between a case and every team.
+
+    Args:
+    case (Dict): A dictionary with the case 'required_roles'.
+    teams (List[Dict]): Teams with 'skills'.
+    role_to_skills_mapping (Dict, optional): Mapping of roles to required skills.
+    all_skills (list, optional): List of all possible skills.
+
+    Returns:
+    np.ndarray: One cosine similarity per team.
+    """
+    # Кодируем кейс и все команды в одну разреженную матрицу и считаем сходство одной операцией
+    with metrics.span("skill_similarity"):
+        vocabulary = get_vocabulary(all_skills)
+        case_roles = case['required_roles'].split(", ")
+        case_skills_vector = vocabulary.encode(roles_to_skills(case_roles, role_to_skills_mapping))
+        team_matrix = vocabulary.encode_many(get_team_skills(team_data['skills']) for team_data in teams)
+        return cosine_scores(team_matrix, case_skills_vector)
+
+# Гибридные оценки кейсов для команды в виде массивов, без DataFrame
+def score_cases_for_team(team: Dict, cases: List[Dict], alpha=0.5, beta=0.5):
+    """
+    Score cases for a team with the hybrid similarity, returning plain arrays.
+
+    Args:
+    team (Dict): A dictionary with team members as keys and their skills as values.
+    cases (List[Dict]): Cases with 'title', 'description' and 'required_roles'.
+    alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+    beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray]: Embedding, skills and hybrid similarity per case.
+    """
+    embedding_similarity = embedding_similarities_to_cases(team, cases, model_registry.get_encoder())
+    skills_similarity = skill_similarities_to_cases(team, cases)
+    return embedding_similarity, skills_similarity, calculate_hybrid_similarity(embedding_similarity, skills_similarity, alpha, beta)
+
+# Гибридные оценки команд для кейса в виде массивов, без DataFrame
+def score_teams_for_case(case: Dict, teams: List[Dict], alpha=0.5, beta=0.5):
+    """
+    Score teams for a case with the hybrid similarity, returning plain arrays.
+
+    Args:
+    case (Dict): A dictionary containing details about the case.
+    teams (List[Dict]): Teams with 'skills'.
+    alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+    beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray]: Embedding, skills and hybrid similarity per team.
+    """
+    embedding_similarity = embedding_similarities_to_teams(case, teams, model_registry.get_encoder())
+    skills_similarity = skill_similarities_to_teams(case, teams)
+    return embedding_similarity, skills_similarity, calculate_hybrid_similarity(embedding_similarity, skills_similarity, alpha, beta)
+
+# Каскад: сходство навыков для всех кейсов, эмбеддинги — только для прошедших первую ступень
+def score_cases_for_team_cascade(team: Dict, cases: List[Dict], alpha=0.5, beta=0.5, max_candidates: int = None,
+                                 min_skill_similarity: float = None):
+    """
+    Score cases for a team in two stages: skill similarity for every case, then embeddings only for the survivors.
+
+    Args:
+    team (Dict): A dictionary with team members as keys and their skills as values.
+    cases (List[Dict]): Cases with 'title', 'description' and 'required_roles'.
+    alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+    beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+    max_candidates (int, optional): Number of cases with the best skill similarity that are embedded.
+    min_skill_similarity (float, optional): Skill similarity below which a case is not embedded.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Indices of the surviving cases, and their
+    embedding, skills and hybrid similarity.
+    """
+    skills_similarity = skill_similarities_to_cases(team, cases)
+    survivors = cascade_survivors(skills_similarity, max_candidates, min_skill_similarity)
+    embedding_similarity = embedding_similarities_to_cases(team, [cases[i] for i in survivors], model_registry.get_encoder())
+    skills_similarity = skills_similarity[survivors]
+    return survivors, embedding_similarity, skills_similarity, calculate_hybrid_similarity(embedding_similarity, skills_similarity, alpha, beta)
+
+# Каскад: сходство навыков для всех команд, эмбеддинги — только для прошедших первую ступень
+def score_teams_for_case_cascade(case: Dict, teams: List[Dict], alpha=0.5, beta=0.5, max_candidates: int = None,
+                                 min_skill_similarity: float = None):
+    """
+    Score teams for a case in two stages: skill similarity for every team, then embeddings only for the survivors.
+
+    Args:
+    case (Dict): A dictionary containing details about the case.
+    teams (List[Dict]): Teams with 'skills'.
+    alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
+    beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+    max_candidates (int, optional): Number of teams with the best skill similarity that are embedded.
+    min_skill_similarity (float, optional): Skill similarity below which a team is not embedded.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Indices of the surviving teams, and their
+    embedding, skills and hybrid similarity.
+    """
+    skills_similarity = skill_similarities_to_teams(case, teams)
+    survivors = cascade_survivors(skills_similarity, max_candidates, min_skill_similarity)
+    embedding_similarity = embedding_similarities_to_teams(case, [teams[i] for i in survivors], model_registry.get_encoder())
+    skills_similarity = skills_similarity[survivors]
+    return survivors, embedding_similarity, skills_similarity, calculate_hybrid_similarity(embedding_similarity, skills_similarity, alpha, beta)
 
 # Гибридные рекомендации команды для кейса
-def get_team_to_case_recs(case: Dict, teams: Dict, role_to_skills_mapping: Dict, all_skills: list, alpha=0.5, beta=0.5) -> pd.DataFrame:
+def get_team_to_case_recs(case: Dict, teams: Dict, role_to_skills_mapping: Dict, all_skills: list, alpha=0.5, beta=0.5,
+                          max_candidates: int = None, min_skill_similarity: float = None) -> pd.DataFrame:
     """
     Generate team-to-case recommendations based on hybrid similarity (embedding and skill-based).
 
+    With `max_candidates` or `min_skill_similarity` the recommendations are a cascade: every team is
+    scored by skills, and only the surviving teams are embedded and included in the result.
+
     Args:
     case (Dict): A dictionary containing details about the case.
     teams (Dict): A dictionary of teams with their IDs, names, and skills.
@@ -341,30 +616,36 @@ def get_team_to_case_recs(case: Dict, teams: Dict, role_to_skills_mapping: Dict,
     all_skills (list): List of all possible skills.
     alpha (float, optional): Weight for embedding similarity. Defaults to 0.5.
     beta (float, optional): Weight for skills similarity. Defaults to 0.5.
+    max_candidates (int, optional): Number of teams with the best skill similarity that are embedded.
+    min_skill_similarity (float, optional): Skill similarity below which a team is not embedded.
 
     Returns:
     pd.DataFrame: A DataFrame sorted by hybrid similarity with team IDs, names, and their scores.
     """
-    device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
-    model_path = "intfloat/multilingual-e5-large"
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModel.from_pretrained(model_path).to(device)
-    
-    # Получаем рекомендации по эмбеддингам
-    df_embedding = get_team_to_case_recs_by_embedding(case, teams, model, tokenizer, device)
-    
+    import pandas as pd
+
+    encoder = model_registry.get_encoder()
+
     # Получаем рекомендации по маппингу навыков
     df_mapping = get_team_to_case_recs_by_mapping(case, teams, role_to_skills_mapping, all_skills)
-    
-    # Объединяем результаты и вычисляем гибридное сходство
-    df_hybrid = pd.merge(df_embedding, df_mapping, on=['team_id', 'team_name'])
-    df_hybrid['hybrid_similarity'] = calculate_hybrid_similarity(
-        df_hybrid['embedding_similarity'],
-        df_hybrid['skills_similarity'],
-        alpha,
-        beta
-    ).astype(float)  # Приводим к float для надежности
-    
-    return df_hybrid.sort_values(by='hybrid_similarity', ascending=False)
 
+    # В режиме каскада эмбеддинги считаются только для команд, прошедших отбор по навыкам
+    if max_candidates is not None or min_skill_similarity is not None:
+        survivors = cascade_survivors(df_mapping['skills_similarity'].to_numpy(), max_candidates, min_skill_similarity)
+        team_ids = list(teams)
+        teams = {team_ids[i]: teams[team_ids[i]] for i in survivors}
+
+    # Получаем рекомендации по эмбеддингам
+    df_embedding = get_team_to_case_recs_by_embedding(case, teams, encoder)
 
+    # Объединяем результаты и вычисляем гибридное сходство
+    with metrics.span("pandas"):
+        df_hybrid = pd.merge(df_embedding, df_mapping, on=['team_id', 'team_name'])
+        df_hybrid['hybrid_similarity'] = calculate_hybrid_similarity(
+            df_hybrid['embedding_similarity'],
+            df_hybrid['skills_similarity'],
+            alpha,
+            beta
+        ).astype(float)  # Приводим к float для надежности
+
+        return df_hybrid.sort_values(by='hybrid_similarity', ascending=False)
@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from src.config import settings
+from src.metrics import metrics
+
+
+# Пул переполнен: запрос отклоняется сразу, чтобы не копить очередь
+class WorkerPoolSaturated(Exception):
+    """
+    Raised when the inference pool already holds as many tasks as it can queue.
+    """
+
+
+# Задача не завершилась за отведенное время
+class WorkerTimeout(Exception):
+    """
+    Raised when a task does not finish within the pool's per-request timeout.
+    """
+
+
+# Ограниченный пул потоков для блокирующих вычислений (torch, NumPy)
+class InferencePool:
+    """
+    Bounded thread pool that runs blocking scoring and inference code off the asyncio event loop.
+
+    At most `max_workers` tasks run at once and at most `max_queue` more wait for a worker;
+    further submissions fail immediately with `WorkerPoolSaturated`. A caller stops waiting
+    after `timeout` seconds with `WorkerTimeout`; the task itself keeps its slot until it
+    actually finishes, so the reported queue depth reflects the real load.
+
+    Attributes:
+    max_workers (int): Number of worker threads.
+    max_queue (int): Number of tasks allowed to wait for a worker.
+    timeout (float): Seconds a caller waits for its result.
+    """
+
+    def __init__(self, max_workers: int = settings.inference_workers, max_queue: int = settings.inference_queue_size,
+                 timeout: float = settings.inference_timeout, torch_threads: int = settings.torch_threads):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.torch_threads = torch_threads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def configure_torch(self) -> None:
+        """
+        Limit torch intra-op threads so that the workers together do not oversubscribe the CPU.
+        """
+        if self.torch_threads > 0:
+            import torch
+
+            torch.set_num_threads(self.torch_threads)
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Run a blocking function in the pool and wait for its result.
+
+        Args:
+        fn (Callable): Function to run.
+        *args: Positional arguments for `fn`.
+        **kwargs: Keyword arguments for `fn`.
+
+        Returns:
+        The return value of `fn`; exceptions raised by `fn` propagate to the caller.
+
+        Raises:
+        WorkerPoolSaturated: If the pool and its queue are full.
+        WorkerTimeout: If the result is not ready within `timeout` seconds.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise WorkerPoolSaturated()
+            self._in_flight += 1
+
+        # Контекст вызывающего передается в поток, чтобы этапы попали в тайминги запроса
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, self._timed, functools.partial(fn, *args, **kwargs),
+                                       time.perf_counter())
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise WorkerTimeout()
+
+    @staticmethod
+    def _timed(fn: Callable, submitted_at: float):
+        metrics.record_stage("queue_wait", time.perf_counter() - submitted_at)
+        with metrics.span("compute"):
+            return fn()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the current load of the pool.
+
+        Returns:
+        Dict[str, int]: Running and queued tasks, and counters of rejected and timed-out requests.
+        """
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "workers": self.max_workers,
+            "running": min(in_flight, self.max_workers),
+            "queued": max(0, in_flight - self.max_workers),
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting tasks and drop the ones that have not started yet.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+inference_pool = InferencePool()
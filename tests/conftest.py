@@ -0,0 +1,21 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import HashingEncoder
+from main import app
+from src.catalogue import catalogue
+from src.embeddings import model_registry
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+# Заглушка модели эмбеддингов: тестам эндпоинтов не нужна загрузка e5
+@pytest.fixture
+def stub_encoder(monkeypatch):
+    encoder = HashingEncoder()
+    monkeypatch.setattr(model_registry, "get_encoder", lambda model_path=None: encoder)
+    monkeypatch.setattr(catalogue, "_encoder_factory", lambda: encoder)
+    return encoder
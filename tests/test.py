@@ -3,6 +3,8 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app  # Импортируем FastAPI приложение
+from src.catalogue import catalogue
+from src.ingest import ingest_queue
 
 client = TestClient(app)
 
@@ -220,4 +222,9 @@ def test_receive_new_data():
     assert returned_data["case_description"] == "This is a test case description"
     assert returned_data["user_fio"] == "John Doe"
     assert returned_data["person_skills"] == ["Python", "Data Science", "DevOps"]
-    assert returned_data["case_required_roles"] == ["Backend Developer", "Тестировщик"]
\ No newline at end of file
+    assert returned_data["case_required_roles"] == ["Backend Developer", "Тестировщик"]
+
+    # Событие применяется к каталогу в фоне
+    ingest_queue.flush()
+    assert catalogue.teams[1]["skills"]["John Doe"] == ["Python", "Data Science", "DevOps"]
+    assert catalogue.cases[1]["required_roles"] == "Backend Developer, Тестировщик"
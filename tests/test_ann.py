@@ -0,0 +1,61 @@
+import numpy as np
+
+from src.ann import ExactIndex, IVFFlatIndex
+from src.catalogue import VectorIndex, normalize_rows
+
+
+def test_ivf_index_with_all_lists_probed_matches_exact():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+
+    exact_ids, exact_scores = ExactIndex().build(vectors).search(query, 10)
+    ivf_ids, ivf_scores = IVFFlatIndex(n_lists=8, n_probe=8).build(vectors).search(query, 10)
+    assert ivf_ids.tolist() == exact_ids.tolist()
+    assert np.allclose(ivf_scores, exact_scores)
+
+
+def test_indexes_update_in_place_like_a_rebuild():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    replaced = rng.standard_normal((50, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+    exact, ivf = ExactIndex().build(vectors[:200]), IVFFlatIndex(n_lists=4, n_probe=4).build(vectors[:200])
+
+    # Вставка новых строк, замена и удаление части старых без перестроения
+    current = dict(enumerate(vectors[:200]))
+    for index in (exact, ivf):
+        index.upsert(np.arange(200, 300), vectors[200:])
+        index.upsert(np.arange(0, 50), replaced)
+        index.remove(np.arange(50, 120))
+    current.update(enumerate(vectors[200:], start=200))
+    current.update(enumerate(replaced))
+    for row in range(50, 120):
+        del current[row]
+
+    ids = np.array(sorted(current))
+    reference = ids[ExactIndex().build(np.array([current[row] for row in ids])).search(query, 10)[0]]
+    assert len(exact) == len(ivf) == len(current)
+    assert exact.search(query, 10)[0].tolist() == reference.tolist()
+    assert ivf.search(query, 10)[0].tolist() == reference.tolist()
+
+
+def test_vector_index_keeps_its_ann_index_across_changes():
+    rng = np.random.default_rng(2)
+    index = VectorIndex(n_skills=2, ann_backend="ivf", n_lists=4, n_probe=4)
+    for entity_id in range(100):
+        index.upsert(entity_id, f"text {entity_id}", np.zeros(2, dtype=np.float32))
+    index.store_embeddings(index.stale_items(), rng.standard_normal((100, 8)))
+    query = rng.standard_normal(8).astype(np.float32)
+    index.nearest(query, 5)
+    ann = index._ann
+
+    for entity_id in range(0, 100, 3):
+        index.remove(entity_id)
+    index.upsert(500, "new text", np.zeros(2, dtype=np.float32))
+    index.store_embeddings(index.stale_items(), query.reshape(1, -1))
+    rows = index.nearest(query, 5)
+    assert index._ann is ann
+    assert index.ids[rows[0]] == 500
+    expected = np.argsort(-(index.embeddings[:len(index)] @ normalize_rows(query)), kind="stable")[:5]
+    assert sorted(rows.tolist()) == sorted(expected.tolist())
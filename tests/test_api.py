@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+from src.catalogue import catalogue
+from src.ingest import ingest_queue
+
+
+def test_recommend_team_to_person_top_k(client):
+    teams = [
+        {"team_id": i, "name": f"Team {i}", "skills": {"A": skills}, "required_roles": []}
+        for i, skills in enumerate([["Python"], ["Python", "SQL"], ["Figma"], ["Python", "SQL", "Docker"]])
+    ]
+    response = client.post(
+        "/recommend_team_to_person",
+        json={"person_skills": ["Python"], "teams": teams, "top_k": 2}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [team["team_id"] for team in body["recommended_teams"]] == [0, 1]
+    assert "threshold" in body
+
+
+def test_skill_paths_import_without_embedding_stack():
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('torch', 'transformers', 'pandas', 'sklearn') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={**os.environ, "DPP_CATALOGUE_DIR": "", "DPP_WARMUP_ON_STARTUP": "0"})
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_new_data_stores_canonical_skills(client):
+    event = {"team_id": 401, "team_title": "Team 401", "case_title": "Case 401", "case_description": "d",
+             "user_fio": "Anna", "person_skills": ["k8s", " python "], "case_required_roles": ["Аналитик"]}
+    response = client.post("/new_data", json=event)
+    assert response.json()["data"]["person_skills"] == ["Kubernetes", "Python"]
+    ingest_queue.flush()
+    assert catalogue.teams[401]["skills"]["Anna"] == ["Kubernetes", "Python"]
+    client.delete("/teams/401")
+    client.delete("/cases/401")
+
+
+def test_confidence_percentile_out_of_range_is_rejected(client):
+    response = client.post("/recommend_team_to_person", json={"person_skills": ["Python"], "teams": [],
+                                                               "confidence_percentile": 1.5})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "confidence_percentile"]
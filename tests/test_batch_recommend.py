@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from src.batch_recommend import load_teams, run
+from src.roles import score_teams_for_person
+
+
+def test_batch_recommend_users_matches_api_scoring(tmp_path):
+    (tmp_path / "teams.csv").write_text(
+        "team_id;name;member;skills;required_roles\n"
+        "1;Alpha;Ivan;Python|SQL|Docker;ML engineer, Аналитик\n"
+        "1;Alpha;Olga;Figma;ML engineer, Аналитик\n"
+        "2;Beta;Petr;C#|SQL|Git;C# Backend\n"
+        "3;Gamma;Anna;React|CSS|HTML;\n",
+        encoding="utf-8",
+    )
+    users = {0: ["Python", "SQL"], 1: ["C#", "Git"], 2: ["Figma"], 3: ["React", "HTML", "Python"]}
+    (tmp_path / "users.csv").write_text(
+        "user_id;skills\n" + "".join(f"{user_id};{'|'.join(skills)}\n" for user_id, skills in users.items()),
+        encoding="utf-8",
+    )
+
+    rows = run("teams-for-users", str(tmp_path / "users.csv"), str(tmp_path / "teams.csv"),
+               str(tmp_path / "out.csv"), chunk_size=3, top_k=2)
+    output = pd.read_csv(tmp_path / "out.csv", sep=";")
+    assert rows == len(output) == 2 * len(users)
+
+    teams = load_teams(str(tmp_path / "teams.csv"))
+    for user_id, skills in users.items():
+        scores = score_teams_for_person(skills, teams)
+        best = output[output["user_id"] == user_id].sort_values("rank")
+        assert np.allclose(best["similarity"], np.sort(scores)[::-1][:2])
+
+
+def test_batch_recommend_cases_is_independent_of_block_size(tmp_path, stub_encoder):
+    (tmp_path / "teams.csv").write_text(
+        "team_id;name;member;skills;required_roles\n"
+        "1;Alpha;Ivan;Python|SQL;\n"
+        "2;Beta;Petr;C#|SQL|Git;\n"
+        "3;Gamma;Anna;Figma;\n",
+        encoding="utf-8",
+    )
+    roles = ["C# Backend", "Дизайнер", "ML engineer", "Аналитик"]
+    (tmp_path / "cases.csv").write_text(
+        "id;title;description;required_roles\n" + "".join(f"{i};Case {i};d;{roles[i % 4]}\n" for i in range(7)),
+        encoding="utf-8",
+    )
+
+    outputs = []
+    for block_size in (2, 256):
+        path = tmp_path / f"out_{block_size}.csv"
+        run("teams-for-cases", str(tmp_path / "cases.csv"), str(tmp_path / "teams.csv"), str(path),
+            chunk_size=5, top_k=2, block_size=block_size)
+        outputs.append(pd.read_csv(path, sep=";"))
+    assert len(outputs[0]) == 7 * 2
+    pd.testing.assert_frame_equal(outputs[0], outputs[1])
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+
+from src.batching import MicroBatcher
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+    batcher = MicroBatcher(encode, max_batch_size=100, max_wait_ms=200)
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def worker(n):
+        texts = ["x" * (n + 1)] * (n + 1)
+        barrier.wait()
+        results[n] = batcher.encode(texts)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) < 4
+    for n, embeddings in results.items():
+        assert embeddings.shape == (n + 1, 1)
+        assert (embeddings == n + 1).all()
+    assert batcher.stats()["submissions"] == 4
+
+
+def test_micro_batcher_returns_empty_array_without_running_the_model():
+    def encode(texts):
+        raise AssertionError("the model must not run")
+
+    assert MicroBatcher(encode, dim=lambda: 4).encode([]).shape == (0, 4)
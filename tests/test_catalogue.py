@@ -0,0 +1,87 @@
+import inspect
+import threading
+
+import numpy as np
+import pytest
+
+from src.catalogue import Catalogue, CommitError, catalogue
+
+
+def test_catalogue_recommendations_by_id(client, monkeypatch):
+    class LengthEncoder:
+        def encode(self, texts):
+            return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr(catalogue, "_encoder_factory", LengthEncoder)
+    client.post("/teams", json={"team_id": 101, "name": "Stored team", "skills": {"A": ["C#", "SQL", "Git"]}})
+    client.post("/cases", json={"id": 201, "title": "Stored case", "description": "d", "required_roles": "C# Backend"})
+    client.post("/cases", json={"id": 202, "title": "Other case", "description": "d", "required_roles": "Дизайнер"})
+
+    response = client.post("/recommend_case_to_team", json={"team_id": 101, "confidence_percentile": 0.0})
+    assert response.status_code == 200
+    case_ids = [case["id"] for case in response.json()["recommended_cases"]]
+    assert case_ids.index(201) < case_ids.index(202)
+
+    response = client.post("/recommend_case_to_team", json={"team_id": 101, "retrieve_k": 1, "confidence_percentile": 0.0})
+    assert len(response.json()["recommended_cases"]) == 1
+
+    response = client.post("/recommend_team_to_case", json={"case_id": 201, "confidence_percentile": 0.0})
+    assert response.status_code == 200
+    assert 101 in [team["team_id"] for team in response.json()["recommended_teams"]]
+
+    assert client.delete("/cases/202").status_code == 200
+    assert client.get("/cases/202").status_code == 404
+    assert client.post("/recommend_case_to_team", json={"team_id": 999}).status_code == 404
+
+
+def test_catalogue_changes_do_not_wait_for_the_encoder():
+    started, release = threading.Event(), threading.Event()
+
+    class BlockingEncoder:
+        def encode(self, texts):
+            started.set()
+            release.wait(5)
+            return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    stored = Catalogue(encoder_factory=BlockingEncoder, team_embedding="text")
+    stored.upsert_case({"id": 1, "title": "Case", "description": "d", "required_roles": "C# Backend"})
+    team = {"team_id": 1, "name": "Team", "skills": {"A": ["C#"]}}
+    scoring = threading.Thread(target=stored.score_cases, args=(team,))
+    scoring.start()
+    assert started.wait(5)
+
+    # Пока модель занята, изменения и чтение каталога не ждут ее
+    stored.upsert_case({"id": 2, "title": "Other", "description": "d", "required_roles": "Дизайнер"})
+    assert [case["id"] for case in stored.list_cases()] == [1, 2]
+    assert scoring.is_alive()
+    release.set()
+    scoring.join(5)
+    assert not scoring.is_alive()
+
+    ids, embedding_similarity, _, _, scored = stored.score_cases(team)
+    assert sorted(ids.tolist()) == [1, 2] and np.all(embedding_similarity > 0)
+    # Оцененные кейсы возвращаются вместе с оценками и доступны, даже если кейс сразу удалили
+    stored.delete_case(1)
+    assert [case["id"] for case in scored] == ids.tolist()
+
+
+def test_new_data_does_not_overwrite_a_case_from_cases_endpoint():
+    event = {"team_id": 5, "team_title": "Team 5", "case_title": "From event", "case_description": "d",
+             "user_fio": "Anna", "person_skills": ["Python"], "case_required_roles": ["Аналитик"]}
+    stored = Catalogue()
+    stored.apply_new_data(event)
+    stored.apply_new_data({**event, "case_title": "Updated by event"})
+    assert stored.cases[5]["title"] == "Updated by event"
+
+    stored.upsert_case({"id": 6, "title": "Manual", "description": "d", "required_roles": "Дизайнер"})
+    with pytest.raises(CommitError, match="created through /cases"):
+        stored.apply_new_data({**event, "team_id": 6})
+    assert stored.cases[6]["title"] == "Manual" and 6 not in stored.teams
+
+
+def test_catalogue_writes_run_off_the_event_loop():
+    import main
+
+    # Запись в журнал с fsync идет в пуле потоков FastAPI, а не в цикле событий
+    for handler in (main.upsert_team, main.delete_team, main.upsert_case, main.delete_case):
+        assert not inspect.iscoroutinefunction(handler)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from src.codec import dumps, loads
+
+
+def test_fast_json_codec_keeps_fastapi_errors_and_encodes_numpy(client):
+    assert loads(dumps({"scores": np.array([0.5, 0.25], dtype=np.float32), "top": np.int64(3)})) == \
+        {"scores": [0.5, 0.25], "top": 3}
+
+    invalid = client.post("/recommend_team_to_person", content=b'{"person_skills": [',
+                          headers={"Content-Type": "application/json"})
+    assert invalid.status_code == 422 and invalid.json()["detail"][0]["type"] == "json_invalid"
+
+    missing = client.post("/recommend_team_to_person", json={"teams": []})
+    assert missing.status_code == 422
+    assert missing.json()["detail"][0]["loc"] == ["body", "person_skills"]
+
+    body = {"person_skills": ["Python"], "top_k": 1,
+            "teams": [{"team_id": 1, "name": "Команда 1", "skills": {"A": ["Python"]}, "required_roles": []}]}
+    response = client.post("/recommend_team_to_person", json=body)
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["recommended_teams"][0]["team_name"] == "Команда 1"
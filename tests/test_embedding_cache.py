@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache, CachedEncoder
+from src.embeddings import EmbeddingModelRegistry
+
+
+def test_embedding_cache_survives_restart_and_skips_encoder(tmp_path):
+    class CountingEncoder:
+        calls = 0
+
+        def encode(self, texts):
+            CountingEncoder.calls += len(texts)
+            return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    path = str(tmp_path / "embeddings.sqlite")
+    encoder = CachedEncoder("model", EmbeddingCache(1024, path), CountingEncoder)
+    first = encoder.encode(["Python  Docker", "SQL", "Python Docker"])
+    assert CountingEncoder.calls == 2
+
+    restarted = CachedEncoder("model", EmbeddingCache(1024, path), CountingEncoder)
+    second = restarted.encode(["SQL", "Python Docker"])
+    assert CountingEncoder.calls == 2
+    assert np.allclose(second, first[[1, 0]])
+    assert restarted.cache.stats()["disk_hits"] == 2
+
+
+def test_cached_encoder_returns_empty_array_without_loading_the_model():
+    def factory():
+        raise AssertionError("the model must not be loaded")
+
+    encoder = CachedEncoder("model", EmbeddingCache(1024), factory, dim=lambda: 3)
+    assert encoder.encode([]).shape == (0, 3)
+
+
+def test_registry_keeps_one_cached_encoder_per_model(monkeypatch):
+    registry = EmbeddingModelRegistry("model", "cpu", cache=EmbeddingCache(1024), batch_max_wait_ms=0)
+    lookups = []
+    monkeypatch.setattr(registry, "embedding_dim", lambda model_path=None: lookups.append(model_path) or 3)
+
+    # Размерность запоминается в кодировщике, и он один на модель: конфигурация читается один раз
+    assert registry.get_encoder() is registry.get_encoder()
+    assert registry.get_encoder().encode([]).shape == (0, 3)
+    assert registry.get_encoder().encode([]).shape == (0, 3)
+    assert lookups == ["model"]
+    assert registry.get_encoder("other") is not registry.get_encoder()
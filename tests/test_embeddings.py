@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.config import settings  # noqa: E402
+from src.embeddings import EmbeddingModelRegistry, masked_mean_pool  # noqa: E402
+from src.export_encoder import rowwise_cosine  # noqa: E402
+
+
+def test_masked_mean_pool_ignores_padding():
+    hidden = torch.tensor([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+    mask = torch.tensor([[1, 1, 0]])
+    pooled = masked_mean_pool(hidden, mask)
+    assert torch.allclose(pooled, torch.tensor([[2.0, 3.0]]))
+
+
+def test_int8_backend_agrees_with_fp32():
+    texts = ["Python developer", "Карта повреждений территорий | ML engineer, CV engineer"]
+    fp32 = EmbeddingModelRegistry(settings.embedding_model_path, "cpu", batch_max_wait_ms=0)
+    int8 = EmbeddingModelRegistry(settings.embedding_model_path, "cpu", batch_max_wait_ms=0, backend="torch-int8")
+
+    assert int8.model_id() != fp32.model_id()
+    cosine = rowwise_cosine(fp32.get_encoder().encode(texts), int8.get_encoder().encode(texts))
+    assert np.all(cosine > 0.95)
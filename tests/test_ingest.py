@@ -0,0 +1,62 @@
+from src.catalogue import CommitError
+from src.ingest import IngestQueue
+
+
+def test_ingest_retries_failed_batches_and_keeps_dead_letters():
+    class FlakyCatalogue:
+        def __init__(self):
+            self.applied, self.batch_failures = [], 1
+
+        def apply_new_data_batch(self, events):
+            if self.batch_failures or any(event["team_id"] < 0 for event in events):
+                self.batch_failures = max(0, self.batch_failures - 1)
+                raise RuntimeError("journal unavailable")
+            self.applied.extend(event["team_id"] for event in events)
+
+        def apply_new_data(self, event):
+            self.apply_new_data_batch([event])
+
+        def refresh_embeddings(self):
+            return 0
+
+    # Первый сбой проходит при повторе
+    target = FlakyCatalogue()
+    ingest = IngestQueue(target, batch_size=10, max_delay_ms=50, retries=2, retry_delay_ms=1)
+    ingest.submit({"team_id": 1})
+    ingest.flush()
+    assert target.applied == [1]
+    assert ingest.stats()["retried"] == 1 and ingest.dead_letters() == []
+
+    # Событие, которое падает всегда, уходит в dead letters, остальные применяются
+    for team_id in (2, -1, 3):
+        ingest.submit({"team_id": team_id})
+    ingest.flush()
+    assert sorted(target.applied) == [1, 2, 3]
+    assert [letter["event"] for letter in ingest.dead_letters()] == [{"team_id": -1}]
+    assert "journal unavailable" in ingest.dead_letters()[0]["error"]
+    assert ingest.stats()["dead_letters"] == 1
+
+
+def test_ingest_dead_letters_rejected_events_without_retrying_the_batch():
+    class RejectingCatalogue:
+        def __init__(self):
+            self.logged = []
+
+        def apply_new_data_batch(self, events):
+            failures = [(i, ValueError("bad event")) for i, event in enumerate(events) if event["team_id"] < 0]
+            self.logged.extend(event["team_id"] for event in events if event["team_id"] >= 0)
+            if failures:
+                raise CommitError(failures)
+
+        def refresh_embeddings(self):
+            return 0
+
+    target = RejectingCatalogue()
+    ingest = IngestQueue(target, batch_size=10, max_delay_ms=50, retries=3, retry_delay_ms=1)
+    for team_id in (1, -1, 2):
+        ingest.submit({"team_id": team_id})
+    ingest.flush()
+    # Применившиеся события записаны ровно один раз
+    assert target.logged == [1, 2]
+    assert [letter["event"] for letter in ingest.dead_letters()] == [{"team_id": -1}]
+    assert ingest.stats()["retried"] == 0 and ingest.stats()["events"] == 2
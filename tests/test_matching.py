@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+
+from src.matching import MatchMatrix
+from src.utils import calculate_hybrid_similarity, embedding_similarities_to_teams, skill_similarities_to_teams
+
+
+def test_match_matrix_streams_top_k_per_case_and_team(client, stub_encoder):
+    class LengthEncoder:
+        def encode(self, texts):
+            return np.array([[len(text) % 7, len(text) % 5 + 1.0] for text in texts], dtype=np.float32)
+
+    roles = ["C# Backend", "Дизайнер", "ML engineer", "Аналитик"]
+    cases = [{"id": i, "title": f"Case {i}" * (i % 3 + 1), "description": "d" * i,
+              "required_roles": ", ".join(roles[i % 4:i % 4 + 2])} for i in range(7)]
+    teams = [{"team_id": 100 + j, "name": f"Team {j}", "skills": {"A": [["C#", "SQL"], ["Figma"], ["Python"]][j]}}
+             for j in range(3)]
+
+    records = list(MatchMatrix(cases, teams, LengthEncoder()).iter_results(0.6, 0.4, top_k=2, block_size=3))
+    full = np.vstack([
+        calculate_hybrid_similarity(embedding_similarities_to_teams(case, teams, LengthEncoder()),
+                                    skill_similarities_to_teams(case, teams), 0.6, 0.4)
+        for case in cases
+    ])
+    assert [record["type"] for record in records] == ["case"] * 7 + ["team"] * 3
+    for record in records[:7]:
+        scores = [team["hybrid_similarity"] for team in record["teams"]]
+        assert np.allclose(scores, np.sort(full[record["id"]])[::-1][:2], atol=1e-5)
+    for record in records[7:]:
+        scores = [case["hybrid_similarity"] for case in record["cases"]]
+        assert np.allclose(scores, np.sort(full[:, record["team_id"] - 100])[::-1][:2], atol=1e-5)
+
+    response = client.post("/match_matrix", json={"cases": cases[:2], "teams": teams, "top_k": 1})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 5 and all(len(line.get("teams", line.get("cases"))) == 1 for line in lines)
+
+
+def test_team_to_case_recs_by_embedding_keeps_the_model_tokenizer_device_call(monkeypatch):
+    import src.embeddings
+    from src.utils import get_team_to_case_recs_by_embedding
+
+    calls = []
+
+    def fake_encode_texts(texts, model, tokenizer, device, batch_size):
+        calls.append((model, tokenizer, device))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr(src.embeddings, "encode_texts", fake_encode_texts)
+    case = {"id": 1, "title": "Case", "description": "d", "required_roles": "Дизайнер"}
+    teams = {7: {"name": "Team 7", "skills": {"A": ["Figma"]}}}
+    # Прежний вызов (case, teams, model, tokenizer, device) работает через TextEncoder
+    df = get_team_to_case_recs_by_embedding(case, teams, "model", "tokenizer", "cpu")
+    assert df["team_id"].tolist() == [7] and calls and set(calls) == {("model", "tokenizer", "cpu")}
@@ -0,0 +1,15 @@
+def test_metrics_endpoint_and_server_timing(client):
+    body = {"person_skills": ["Python", "Kubernetes"], "top_k": 1,
+            "teams": [{"team_id": 1, "name": "Team 1", "skills": {"A": ["Python", "Docker"]}, "required_roles": []}]}
+    plain = client.post("/recommend_team_to_person", json=body)
+    assert "Server-Timing" not in plain.headers
+
+    # Этапы из пула инференса попадают в заголовок запроса
+    timed = client.post("/recommend_team_to_person", json={**body, "top_k": 2}, headers={"X-Server-Timing": "1"})
+    stages = {entry.split(";")[0] for entry in timed.headers["Server-Timing"].split(", ")}
+    assert {"cache_lookup", "queue_wait", "compute", "ranking", "serialize", "total"} <= stages
+
+    text = client.get("/metrics").text
+    assert 'dpp_stage_duration_seconds_count{stage="compute"}' in text
+    assert 'dpp_request_duration_seconds_count{method="POST",route="/recommend_team_to_person",status="200"}' in text
+    assert "# TYPE dpp_inference_queue_depth gauge" in text
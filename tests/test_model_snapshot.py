@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+AutoModel = pytest.importorskip("transformers").AutoModel
+
+from src.config import settings  # noqa: E402
+from src.embeddings import encode_texts, load_embedding_model  # noqa: E402
+from src.model_snapshot import load_mmap_model, save_snapshot  # noqa: E402
+
+
+def test_model_snapshot_loads_offline(tmp_path, monkeypatch):
+    save_snapshot(settings.embedding_model_path, str(tmp_path))
+    assert (tmp_path / "model.safetensors").exists()
+
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    texts = ["Python SQL Docker", "Платформа мониторинга"]
+    original = encode_texts(texts, *load_embedding_model(settings.embedding_model_path, "torch", "cpu"))
+    snapshot = encode_texts(texts, *load_embedding_model(str(tmp_path), "torch", "cpu"))
+    assert np.allclose(original, snapshot, atol=1e-6)
+
+
+def test_mmap_model_shares_snapshot_weights(tmp_path, client):
+    save_snapshot(settings.embedding_model_path, str(tmp_path))
+    model = load_mmap_model(str(tmp_path))
+
+    # Все параметры лежат в отображении файла весов, а не в собственной памяти процесса
+    weights_path = os.path.realpath(tmp_path / "model.safetensors")
+    with open("/proc/self/maps") as f:
+        ranges = [tuple(int(address, 16) for address in line.split()[0].split("-"))
+                  for line in f if line.rstrip().endswith(weights_path)]
+    assert all(any(start <= p.data_ptr() < end for start, end in ranges) for p in model.parameters())
+
+    _, tokenizer, device = load_embedding_model(str(tmp_path), "torch", "cpu")
+    texts = ["Python SQL Docker", "Платформа мониторинга"]
+    reference = AutoModel.from_pretrained(str(tmp_path)).eval()
+    assert np.allclose(encode_texts(texts, model, tokenizer, device),
+                       encode_texts(texts, reference, tokenizer, device), atol=1e-6)
+
+    stats = client.get("/memory_stats").json()
+    assert stats["pid"] == os.getpid() and stats["rss"] >= stats["private"] > 0
@@ -0,0 +1,87 @@
+import pytest
+
+from src.catalogue import Catalogue, CommitError
+from src.persistence import CatalogueJournal
+
+
+def test_catalogue_journal_restores_after_restart(tmp_path):
+    event = {"team_id": 7, "team_title": "Team 7", "case_title": "Case 7", "case_description": "d",
+             "user_fio": "Anna", "person_skills": ["Python"], "case_required_roles": ["Аналитик"]}
+    first = Catalogue()
+    first.open_journal(CatalogueJournal(str(tmp_path), snapshot_every=3))
+    first.upsert_team({"team_id": 1, "name": "Team 1", "skills": {"Ivan": ["SQL"]}, "required_roles": []})
+    first.apply_new_data_batch([event, {**event, "user_fio": "Olga", "person_skills": ["Figma"]}])
+    first.delete_team(1)
+    first.journal.close()
+
+    # Снимок после трех изменений, удаление — в хвосте журнала
+    journal = CatalogueJournal(str(tmp_path), snapshot_every=3)
+    assert journal.pending == 1
+    restored = Catalogue()
+    assert restored.open_journal(journal) == 1
+    assert restored.teams == first.teams
+    assert restored.cases == first.cases
+    assert set(restored.teams[7]["skills"]) == {"Anna", "Olga"}
+    journal.close()
+
+
+def test_catalogue_journal_cuts_torn_tail_before_appending(tmp_path):
+    journal = CatalogueJournal(str(tmp_path))
+    journal.append([("upsert_team", {"team_id": 1})])
+    journal.close()
+    with open(journal.wal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert_team", "da')
+
+    # Недописанная строка обрезается при открытии, новая запись не склеивается с ней
+    journal = CatalogueJournal(str(tmp_path))
+    assert journal.pending == 1
+    journal.append([("upsert_team", {"team_id": 2})])
+    assert [data["team_id"] for _, data in journal.read_log()] == [1, 2]
+    journal.close()
+
+    with open(journal.wal_path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+    with pytest.raises(ValueError, match="line 3"):
+        CatalogueJournal(str(tmp_path))
+
+
+def test_catalogue_logs_only_applied_changes_and_replay_skips_bad_records(tmp_path):
+    event = {"team_id": 7, "team_title": "Team 7", "case_title": "Case 7", "case_description": "d",
+             "user_fio": "Anna", "person_skills": ["Python"], "case_required_roles": ["Аналитик"]}
+    first = Catalogue()
+    first.open_journal(CatalogueJournal(str(tmp_path)))
+    with pytest.raises(CommitError) as error:
+        first.apply_new_data_batch([event, {"team_id": 8}])
+    assert [position for position, _ in error.value.failures] == [1]
+    # Упавшее событие не тронуло каталог и не попало в журнал
+    assert set(first.teams) == {7} and set(first.cases) == {7}
+    assert [data["team_id"] for _, data in first.journal.read_log()] == [7]
+    first.journal.close()
+
+    # Запись, которую нельзя применить (например, из журнала старой версии), пропускается при запуске
+    with open(first.journal.wal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert_case", "data": {"id": 9}}\n')
+    journal = CatalogueJournal(str(tmp_path))
+    restored = Catalogue()
+    assert restored.open_journal(journal) == 1
+    assert restored.teams == first.teams and restored.cases == first.cases
+    journal.close()
+
+
+def test_snapshot_remembers_cases_created_by_new_data(tmp_path):
+    event = {"team_id": 7, "team_title": "Team 7", "case_title": "Case 7", "case_description": "d",
+             "user_fio": "Anna", "person_skills": ["Python"], "case_required_roles": ["Аналитик"]}
+    first = Catalogue()
+    first.open_journal(CatalogueJournal(str(tmp_path), snapshot_every=2))
+    first.apply_new_data(event)
+    first.upsert_case({"id": 8, "title": "Manual", "description": "d", "required_roles": "Дизайнер"})
+    first.journal.close()
+
+    journal = CatalogueJournal(str(tmp_path), snapshot_every=2)
+    assert journal.pending == 0
+    restored = Catalogue()
+    restored.open_journal(journal)
+    restored.apply_new_data({**event, "user_fio": "Olga"})
+    with pytest.raises(CommitError):
+        restored.apply_new_data({**event, "team_id": 8})
+    journal.close()
@@ -0,0 +1,22 @@
+from src.profiling import ProfileStore, RequestProfiler
+
+
+def test_request_profiler_ring_buffer(tmp_path):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path), max_profiles=2), admin_token="secret")
+    work = lambda n: sum(range(n))
+
+    # Без отладочного заголовка и взведенных слотов функция не оборачивается
+    with profiler.request("POST /a", debug_header="wrong"):
+        assert profiler.wrap(work) is work
+
+    profiler.arm(2)
+    for label in ("POST /a", "POST /b", "POST /c"):
+        with profiler.request(label, debug_header="secret" if label == "POST /c" else None) as profile_ids:
+            assert profiler.wrap(work)(1000) == sum(range(1000))
+        assert len(profile_ids) == 1
+    assert profiler.armed == 0
+
+    profiles = profiler.store.list()
+    assert [profile["label"] for profile in profiles] == ["POST /c", "POST /b"]
+    assert "<lambda>" in profiler.store.summary(profiles[0]["id"])
+    assert profiler.store.path("../etc/passwd") is None
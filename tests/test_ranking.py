@@ -0,0 +1,64 @@
+import dataclasses
+
+import numpy as np
+
+import main
+from src.ranking import cascade_survivors, dpp_greedy_map, select_diverse, similarity_features
+
+
+def test_dpp_greedy_map_matches_naive_greedy_and_skips_duplicates():
+    rng = np.random.default_rng(0)
+    quality, features = rng.random(30), rng.standard_normal((30, 8)).astype(np.float32)
+    kernel = np.outer(quality, quality) * (features.astype(np.float64) @ features.T)
+    expected = []
+    for _ in range(5):
+        expected.append(max((i for i in range(30) if i not in expected),
+                            key=lambda i: np.linalg.slogdet(kernel[np.ix_(expected + [i], expected + [i])])[1]))
+    assert dpp_greedy_map(quality, features, 5).tolist() == expected
+
+    # Кандидаты 0 и 1 — дубликаты: с разнообразием второй из них уступает место кандидату 2
+    embeddings = np.array([[1, 0], [1, 0], [0, 1]], dtype=np.float32)
+    skills = np.array([[1, 1, 0], [1, 1, 0], [0, 0, 1]], dtype=np.float32)
+    features = similarity_features((embeddings, 0.5), (skills, 0.5))
+    scores = np.array([0.9, 0.85, 0.5])
+    assert select_diverse(scores, features, 2, 0.0).tolist() == [0, 1]
+    assert select_diverse(scores, features, 2, 0.5).tolist() == [0, 2]
+    assert select_diverse(scores, features, 3, 0.5).tolist() == [0, 2, 1]
+
+
+def test_cascade_embeds_only_skill_survivors(client, stub_encoder):
+    scores = np.array([0.1, 0.7, 0.0, 0.4, 0.7])
+    assert cascade_survivors(scores).tolist() == [0, 1, 2, 3, 4]
+    assert cascade_survivors(scores, max_candidates=2).tolist() == [1, 4]
+    assert cascade_survivors(scores, min_score=0.3).tolist() == [1, 3, 4]
+    assert cascade_survivors(scores, max_candidates=2, min_score=0.75).tolist() == []
+
+    teams = [
+        {"team_id": 1, "name": "Backend", "skills": {"A": ["C#", "Back-end разработка", "SQL"], "B": ["Аналитика"]}},
+        {"team_id": 2, "name": "Frontend", "skills": {"A": ["HTML", "CSS", "React"]}},
+        {"team_id": 3, "name": "Design", "skills": {"A": ["Figma", "Photoshop"]}},
+    ]
+    case = {"id": 1, "title": "Учет заявок", "description": "Сервис учета заявок на C#",
+            "required_roles": "C# Backend, Аналитик"}
+    response = client.post("/recommend_team_to_case",
+                           json={"case": case, "teams": teams, "cascade_k": 1, "top_k": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert [team["team_id"] for team in body["recommended_teams"]] == [1]
+    assert body["cascade"] == {"candidates": 3, "pruned_by_skills": 2, "embedded": 1, "pruned_by_ranking": 0}
+
+
+def test_diversify_runs_the_dpp_on_the_best_scored_pool(monkeypatch):
+    monkeypatch.setattr(main, "settings", dataclasses.replace(main.settings, diversity_pool_size=3))
+    scores = np.array([0.9, 0.1, 0.85, 0.5, 0.8])
+    features = np.array([[1, 0], [0, 1], [1, 0], [0, 1], [0.6, 0.8]], dtype=np.float32)
+    pools = []
+
+    def candidate_features(pool):
+        pools.append(sorted(pool.tolist()))
+        return features[pool]
+
+    # В пул попадают три лучших; дубликат 2 уступает кандидату 4, остальные места — по оценке
+    selected = main.diversify(np.arange(5), scores, None, 0.5, candidate_features)
+    assert pools == [[0, 2, 4]]
+    assert selected.tolist() == [0, 4, 2, 3, 1]
@@ -0,0 +1,56 @@
+import sys
+from types import SimpleNamespace
+
+from src.response_cache import RedisCacheBackend, ResponseCache
+
+
+def test_response_cache_hits_on_equivalent_requests_and_invalidates(client):
+    teams = [
+        {"team_id": 2, "name": "Team 2", "skills": {"A": ["SQL", "Python"]}, "required_roles": []},
+        {"team_id": 1, "name": "Team 1", "skills": {"B": ["Figma"]}, "required_roles": []},
+    ]
+    first = client.post("/recommend_team_to_person",
+                        json={"person_skills": ["Python", "SQL"], "teams": teams, "top_k": 1})
+    second = client.post("/recommend_team_to_person",
+                         json={"person_skills": ["SQL", "Python", "SQL"], "teams": teams[::-1], "top_k": 1.0})
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    client.post("/teams", json={"team_id": 301, "name": "Stored", "skills": {"A": ["Python"]}})
+    client.post("/teams", json={"team_id": 302, "name": "Other stored", "skills": {"A": ["Figma"]}})
+    body = {"person_skills": ["Python"], "top_k": 1}
+    assert client.post("/recommend_team_to_person", json=body).headers["X-Cache"] == "MISS"
+    assert client.post("/recommend_team_to_person", json=body).headers["X-Cache"] == "HIT"
+    client.delete("/teams/301")
+    assert client.post("/recommend_team_to_person", json=body).headers["X-Cache"] == "MISS"
+    client.delete("/teams/302")
+
+
+def test_redis_generation_is_shared_by_processes(monkeypatch):
+    class FakeRedis:
+        store = {}
+
+        @classmethod
+        def from_url(cls, url):
+            return cls()
+
+        def get(self, key):
+            return self.store.get(key)
+
+        def set(self, key, value, ex=None):
+            self.store[key] = value
+
+        def incr(self, key):
+            self.store[key] = str(int(self.store.get(key) or 0) + 1).encode()
+
+    monkeypatch.setitem(sys.modules, "redis", SimpleNamespace(Redis=FakeRedis, RedisError=ConnectionError))
+    # Два процесса с одним сервером Redis: изменение каталога в одном делает недоступными ответы обоих
+    first = ResponseCache(RedisCacheBackend("redis://test", ttl=60))
+    second = ResponseCache(RedisCacheBackend("redis://test", ttl=60))
+    key = second.key("recommend", {"person_skills": ["SQL"]}, uses_catalogue=True)
+    second.set(key, {"ok": True})
+    assert first.get(first.key("recommend", {"person_skills": ["SQL"]}, uses_catalogue=True)) == {"ok": True}
+    first.invalidate()
+    assert second.key("recommend", {"person_skills": ["SQL"]}, uses_catalogue=True) != key
+    assert second.stats()["generation"] == 1
@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.roles import score_teams_for_person
+from src.utils import get_filled_roles, get_required_skills, calculate_weighted_similarity
+
+
+def test_bulk_person_scores_match_per_team_logic():
+    person_skills = ["Python", "Docker", "SQL", "Pandas"]
+    teams = [
+        {"skills": {"A": ["Python", "Django", "Docker"]}, "required_roles": ["Python Backend", "Аналитик"]},
+        {"skills": {"A": ["Figma", "CSS", "UI/UX", "Canva", "HTML", "React"]}, "required_roles": ["Дизайнер"]},
+        {"skills": {"A": ["Python", "SQL"], "B": ["Python"]}},
+    ]
+
+    expected = []
+    for team in teams:
+        required_roles = team.get("required_roles") or []
+        unfilled = [role for role in required_roles if role not in get_filled_roles(team["skills"], required_roles, 0.5)]
+        if unfilled:
+            expected.append(calculate_weighted_similarity(
+                person_skills, get_required_skills(unfilled), get_required_skills(required_roles), 1.5))
+        else:
+            team_skills = [skill for skills in team["skills"].values() for skill in skills]
+            expected.append(calculate_weighted_similarity(person_skills, team_skills, team_skills))
+
+    assert np.allclose(score_teams_for_person(person_skills, teams, 0.5, 1.5), expected)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.skill_embeddings import SkillEmbeddingTable
+from src.utils import encode_teams
+
+
+def test_skill_embedding_table_pools_member_skills(tmp_path):
+    class CountingEncoder:
+        def __init__(self):
+            self.texts = []
+
+        def encode(self, texts):
+            self.texts.extend(texts)
+            return np.array([[len(text), text.count("o"), 1.0] for text in texts], dtype=np.float32)
+
+    encoder = CountingEncoder()
+    table = SkillEmbeddingTable("stub", path=str(tmp_path / "skills.npz"))
+    team = {"A": ["Python", "SQL"], "B": ["Python", "Новый навык"]}
+    embedding = table.encode_teams([team], encoder)[0]
+    # Python есть у двух участников, поэтому его строка входит в среднее с весом 2
+    rows = encoder.encode(["Python", "SQL", "Новый навык"])
+    assert np.allclose(embedding, (2 * rows[0] + rows[1] + rows[2]) / 4)
+
+    # Модель запускается только для новых навыков, а таблица переживает перезапуск
+    encoder.texts.clear()
+    table.encode_teams([{"A": ["Python", "Go"]}], encoder)
+    assert encoder.texts == []
+    restored = SkillEmbeddingTable("stub", path=str(tmp_path / "skills.npz"))
+    assert restored.skills == table.skills
+
+    # Команда из одного навыка совпадает с эмбеддингом текста команды
+    pooled, _ = encode_teams([{"A": ["Python"]}], encoder, mode="skills")
+    text, _ = encode_teams([{"A": ["Python"]}], encoder, mode="text")
+    assert np.allclose(pooled, text)
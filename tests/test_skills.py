@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.roles import score_teams_for_person
+from src.skills import SkillDictionary, SkillVocabulary, cosine_scores, get_vocabulary
+from src.utils import calculate_weighted_similarity
+
+
+def test_skill_vocabulary_batched_cosine_matches_sklearn():
+    vocabulary = SkillVocabulary(["Python", "SQL", "Docker", "Git"])
+    skill_sets = [["Python", "SQL"], ["Docker", "Unknown"], [], ["Git", "Git", "Python"]]
+    matrix = vocabulary.encode_many(skill_sets)
+    query = vocabulary.encode(["Python", "Git"])
+
+    expected = cosine_similarity(matrix.toarray(), query.reshape(1, -1))[:, 0]
+    assert np.allclose(cosine_scores(matrix, query), expected)
+
+
+def test_skill_aliases_and_case_match_the_canonical_skill():
+    dictionary = SkillDictionary(["Python", "Kubernetes", "Grafana"], {"K8S": "Kubernetes"})
+    assert dictionary.canonical("k8s") is dictionary.canonical(" kubernetes ")
+    assert list(dictionary.ids(["python", "K8S", "Go"])) == [0, 1, -1]
+    assert dictionary.canonical("New  skill") == "New skill"
+
+    # Синоним и исходное имя — один столбец; столбец самого синонима остается пустым
+    vocabulary = get_vocabulary(["Python", "K8S", "Kubernetes", "Rust"])
+    assert np.array_equal(vocabulary.columns(["k8s", "KUBERNETES", "Unknown"]), [1])
+    assert np.array_equal(vocabulary.encode_many([["python"], ["Graphana"]]).toarray(), [[1, 0, 0, 0], [0, 0, 0, 0]])
+
+    team = {"skills": {"A": ["Kubernetes", "Grafana", "Automated Testing"]}, "required_roles": []}
+    person = ["k8s", "Graphana", "automated  testing"]
+    assert np.allclose(score_teams_for_person(person, [team]), [1.0])
+    assert np.isclose(calculate_weighted_similarity(person, team["skills"]["A"], team["skills"]["A"]), 1.0)
+
+
+def test_skill_alias_chains_resolve_and_cycles_are_rejected():
+    dictionary = SkillDictionary(["A"], {"Pg": "Postgres", "Postgres": "A", "a ": "A"})
+    assert dictionary.names == ["A"]
+    assert list(dictionary.ids(["pg", "POSTGRES", "a"])) == [0, 0, 0]
+
+    with pytest.raises(ValueError, match="cycle"):
+        SkillDictionary(["A"], {"Pg": "Postgres", "Postgres": "pg"})
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+from src.workers import InferencePool, WorkerPoolSaturated
+
+
+def test_inference_pool_rejects_when_saturated():
+    pool = InferencePool(max_workers=1, max_queue=0, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        try:
+            await pool.run(sum, [1, 2])
+        except WorkerPoolSaturated:
+            rejected = True
+        else:
+            rejected = False
+        release.set()
+        await blocked
+        return rejected, await pool.run(sum, [1, 2])
+
+    rejected, result = asyncio.run(scenario())
+    pool.shutdown()
+    assert rejected
+    assert result == 3
+    assert pool.stats()["rejected"] == 1